@@ -1,20 +1,38 @@
-from tkinter import ttk, messagebox, filedialog
-import json
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import copy
+import os
+import shutil
+import threading
+import time
 from datetime import datetime
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER
-import io
-from PIL import Image as PILImage, ImageTk
-import base64
 
 import ttkbootstrap
 from ui.menu_manager import MenuManager
 from ui.tab_manager import TabManager
-from core.card import crear_card
+from ui.progress import BackgroundTask
+from ui.project_chooser import ProjectChooser
+from core.photo_store import PhotoStore, photo_bytes
+from core.project import new_project, photos_dir_for, read_project, write_project
+from core.repository import ProjectRepository, project_name
+from core.journal import Journal, journal_path, machine_entry, read_journal, record_entry, recovery_path, replay
+from core.thumbnails import ThumbnailCache
+from core.model import RiskStore, HrnStore
+from core.profiling import count, enabled as profiling_enabled, operation, span
+from core.progress import check_cancelled, report_progress
+from core.stats import AnalysisStats
+
+THUMBNAIL_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'riskmgm', 'thumbnails')
+# Proyecto sin título: se autoguarda aquí para poder recuperarlo tras una caída
+AUTOSAVE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'riskmgm', 'autosave', 'sin_titulo.rmp')
+AUTOSAVE_MS = 5000
+COMPACT_EVERY = 200
+COMPACT_INTERVAL_S = 300
+ANALYSIS_REFRESH_MS = 250
+PHOTO_TILE_CHUNK = 8
+PROJECT_FILETYPES = [("JSON files", "*.json"),
+                     ("JSON comprimido", "*.json.gz"),
+                     ("Proyecto compacto (grandes)", "*.rmp")]
+DB_FILETYPES = [("Base de datos SQLite", "*.db *.sqlite")]
 
 class RiskAnalysisISO13849:
     def __init__(self, root):
@@ -22,66 +40,256 @@ class RiskAnalysisISO13849:
         self.root.title("Análisis de Riesgo ISO 13849-1")
         self.root.geometry("1200x800")
 
+        self.machine_data = {}
+        self.risks = RiskStore()
+        self.machine_photos = []
+        self.hrn_calculations = HrnStore()
+        # Estadísticas del análisis, actualizadas con cada cambio en los almacenes
+        self.stats = AnalysisStats()
+        self.stats.attach(self.risks, self.hrn_calculations)
+        # Lo crea la pestaña de análisis la primera vez que se abre
+        self.analysis_chart = None
+        
         MenuManager(root, self)
         
+        # Las pestañas se construyen al seleccionarlas; las listas se enlazan
+        # entonces con los almacenes
         TabManager(root, self)
         
-        self.machine_data = {}
-        self.risks = []
-        self.machine_photos = []
-        self.hrn_calculations = []
+        # Los gráficos se redibujan solos tras los cambios (agrupados)
+        self.analysis_key = None
+        self.analysis_job = None
+        self.risks.subscribe(self.schedule_analysis_refresh)
+        self.hrn_calculations.subscribe(self.schedule_analysis_refresh)
+        # Hasta que el proyecto se guarde por primera vez vive en AUTOSAVE_FILE
+        self.project_file = AUTOSAVE_FILE
+        self.untitled = True
+        self.photo_store = PhotoStore(photos_dir_for(AUTOSAVE_FILE))
+        self.thumbnail_cache = ThumbnailCache(cache_dir=THUMBNAIL_CACHE_DIR)
+        # Se crea con el primer PDF y conserva su pool de procesos para los siguientes
+        self.image_preparer = None
+        # Autoguardado: diario de cambios y compactación periódica
+        self.journal = None
+        self.journal_generation = 0
+        self.compaction = None
+        self.last_compaction = time.monotonic()
+        self.risks.subscribe(self.journal_change)
+        self.hrn_calculations.subscribe(self.journal_change)
+        self.root.after(100, self.start_autosave)
 
     def close_app(self):
         """Cerrar la aplicación"""
+        if not self.untitled and self.journal is not None:
+            # La compactación en curso puede estar escribiendo la recuperación
+            self.wait_compaction()
+            if self.journal.entries or os.path.exists(recovery_path(self.project_file)):
+                # Cambios del proyecto aún no escritos en su archivo: decide el usuario
+                answer = messagebox.askyesnocancel(
+                    "Salir", f"¿Guardar cambios en {os.path.basename(self.project_file)} antes de salir?")
+                if answer is None:
+                    return
+                if answer:
+                    try:
+                        write_project(self.project_file, self.project_snapshot(), self.photo_store)
+                    except Exception as e:
+                        messagebox.showerror("Error", f"Error al guardar el proyecto:\n{str(e)}")
+                        return
+                # Guardados o rechazados, no deben recuperarse al volver a abrir
+                self.discard_recovery()
+                self.destroy()
+                return
+        
         if messagebox.askokcancel("Salir", "¿Está seguro que desea salir?"):
-            self.root.destroy()  
+            if self.untitled:
+                self.discard_autosave()
+            elif self.journal is not None:
+                self.journal.close()
+            self.destroy()  
+
+    def destroy(self):
+        """Liberar el pool de fotos y cerrar la ventana"""
+        if self.image_preparer is not None:
+            self.image_preparer.close()
+        self.root.destroy()
+
+    def start_autosave(self):
+        """Ofrecer recuperar un proyecto sin título de una sesión anterior y arrancar el diario"""
+        recover = False
+        if os.path.exists(AUTOSAVE_FILE) or read_journal(journal_path(AUTOSAVE_FILE)):
+            recover = messagebox.askyesno("Recuperar", "Se encontró trabajo sin guardar de una sesión "
+                                          "anterior.\n¿Desea recuperarlo?")
+            if not recover:
+                self.discard_autosave()
+        
+        if recover:
+            # El diario se abre al terminar la carga, tras reaplicarlo
+            self.open_project(AUTOSAVE_FILE, untitled=True)
+        else:
+            self.journal = Journal(journal_path(AUTOSAVE_FILE), truncate=True)
+        self.root.after(AUTOSAVE_MS, self.autosave_tick)
+
+    def discard_autosave(self):
+        """Borrar el autoguardado del proyecto sin título"""
+        if self.journal is not None and self.journal.path == journal_path(AUTOSAVE_FILE):
+            self.journal.close()
+            self.journal = None
+        self.journal_generation += 1
+        for path in (AUTOSAVE_FILE, journal_path(AUTOSAVE_FILE)):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(photos_dir_for(AUTOSAVE_FILE), ignore_errors=True)
+
+    def discard_recovery(self):
+        """Borrar el diario y la recuperación del proyecto con nombre (cambios guardados o rechazados)"""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.journal_generation += 1
+        recovery = recovery_path(self.project_file)
+        for path in (journal_path(self.project_file), recovery):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(photos_dir_for(recovery), ignore_errors=True)
+
+    def journal_change(self, store, event, record, previous=None):
+        """Anexar al diario cada alta, edición o baja de riesgos y cálculos HRN"""
+        if self.journal is not None and event != 'reset':
+            kind = 'risks' if store is self.risks else 'hrn_calculations'
+            self.journal.append(record_entry(kind, event, record))
+
+    def journal_machine(self):
+        """Anexar al diario los datos de la máquina y las fotos actuales"""
+        if self.journal is not None:
+            self.journal.append(machine_entry(self.machine_data, self.machine_photos))
+
+    def autosave_tick(self):
+        """Pasar el diario a disco y compactarlo cada cierto tiempo"""
+        if self.journal is not None and self.journal.entries:
+            self.journal.sync()
+            due = time.monotonic() - self.last_compaction >= COMPACT_INTERVAL_S
+            if self.compaction is None and (self.journal.entries >= COMPACT_EVERY or due):
+                self.compact()
+        self.root.after(AUTOSAVE_MS, self.autosave_tick)
+
+    def compact(self):
+        """Escribir la recuperación en segundo plano y quitar del diario lo ya escrito.
+
+        El proyecto sin título se compacta en su propio autoguardado; uno con
+        nombre, en su archivo de recuperación, ya que el archivo del proyecto
+        solo se escribe al guardar.
+        """
+        entries, generation = self.journal.entries, self.journal_generation
+        filename = self.project_file if self.untitled else recovery_path(self.project_file)
+        project, store = self.project_snapshot(), self.photo_store
+        outcome = {}
+        
+        def work():
+            try:
+                write_project(filename, project, store, prune=False)
+                outcome['ok'] = True
+            except Exception as e:
+                outcome['error'] = e
+        
+        def check():
+            if self.compaction.is_alive():
+                self.root.after(200, check)
+                return
+            self.compaction = None
+            self.last_compaction = time.monotonic()
+            # Si falla, el diario se conserva y se reintenta más adelante
+            if outcome.get('ok') and generation == self.journal_generation:
+                self.journal.discard(entries)
+        
+        self.compaction = threading.Thread(target=work, daemon=True)
+        self.compaction.start()
+        self.root.after(200, check)
+
+    def wait_compaction(self):
+        """Esperar a que termine la compactación en curso (bloquea el hilo que llama)"""
+        compaction = self.compaction
+        if compaction is not None:
+            compaction.join()
+
+    def switch_project_file(self, filename, untitled=False, truncate=True):
+        """Asociar el diario a otro archivo de proyecto"""
+        if self.untitled and filename != AUTOSAVE_FILE:
+            self.discard_autosave()
+        elif self.journal is not None:
+            self.journal.close()
+        self.project_file = filename
+        self.untitled = untitled
+        self.journal = Journal(journal_path(filename), truncate=truncate)
+        self.journal_generation += 1
+        self.last_compaction = time.monotonic()
     
     def update_photos_display(self):
-        """Actualizar visualización de fotos"""
-        
-        for widget in self.photos_inner_frame.winfo_children():
-            widget.destroy()
+        """Actualizar visualización de fotos.
+
+        Solo se crean o destruyen las miniaturas que cambiaron; las
+        imágenes reducidas salen de la caché de miniaturas.
+        """
+        keys = []
+        seen = {}
+        for photo in self.machine_photos:
+            n = seen.get(photo['sha256'], 0)
+            seen[photo['sha256']] = n + 1
+            keys.append((photo['sha256'], n))
         
-        self.photo_labels.clear()
+        for key in set(self.photo_tiles) - set(keys):
+            self.photo_tiles.pop(key).destroy()
         
         if not self.machine_photos:
-            ttk.Label(self.photos_inner_frame, text="No hay fotos añadidas", 
-                     foreground='gray').pack(pady=20)
-            return
-        
-        for i, photo in enumerate(self.machine_photos):
-            frame = ttk.Frame(self.photos_inner_frame, relief='solid', borderwidth=1)
-            frame.pack(side='left', padx=5, pady=5)
-            
-            try:
-                img_data = base64.b64decode(photo['data'])
-                img = PILImage.open(io.BytesIO(img_data))
-                
-                # Crear miniatura
-                img.thumbnail((120, 120), PILImage.Resampling.LANCZOS)
-                photo_img = ImageTk.PhotoImage(img)
-                
-                # Mostrar miniatura
-                label = ttk.Label(frame, image=photo_img)
-                label.image = photo_img  # Mantener referencia
-                label.pack()
-                
-                # Nombre del archivo
-                name_label = ttk.Label(frame, text=photo['filename'][:15] + '...' 
-                                      if len(photo['filename']) > 15 else photo['filename'],
-                                      font=('Arial', 8))
-                name_label.pack()
-                
-                self.photo_labels.append(label)
-                
-            except Exception as e:
-                ttk.Label(frame, text=f"Error\n{photo['filename']}", 
-                         foreground='red', font=('Arial', 8)).pack()
+            if self.photos_empty_label is None:
+                self.photos_empty_label = ttk.Label(self.photos_inner_frame, text="No hay fotos añadidas", 
+                                                    foreground='gray')
+                self.photos_empty_label.pack(pady=20)
+        else:
+            if self.photos_empty_label is not None:
+                self.photos_empty_label.destroy()
+                self.photos_empty_label = None
+            
+            repack = list(self.photo_tiles) != keys[:len(self.photo_tiles)]
+            for key, photo in zip(keys, self.machine_photos):
+                if key not in self.photo_tiles:
+                    self.photo_tiles[key] = self.create_photo_tile(photo)
+                elif repack:
+                    self.photo_tiles[key].pack_forget()
+                    self.photo_tiles[key].pack(side='left', padx=5, pady=5)
+            self.photo_tiles = {key: self.photo_tiles[key] for key in keys}
         
         # Actualizar región de scroll
         self.photos_inner_frame.update_idletasks()
         self.photos_canvas.configure(scrollregion=self.photos_canvas.bbox("all"))
     
+    def create_photo_tile(self, photo):
+        """Crear el recuadro de miniatura de una foto"""
+        frame = ttk.Frame(self.photos_inner_frame, relief='solid', borderwidth=1)
+        frame.pack(side='left', padx=5, pady=5)
+        
+        try:
+            # Crear miniatura
+            img = self.thumbnail_cache.get(photo['sha256'],
+                                           lambda: photo_bytes(photo, self.photo_store))
+            from PIL import ImageTk
+            photo_img = ImageTk.PhotoImage(img)
+            
+            # Mostrar miniatura
+            label = ttk.Label(frame, image=photo_img)
+            label.image = photo_img  # Mantener referencia
+            label.pack()
+            
+            # Nombre del archivo
+            name_label = ttk.Label(frame, text=photo['filename'][:15] + '...' 
+                                  if len(photo['filename']) > 15 else photo['filename'],
+                                  font=('Arial', 8))
+            name_label.pack()
+            
+        except Exception as e:
+            ttk.Label(frame, text=f"Error\n{photo['filename']}", 
+                     foreground='red', font=('Arial', 8)).pack()
+        
+        return frame
+    
     def generate_pdf(self):
         """Generar reporte en PDF"""
         if not self.machine_data:
@@ -101,260 +309,242 @@ class RiskAnalysisISO13849:
         if not filename:
             return
         
-        try:
-            doc = SimpleDocTemplate(filename, pagesize=letter)
-            doc.topMargin = 0.75 * inch
-            doc.bottomMargin = 0.5 * inch
-            doc.leftMargin = 0.75 * inch
-            doc.rightMargin = 0.75 * inch
-            story = []
-            styles = getSampleStyleSheet()
-            normal_style = styles['Normal']
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                textColor=colors.HexColor('#003366'),
-                spaceAfter=20,
-                alignment=TA_CENTER
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                textColor=colors.HexColor('#003366'),
-                spaceAfter=12,
-                spaceBefore=12
-            )
-            
-            # Título
-            story.append(Paragraph("Análisis de Riesgo según ISO 13849-1", title_style))
-            story.append(Spacer(1, 0.3*inch))
-            
-            # Datos de la máquina
-            story.append(Paragraph("DATOS DE LA MÁQUINA", heading_style))
-            
-            machine_table_data = [
-                ['Campo', 'Valor'],
-                ['Tipo de Máquina', self.machine_data.get('machine_type', '')],
-                ['Modelo', self.machine_data.get('model', '')],
-                ['Fabricante', self.machine_data.get('manufacturer', '')],
-                ['Número de Serie', self.machine_data.get('serial_number', '')],
-                ['Año', self.machine_data.get('year', '')],
-                ['Ubicación', self.machine_data.get('location', '')],
-                ['Analista', self.machine_data.get('analyst', '')],
-                ['Fecha de Análisis', self.machine_data.get('date', '')],
-            ]        
-            machine_table = Table(machine_table_data, colWidths=[2*inch, 4*inch])
-            machine_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003366')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(machine_table)
-            story.append(Spacer(1, 0.3*inch))
-            
-            if self.machine_data.get('description'):
-                story.append(Paragraph("Descripción:", styles['Heading3']))
-                story.append(Paragraph(self.machine_data['description'], styles['Normal']))
-                story.append(Spacer(1, 0.2*inch))
-            
-            story.append(PageBreak())
-            
-            # Tabla de riesgos
-            story.append(Paragraph("EVALUACIÓN DE RIESGOS", heading_style))
-            for i, risk in enumerate(self.risks, 1):
-                story.append(crear_card(risk))
-                story.append(Spacer(1, 0.2*inch))
-
-            # Cálculos HRN si existen
-            if self.hrn_calculations:
-                story.append(PageBreak())
-                story.append(Paragraph("CÁLCULOS HRN (HAZARD RATING NUMBER)", heading_style))
-                
-                hrn_table_data = [['#', 'Descripción', 'LO', 'FE', 'DPH', 'NP', 'HRN', 'Nivel']]
-                
-                for i, calc in enumerate(self.hrn_calculations, 1):
-                    hrn_table_data.append([
-                        str(i),
-                        Paragraph(calc['description'], normal_style),  
-                        str(calc['lo']),
-                        str(calc['fe']),
-                        str(calc['dph']),
-                        str(calc['np']),
-                        f"{calc['hrn']:.2f}",
-                        calc['level']
-                    ])
-                
-                hrn_table = Table(hrn_table_data, colWidths=[0.3*inch, 2*inch, 0.5*inch, 
-                                                             0.5*inch, 0.5*inch, 0.5*inch, 
-                                                             0.7*inch, 1.5*inch])
-                hrn_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003366')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ]))
-                
-                story.append(hrn_table)
-                story.append(Spacer(1, 0.3*inch))
-                
-                # Detalle de cálculos HRN
-                story.append(Paragraph("Detalle de Cálculos HRN:", styles['Heading3']))
-                
-                for i, calc in enumerate(self.hrn_calculations, 1):
-                    story.append(Paragraph(f"<b>{i}. {calc['description']}</b>", styles['Normal']))
-                    story.append(Paragraph(f"LO ({calc['lo']}): {calc['lo_desc']}", styles['Normal']))
-                    story.append(Paragraph(f"FE ({calc['fe']}): {calc['fe_desc']}", styles['Normal']))
-                    story.append(Paragraph(f"DPH ({calc['dph']}): {calc['dph_desc']}", styles['Normal']))
-                    story.append(Paragraph(f"NP ({calc['np']}): {calc['np_desc']}", styles['Normal']))
-                    story.append(Paragraph(f"<b>HRN = {calc['hrn']:.2f} → {calc['level']}</b>", styles['Normal']))
-                    story.append(Spacer(1, 0.15*inch))
-
-            # Gráficos
-            if self.risks:
-                self.update_analysis()
-                
-                buf = io.BytesIO()
-                self.fig.savefig(buf, format='png', dpi=250, bbox_inches='tight')
-                buf.seek(0)
-                
-                story.append(PageBreak())
-                story.append(Paragraph("ANÁLISIS GRÁFICO", heading_style))
-
-                for i, calc in enumerate(self.hrn_calculations, 1):
-                    story.append(Paragraph(f"<b>{i}. {calc['description']}</b>", styles['Normal']))
-                    story.append(Paragraph(f"LO ({calc['lo']}): {calc['lo_desc']}", styles['Normal']))
-                    story.append(Paragraph(f"FE ({calc['fe']}): {calc['fe_desc']}", styles['Normal']))
-                    story.append(Paragraph(f"DPH ({calc['dph']}): {calc['dph_desc']}", styles['Normal']))
-                    story.append(Paragraph(f"NP ({calc['np']}): {calc['np_desc']}", styles['Normal']))
-                    story.append(Paragraph(f"<b>HRN = {calc['hrn']:.2f} → {calc['level']}</b>", styles['Normal']))
-                    story.append(Spacer(1, 0.15*inch))
-
-            # Gráficos
-            if self.risks:
-                self.update_analysis()
-                
-                # Guardar gráfico como imagen
-                buf = io.BytesIO()
-                self.fig.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-                buf.seek(0)
-                
-                story.append(PageBreak())
-                story.append(Paragraph("ANÁLISIS GRÁFICO", heading_style))
-                
-                img = Image(buf, width=7*inch, height=3.5*inch)
-                story.append(img)
-            
-            self.add_photos_to_pdf(story, styles)
-            
-            doc.build(story)
-            messagebox.showinfo("Éxito", f"Reporte PDF generado correctamente:\n{filename}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al generar PDF:\n{str(e)}")
-    
-    def add_photos_to_pdf(self, story, styles):
-        """Añadir fotos al PDF"""
-        if not self.machine_photos:
-            return
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#003366'),
-            spaceAfter=12,
-            spaceBefore=12
-        )
+        project = self.project_snapshot()
         
-        story.append(PageBreak())
-        story.append(Paragraph("FOTOGRAFÍAS DE LA MÁQUINA", heading_style))
-        story.append(Spacer(1, 0.2*inch))
+        def build(progress, cancel_event):
+            # reportlab y matplotlib se importan al generar el primer PDF
+            from core.images import ImagePreparer
+            from core.report import build_report
+            if self.image_preparer is None:
+                self.image_preparer = ImagePreparer()
+            return build_report(filename, project, progress, cancel_event, self.image_preparer)
         
-        # Añadir fotos (máximo 2 por página)
-        for i, photo in enumerate(self.machine_photos):
-            try:
-                # Decodificar imagen desde base64
-                img_data = base64.b64decode(photo['data'])
-                img_buffer = io.BytesIO(img_data)
-                
-                # Crear imagen para PDF
-                img = Image(img_buffer, width=5*inch, height=3.5*inch, kind='proportional')
-                story.append(img)
-                story.append(Paragraph(f"<i>Figura {i+1}: {photo['filename']}</i>", styles['Normal']))
-                story.append(Spacer(1, 0.3*inch))
-                
-                # Nueva página cada 2 fotos
-                if (i + 1) % 2 == 0 and i < len(self.machine_photos) - 1:
-                    story.append(PageBreak())
-                    
-            except Exception as e:
-                story.append(Paragraph(f"<i>Error al cargar imagen: {photo['filename']}</i>", 
-                                      styles['Normal']))
-                story.append(Spacer(1, 0.2*inch))
+        BackgroundTask(
+            self.root,
+            build,
+            title="Generando PDF",
+            on_success=lambda _: messagebox.showinfo("Éxito", f"Reporte PDF generado correctamente:\n{filename}"),
+            on_error=lambda e: messagebox.showerror("Error", f"Error al generar PDF:\n{str(e)}"),
+            on_cancel=lambda _: messagebox.showinfo("Información", "Generación del PDF cancelada")
+        ).start()
+
+    def generate_fleet_report(self):
+        """Reporte PDF consolidado de todos los proyectos de un directorio"""
+        directory = filedialog.askdirectory(title="Directorio con los proyectos de la línea o planta")
+        if not directory:
+            return
+
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF files", "*.pdf")],
+            initialfile=f"Reporte_Consolidado_{datetime.now().strftime('%Y%m%d')}.pdf"
+        )
+        if not filename:
+            return
+
+        def build(progress, cancel_event):
+            from core.batch import find_projects
+            from core.fleet import build_fleet_report
+            projects = find_projects([directory])
+            if not projects:
+                raise ValueError("No se encontraron proyectos en el directorio")
+            return build_fleet_report(filename, projects, progress, cancel_event)
+
+        def done(fleet):
+            message = f"Reporte consolidado de {len(fleet.machines)} proyectos generado:\n{filename}"
+            if fleet.failed:
+                skipped = "\n".join(os.path.basename(path) for path, _ in fleet.failed)
+                message += f"\n\nNo se pudieron leer:\n{skipped}"
+            messagebox.showinfo("Éxito", message)
+
+        BackgroundTask(
+            self.root,
+            build,
+            title="Generando reporte consolidado",
+            on_success=done,
+            on_error=lambda e: messagebox.showerror("Error", f"Error al generar el reporte consolidado:\n{str(e)}"),
+            on_cancel=lambda _: messagebox.showinfo("Información", "Generación del reporte cancelada")
+        ).start()
+
+    def project_snapshot(self):
+        """Copiar el estado actual para guardar o generar el reporte fuera del hilo principal"""
+        return {
+            'machine_data': copy.deepcopy(self.machine_data),
+            'risks': self.risks.snapshot(),
+            'hrn_calculations': self.hrn_calculations.snapshot(),
+            'stats': self.stats.copy(),
+            'photos': copy.deepcopy(self.machine_photos),
+            'photo_dir': self.photo_store.root
+        }
     
     def save_project(self):
         """Guardar proyecto en JSON"""
         filename = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json")]
+            filetypes=PROJECT_FILETYPES
         )
         
         if filename:
-            # Limpiar machine_data de cualquier clave de fotos para evitar duplicados
-            machine_data_clean = dict(self.machine_data)
-            for k in ('photos', 'machine_photos', 'images'):
-                machine_data_clean.pop(k, None)
-
-            project_data = {
-                'machine_data': machine_data_clean,
-                'risks': self.risks,
-                'photos': self.machine_photos,
-                'hrn_calculations': self.hrn_calculations
-            }
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(project_data, f, indent=4, ensure_ascii=False)
-            
-            messagebox.showinfo("Éxito", "Proyecto guardado correctamente")
+            # Las fotos se guardan en el directorio asociado, no en el JSON
+            project = self.project_snapshot()
+            store = self.photo_store
+            
+            def save(progress, cancel_event):
+                self.wait_compaction()
+                return write_project(filename, project, store, progress, cancel_event)
+            
+            def saved(target):
+                self.photo_store = target
+                # Todo lo anotado en el diario y en la recuperación quedó en el archivo
+                if not self.untitled:
+                    self.wait_compaction()
+                    self.discard_recovery()
+                self.switch_project_file(filename)
+                messagebox.showinfo("Éxito", "Proyecto guardado correctamente")
+            
+            BackgroundTask(
+                self.root,
+                save,
+                title="Guardando proyecto",
+                on_success=saved,
+                on_error=lambda e: messagebox.showerror("Error", f"Error al guardar el proyecto:\n{str(e)}"),
+                on_cancel=lambda _: messagebox.showinfo("Información", "Guardado cancelado; el archivo no se modificó")
+            ).start()
     
     def load_project(self):
         """Cargar proyecto desde JSON"""
         filename = filedialog.askopenfilename(
-            filetypes=[("JSON files", "*.json")]
+            filetypes=[("Proyectos", "*.json *.json.gz *.rmp")] + PROJECT_FILETYPES
         )
         
         if filename:
-            with open(filename, 'r', encoding='utf-8') as f:
-                project_data = json.load(f)
-            
-            # Cargar datos de máquina
-            self.machine_data = project_data.get('machine_data', {}) or {}
+            self.open_project(filename)
 
-            # Migrar fotos anidadas si existieran (compatibilidad con archivos antiguos)
-            nested_photos = self.machine_data.pop('photos', None)
+    def open_project(self, filename, untitled=False):
+        """Abrir un proyecto en segundo plano reaplicando su diario de cambios"""
+        # Lectura y miniaturas en segundo plano; el proyecto actual no
+        # cambia hasta que la carga termina
+        BackgroundTask(
+            self.root,
+            lambda progress, cancel_event: self.read_project_task(filename, progress, cancel_event),
+            title="Abriendo proyecto",
+            on_success=lambda result: self.apply_project(result, filename, untitled),
+            on_error=lambda e: messagebox.showerror("Error", f"Error al abrir el proyecto:\n{str(e)}"),
+            on_cancel=lambda _: messagebox.showinfo("Información", "Apertura del proyecto cancelada")
+        ).start()
 
-            # Elegir fotos preferentemente desde la clave superior
-            if 'photos' in project_data:
-                self.machine_photos = project_data.get('photos') or []
-            elif nested_photos is not None:
-                self.machine_photos = nested_photos
+    def read_project_task(self, filename, progress, cancel_event):
+        """Leer el proyecto y preparar las miniaturas (hilo de trabajo, sin widgets)"""
+        with operation("Abrir proyecto"):
+            # Cambios compactados de una sesión anterior que no se llegaron a guardar
+            recovery = recovery_path(filename)
+            source = recovery if os.path.exists(recovery) else filename
+            # Las fotos antiguas en base64 quedan en un almacén temporal hasta guardar
+            if os.path.exists(source):
+                project_data, store = read_project(source, progress, cancel_event)
             else:
-                self.machine_photos = []
+                # Autoguardado sin título que no llegó a compactarse
+                project_data, store = new_project(), PhotoStore(photos_dir_for(filename))
+            
+            # Reaplicar los cambios del diario que no llegaron a compactarse
+            with span("reaplicar diario"):
+                replayed = replay(project_data, read_journal(journal_path(filename)))
+            count("cambios recuperados", replayed)
+            recovered = bool(replayed) or source == recovery
+            self.prepare_thumbnails(project_data['photos'], store, progress, cancel_event)
+        return project_data, store, recovered
+
+    def prepare_thumbnails(self, photos, store, progress, cancel_event):
+        """Generar las miniaturas que falten en la caché (hilo de trabajo)"""
+        with span("miniaturas"):
+            for i, photo in enumerate(photos):
+                check_cancelled(cancel_event)
+                report_progress(progress, 90 + 10 * i / len(photos), f"Miniaturas ({i + 1}/{len(photos)})")
+                try:
+                    self.thumbnail_cache.get(photo['sha256'], lambda: store.get(photo['sha256']))
+                except Exception:
+                    pass  # create_photo_tile mostrará el error
+
+    def load_project_from_db(self):
+        """Abrir un proyecto de un repositorio SQLite; queda sin título hasta guardarlo"""
+        database = filedialog.askopenfilename(filetypes=DB_FILETYPES)
+        if not database:
+            return
+        try:
+            with ProjectRepository(database) as repo:
+                projects = repo.projects()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al abrir la base de datos:\n{str(e)}")
+            return
+        if not projects:
+            messagebox.showinfo("Información", "La base de datos no contiene proyectos")
+            return
+        ProjectChooser(self.root, projects, lambda name: self.open_db_project(database, name))
 
+    def open_db_project(self, database, name):
+        """Leer un proyecto de la base en segundo plano"""
+        def read(progress, cancel_event):
+            # Conexión propia del hilo: sqlite3 no comparte conexiones entre hilos
+            with operation("Abrir proyecto de la base de datos"), ProjectRepository(database) as repo:
+                project_data, store = repo.load(name, progress, cancel_event)
+                self.prepare_thumbnails(project_data['photos'], store, progress, cancel_event)
+            return project_data, store, False
+        
+        BackgroundTask(
+            self.root,
+            read,
+            title="Abriendo proyecto",
+            on_success=lambda result: self.apply_project(result, AUTOSAVE_FILE, untitled=True, fresh=True),
+            on_error=lambda e: messagebox.showerror("Error", f"Error al abrir el proyecto:\n{str(e)}"),
+            on_cancel=lambda _: messagebox.showinfo("Información", "Apertura del proyecto cancelada")
+        ).start()
+
+    def save_project_to_db(self):
+        """Guardar el proyecto actual en un repositorio SQLite (nuevo o existente)"""
+        database = filedialog.asksaveasfilename(defaultextension=".db", filetypes=DB_FILETYPES,
+                                                confirmoverwrite=False)
+        if not database:
+            return
+        default = self.machine_data.get('machine_type', '') if self.untitled else project_name(self.project_file)
+        name = simpledialog.askstring("Guardar en base de datos", "Nombre del proyecto:",
+                                      initialvalue=default, parent=self.root)
+        if not name:
+            return
+        project, store = self.project_snapshot(), self.photo_store
+        
+        def save(progress, cancel_event):
+            with ProjectRepository(database) as repo:
+                repo.save(name, project, store, progress, cancel_event)
+        
+        BackgroundTask(
+            self.root,
+            save,
+            title="Guardando en base de datos",
+            on_success=lambda _: messagebox.showinfo("Éxito", f"Proyecto '{name}' guardado en la base de datos"),
+            on_error=lambda e: messagebox.showerror("Error", f"Error al guardar el proyecto:\n{str(e)}"),
+            on_cancel=lambda _: messagebox.showinfo("Información", "Guardado cancelado; la base no se modificó")
+        ).start()
+
+    def apply_project(self, result, filename, untitled=False, fresh=False):
+        """Aplicar el proyecto leído a la interfaz por tramos con root.after.
+
+        Con fresh=True el proyecto no viene de `filename` sino, p. ej., de la
+        base de datos: se descarta el autoguardado anterior, sus fotos se copian
+        al almacén del autoguardado y se escribe uno nuevo.
+        """
+        project_data, self.photo_store, recovered = result
+        # Mientras se aplica no se anota nada; switch_project_file abre el
+        # diario del archivo al final
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        
+        # Cargar datos de máquina
+        self.machine_data = project_data['machine_data']
+        self.machine_photos = []
+        photos = project_data['photos']
+        
+        def load_machine_data():
             # Cargar datos en la interfaz
             for key, value in self.machine_data.items():
                 if key in self.machine_entries:
@@ -363,40 +553,53 @@ class RiskAnalysisISO13849:
                 elif key == 'description':
                     self.description_text.delete('1.0', 'end')
                     self.description_text.insert('1.0', value)
-            
-            # Cargar fotos (ya migradas)
+        
+        def load_photos(chunk):
+            self.machine_photos.extend(chunk)
             self.update_photos_display()
-            
-            # Cargar riesgos ISO 13849
-            self.risks = project_data.get('risks', [])
-            
-            # Actualizar treeview de riesgos
-            for item in self.risk_tree.get_children():
-                self.risk_tree.delete(item)
-            for idx, risk in enumerate(self.risks, 1):
-                self.risk_tree.insert('', 'end', text=str(idx), values=(
-                    risk['description'][:30] + '...' if len(risk['description']) > 30 else risk['description'],
-                    risk['zone'],
-                    risk['severity'].split('-')[0].strip(),
-                    risk['frequency'].split('-')[0].strip(),
-                    risk['avoidance'].split('-')[0].strip(),
-                    risk['plr']
-                ))
-            
-            # Cargar cálculos HRN
-            self.hrn_calculations = project_data.get('hrn_calculations', [])
-            
-            # Actualizar treeview de HRN
-            for item in self.hrn_tree.get_children():
-                self.hrn_tree.delete(item)
-            for idx, calc in enumerate(self.hrn_calculations, 1):
-                self.hrn_tree.insert('', 'end', text=str(idx), values=(
-                    calc['description'][:40] + '...' if len(calc['description']) > 40 else calc['description'],
-                    f"{calc['hrn']:.2f}",
-                    calc['level']
-                ))
-            
-            messagebox.showinfo("Éxito", "Proyecto cargado correctamente")
+        
+        steps = [
+            load_machine_data,
+            # Cargar riesgos y cálculos HRN (las listas virtuales se refrescan solas)
+            lambda: self.risks.replace(project_data['risks']),
+            lambda: self.hrn_calculations.replace(project_data['hrn_calculations']),
+            self.update_photos_display
+        ]
+        # Cargar fotos por tramos (las miniaturas ya están en caché)
+        for start in range(0, len(photos), PHOTO_TILE_CHUNK):
+            steps.append(lambda chunk=photos[start:start + PHOTO_TILE_CHUNK]: load_photos(chunk))
+        if fresh:
+            steps.append(self.discard_autosave)
+            # Las fotos nuevas van al almacén del autoguardado, no al de la base
+            steps.append(lambda: self.adopt_photos(photos, photos_dir_for(AUTOSAVE_FILE)))
+        steps.append(lambda: self.switch_project_file(filename, untitled, truncate=fresh))
+        if fresh:
+            # Escribir ya el autoguardado para poder recuperarlo tras una caída
+            steps.append(lambda: self.compaction is None and self.compact())
+        message = "Proyecto cargado correctamente"
+        if recovered:
+            message += "\nSe recuperaron cambios sin guardar de una sesión anterior"
+        skipped = project_data.get('skipped')
+        if skipped:
+            message += f"\n\nSe omitieron {len(skipped)} registros no válidos:\n" + "\n".join(skipped[:10])
+        steps.append(lambda: messagebox.showinfo("Éxito", message))
+        
+        self.run_steps(iter(steps))
+
+    def adopt_photos(self, photos, root):
+        """Pasar las fotos del proyecto al almacén `root` (enlaces duros si es posible) y usarlo"""
+        source, target = self.photo_store, PhotoStore(root)
+        for photo in photos:
+            if source.has(photo['sha256']):
+                target.import_from(source, photo['sha256'])
+        self.photo_store = target
+
+    def run_steps(self, steps):
+        """Ejecutar un paso por vuelta del bucle de Tk para no bloquear la ventana"""
+        step = next(steps, None)
+        if step is not None:
+            step()
+            self.root.after(1, lambda: self.run_steps(steps))
 
     def update_analysis(self):
         """Actualizar análisis y gráficos"""
@@ -404,168 +607,42 @@ class RiskAnalysisISO13849:
             messagebox.showinfo("Información", "No hay datos para analizar")
             return
         
-        self.fig.clear()
-
-        has_iso_risks = len(self.risks) > 0
-        has_hrn_calcs = len(self.hrn_calculations) > 0
-        
-        if has_iso_risks and has_hrn_calcs:
-            ax1 = self.fig.add_subplot(221)
-            ax2 = self.fig.add_subplot(222)
-            ax3 = self.fig.add_subplot(223)
-            ax4 = self.fig.add_subplot(224)
-        elif has_iso_risks:
-            ax1 = self.fig.add_subplot(121)
-            ax2 = self.fig.add_subplot(122)
-        elif has_hrn_calcs:
-            ax3 = self.fig.add_subplot(121)
-            ax4 = self.fig.add_subplot(122)
-        
-        iso_stats = ""
-        hrn_stats = ""
-        
-        # Análisis ISO 13849
-        if has_iso_risks:
-            total = len(self.risks)
-            plr_count = {}
-            for risk in self.risks:
-                plr = risk['plr']
-                plr_count[plr] = plr_count.get(plr, 0) + 1
-            
-            iso_stats += f"=== ISO 13849-1 ===\n"
-            iso_stats += f"Total de Riesgos: {total}\n"
-            iso_stats += "Distribución por PLr:\n"
-            for plr in sorted(plr_count.keys()):
-                percentage = (plr_count[plr] / total) * 100
-                iso_stats += f"  PLr {plr}: {plr_count[plr]} ({percentage:.1f}%)\n"
-            
-            plr_labels = sorted(plr_count.keys())
-            plr_values = [plr_count[plr] for plr in plr_labels]
-            colors_map = {'A': '#90EE90', 'B': '#FFFF99', 'C': '#FFD700', 
-                        'D': '#FFA500', 'E': '#FF6347'}
-            bar_colors = [colors_map.get(plr, 'gray') for plr in plr_labels]
-            
-            ax1.bar(plr_labels, plr_values, color=bar_colors, edgecolor='black')
-            ax1.set_xlabel('Performance Level Requerido')
-            ax1.set_ylabel('Cantidad de Riesgos')
-            ax1.set_title('Distribución de Riesgos por PLr (ISO 13849)')
-            ax1.grid(axis='y', alpha=0.3)
-            
-            # Gráfico circular - Severidad
-            s_count = {}
-            for risk in self.risks:
-                s = 'S1' if 'S1' in risk['severity'] else 'S2'
-                s_count[s] = s_count.get(s, 0) + 1
-            
-            ax2.pie(s_count.values(), labels=s_count.keys(), autopct='%1.1f%%',
-                colors=['#90EE90', '#FF6347'], startangle=90)
-            ax2.set_title('Distribución por Severidad')
-        
-        # Análisis HRN
-        if has_hrn_calcs:
-            total_hrn = len(self.hrn_calculations)
-            hrn_levels = {}
-            
-            hrn_stats += f"=== Método HRN ===\n"
-            hrn_stats += f"Total de Cálculos: {total_hrn}\n"
-            hrn_stats += "Distribución por Nivel:\n"
-            
-            for calc in self.hrn_calculations:
-                level = calc['level']
-                hrn_levels[level] = hrn_levels.get(level, 0) + 1
-            
-            for level in hrn_levels:
-                percentage = (hrn_levels[level] / total_hrn) * 100
-                hrn_stats += f"  {level}: {hrn_levels[level]} ({percentage:.1f}%)\n"
-            
-            level_order = [
-                "Riesgo Despreciable",
-                "Riesgo Muy Bajo",
-                "Riesgo Bajo",
-                "Riesgo Significante",
-                "Riesgo Alto",
-                "Riesgo Muy Alto",
-                "Riesgo Extremo",
-                "Riesgo Inaceptable"
-            ]
-            
-            level_colors = {
-                "Riesgo Despreciable": '#90EE90',
-                "Riesgo Muy Bajo": '#98FB98',
-                "Riesgo Bajo": '#FFFF99',
-                "Riesgo Significante": '#FFD700',
-                "Riesgo Alto": '#FFA500',
-                "Riesgo Muy Alto": '#FF6347',
-                "Riesgo Extremo": '#DC143C',
-                "Riesgo Inaceptable": '#8B0000'
-            }
-            
-            present_levels = [level for level in level_order if level in hrn_levels]
-            level_values = [hrn_levels[level] for level in present_levels]
-            bar_colors_hrn = [level_colors[level] for level in present_levels]
-            
-            ax3.bar(range(len(present_levels)), level_values, width=0.5, color=bar_colors_hrn, edgecolor='black')
-            ax3.set_xticks(range(len(present_levels)))
-            ax3.set_xticklabels([l.replace('Riesgo ', '') for l in present_levels], rotation=45, ha='right')
-            ax3.set_xlabel('Nivel de Riesgo')
-            ax3.set_ylabel('Cantidad')
-            ax3.set_title('Distribución de Riesgos HRN')
-            ax3.grid(axis='y', alpha=0.3)
-            
-            hrn_values = [calc['hrn'] for calc in self.hrn_calculations]
-            descriptions = [calc['description'][:15] + '...' if len(calc['description']) > 15 
-                        else calc['description'] for calc in self.hrn_calculations]
-            
-            colors_hrn_bars = []
-            for hrn in hrn_values:
-                if hrn <= 1:
-                    colors_hrn_bars.append('#90EE90')
-                elif hrn <= 5:
-                    colors_hrn_bars.append('#98FB98')
-                elif hrn <= 10:
-                    colors_hrn_bars.append('#FFFF99')
-                elif hrn <= 50:
-                    colors_hrn_bars.append('#FFD700')
-                elif hrn <= 100:
-                    colors_hrn_bars.append('#FFA500')
-                elif hrn <= 500:
-                    colors_hrn_bars.append('#FF6347')
-                elif hrn <= 1000:
-                    colors_hrn_bars.append('#DC143C')
-                else:
-                    colors_hrn_bars.append('#8B0000')
-            
-            ax4.barh(range(len(hrn_values)), hrn_values, color=colors_hrn_bars, edgecolor='black')
-            ax4.set_yticks(range(len(hrn_values)))
-            ax4.set_yticklabels(descriptions)
-            ax4.set_xlabel('Valor HRN')
-            ax4.set_title('Valores HRN Calculados')
-            ax4.grid(axis='x', alpha=0.3)
-        
-        if has_iso_risks and has_hrn_calcs:
-            iso_lines = iso_stats.split('\n')
-            hrn_lines = hrn_stats.split('\n')
-            
-            max_iso_width = max(len(line) for line in iso_lines) if iso_lines else 0
-            max_lines = max(len(iso_lines), len(hrn_lines))
-            combined_stats = []
-            
-            for i in range(max_lines):
-                iso_line = iso_lines[i] if i < len(iso_lines) else ""
-                hrn_line = hrn_lines[i] if i < len(hrn_lines) else ""
-                
-                iso_padded = iso_line.ljust(max_iso_width + 5)
-                combined_stats.append(f"{iso_padded}{hrn_line}")
-            
-            stats_text = '\n'.join(combined_stats)
-        elif has_iso_risks:
-            stats_text = iso_stats
-        else:
-            stats_text = hrn_stats
+        self.refresh_analysis()
+
+    def schedule_analysis_refresh(self, store=None, event=None, record=None, previous=None):
+        """Programar el redibujado; varios cambios seguidos se agrupan en uno"""
+        if self.analysis_job is None:
+            self.analysis_job = self.root.after(ANALYSIS_REFRESH_MS, self.refresh_analysis)
+
+    def refresh_analysis(self):
+        """Actualizar los gráficos en su sitio y pedir un redibujado diferido"""
+        if self.analysis_job is not None:
+            self.root.after_cancel(self.analysis_job)
+            self.analysis_job = None
+        
+        # Sin pestaña de análisis no hay nada que dibujar; se dibuja al crearla
+        if self.analysis_chart is None:
+            return
+        
+        # Evitar redibujar si los datos no cambiaron desde el último dibujo
+        key = (self.risks.revision, self.hrn_calculations.revision)
+        if key == self.analysis_key:
+            return
         
-        #self.stats_label.config(text=stats_text)
-        self.fig.tight_layout()
-        self.canvas.draw()
+        with operation("Actualizar análisis"):
+            count("riesgos", len(self.risks))
+            count("cálculos HRN", len(self.hrn_calculations))
+            with span("actualizar gráficos"):
+                self.analysis_chart.update(self.stats, self.hrn_calculations)
+            
+            #self.stats_label.config(text=self.stats.text())
+            if profiling_enabled():
+                # Al medir se dibuja ya para incluir el dibujo en el desglose
+                with span("dibujar"):
+                    self.canvas.draw()
+            else:
+                self.canvas.draw_idle()
+        self.analysis_key = key
   
 if __name__ == "__main__":
     root = ttkbootstrap.Window()
@@ -0,0 +1,98 @@
+"""Micro-benchmark: tarjetas de riesgo por riesgo vs. fábrica compartida.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_cards --risks 300 --repeat 5
+"""
+import argparse
+
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Table, TableStyle, Paragraph
+
+from benchmarks.timing import best_of
+from core.card import CardFactory
+from core.model import Risk
+
+
+def legacy_card(risk):
+    """Construcción original: hoja de estilos y TableStyle nuevos por riesgo"""
+    data = []
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='CardTitle', fontSize=12, leading=14, spaceAfter=6, bold=True))
+    styles.add(ParagraphStyle(name='CardText', fontSize=10, leading=12, textColor=colors.black))
+    data.append([Paragraph(f"<b>{risk['description']}</b>", styles['CardTitle'])])
+    data.append([Paragraph(risk['zone'], styles['CardText'])])
+
+    tabla_sfp = Table(
+        [
+            ["Severidad", "Frecuencia", "Posibilidad"],
+            [
+                risk['severity'].split('-')[0].strip(),
+                risk['frequency'].split('-')[0].strip(),
+                risk['avoidance'].split('-')[0].strip()
+            ]
+        ],
+        colWidths=[100, 100, 100]
+    )
+    tabla_sfp.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.whitesmoke),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.gray),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('BOX', (0, 0), (-1, -1), 0.8, colors.grey),
+        ('GRID', (0, 0), (-1, -1), 0.3, colors.lightgrey),
+        ('FONTSIZE', (0, 0), (-1, -1), 10)
+    ]))
+    data.append([tabla_sfp])
+    data.append([Paragraph(f"<b>PLr:</b> {risk['plr'].upper()}", styles['CardText'])])
+    data.append([Paragraph(f"<b>Medidas de Control:</b>", styles['CardText'])])
+    if risk['control_measures']:
+        for measure in risk['control_measures'].split('\n'):
+            data.append([Paragraph(f"&#10003; {measure}", styles['CardText'])])
+
+    card = Table(data, colWidths=[400])
+    card.setStyle(TableStyle([
+        ('BOX', (0, 0), (-1, -1), 1, colors.lightgrey),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f7f9fc")),
+        ('LEFTPADDING', (0, 0), (-1, -1), 8),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('ROUNDEDCORNERS', (0, 0), (-1, -1), 8, colors.white),
+    ]))
+    return card
+
+
+def sample_risks(n):
+    return [{
+        'description': f"Peligro {i}",
+        'zone': f"Zona {i % 7}",
+        'severity': 'S2 - Lesión grave/permanente o muerte',
+        'frequency': 'F1 - Rara vez a frecuente',
+        'avoidance': 'P2 - Apenas posible',
+        'plr': 'D',
+        'control_measures': "Resguardo fijo\nParada de emergencia\nCapacitación"
+    } for i in range(n)]
+
+
+def run(n_risks, repeat):
+    risks = sample_risks(n_risks)
+    legacy = best_of(lambda: [legacy_card(risk) for risk in risks], repeat)
+    records = [Risk.from_dict(risk) for risk in risks]
+    factory = best_of(lambda: CardFactory().cards(records), repeat)
+    return {'risks': n_risks, 'legacy_s': legacy, 'factory_s': factory,
+            'speedup': legacy / factory if factory else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--risks', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    result = run(args.risks, args.repeat)
+    print(f"{result['risks']} riesgos: por riesgo {result['legacy_s']*1000:.1f} ms, "
+          f"fábrica {result['factory_s']*1000:.1f} ms (x{result['speedup']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: guardar y abrir proyectos en cada formato.
+
+Compara el JSON indentado anterior (sin versión) con .json, .json.gz y .rmp.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_project_io --records 1000 10000 --repeat 3
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks.synthetic import synthetic_project
+from benchmarks.timing import best_of
+from core.model import RiskStore, HrnStore
+from core.project import read_project, write_project
+
+FORMATS = ('.json', '.json.gz', '.rmp')
+
+
+def legacy_save(filename, project):
+    """Formato anterior: documento JSON indentado"""
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump({'machine_data': project['machine_data'], 'risks': project['risks'].to_dicts(),
+                   'photos': [], 'hrn_calculations': project['hrn_calculations'].to_dicts()},
+                  f, indent=4, ensure_ascii=False)
+
+
+def legacy_load(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return RiskStore.from_dicts(data['risks']), HrnStore.from_dicts(data['hrn_calculations'])
+
+
+def run(sizes, repeat=3):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            project, store = synthetic_project(os.path.join(tmp, 'photos'), risks=n, hrn=n)
+
+            path = os.path.join(tmp, f'legacy_{n}.json')
+            results.append({
+                'records': n, 'format': 'legado',
+                'save_s': best_of(lambda: legacy_save(path, project), repeat),
+                'load_s': best_of(lambda: legacy_load(path), repeat),
+                'bytes': os.path.getsize(path)})
+
+            for ext in FORMATS:
+                path = os.path.join(tmp, f'project_{n}{ext}')
+                results.append({
+                    'records': n, 'format': ext,
+                    'save_s': best_of(lambda: write_project(path, project, store), repeat),
+                    'load_s': best_of(lambda: read_project(path), repeat),
+                    'bytes': os.path.getsize(path)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, nargs='+', default=[1000, 10000],
+                        help="Riesgos y cálculos HRN por proyecto (de cada tipo)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for result in run(args.records, args.repeat):
+        print(f"{result['records']:>7} x2 {result['format']:>8}: guardar {result['save_s']*1000:8.1f} ms, "
+              f"abrir {result['load_s']*1000:8.1f} ms, {result['bytes']/1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
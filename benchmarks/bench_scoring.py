@@ -0,0 +1,78 @@
+"""Benchmark: evaluación PLr/HRN por elemento vs. vectorizada con NumPy.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_scoring --sizes 1000 10000 100000
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.timing import best_of
+from core import bulk_scoring
+from core.scoring import (LO_VALUES, FE_VALUES, DPH_VALUES, NP_VALUES,
+                          calculate_plr, score_hrn)
+
+
+def random_columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        's': rng.integers(0, 2, n),
+        'f': rng.integers(0, 2, n),
+        'p': rng.integers(0, 2, n),
+        'lo': rng.integers(0, len(LO_VALUES), n),
+        'fe': rng.integers(0, len(FE_VALUES), n),
+        'dph': rng.integers(0, len(DPH_VALUES), n),
+        'np': rng.integers(0, len(NP_VALUES), n),
+    }
+
+
+def score_python(cols):
+    rows = zip(cols['s'].tolist(), cols['f'].tolist(), cols['p'].tolist(),
+               cols['lo'].tolist(), cols['fe'].tolist(), cols['dph'].tolist(), cols['np'].tolist())
+    plrs, hrns, levels = [], [], []
+    for s, f, p, lo, fe, dph, np_ in rows:
+        plrs.append(calculate_plr(s, f, p))
+        score = score_hrn(lo, fe, dph, np_)
+        hrns.append(score.hrn)
+        levels.append(score.level)
+    return plrs, hrns, levels
+
+
+def score_numpy(cols):
+    plrs = bulk_scoring.plr_bulk(cols['s'], cols['f'], cols['p'])
+    hrns, level_codes = bulk_scoring.score_bulk(cols['lo'], cols['fe'], cols['dph'], cols['np'])
+    return plrs, hrns, level_codes
+
+
+def run(sizes, repeat=3):
+    results = []
+    for n in sizes:
+        cols = random_columns(n)
+
+        # Verificar que ambas rutas coinciden antes de medir
+        plrs, hrns, levels = score_python(cols)
+        bulk_plrs, bulk_hrns, bulk_levels = score_numpy(cols)
+        assert list(bulk_plrs) == plrs
+        assert np.allclose(bulk_hrns, hrns)
+        assert list(bulk_scoring.level_names(bulk_levels)) == levels
+
+        python_s = best_of(lambda: score_python(cols), repeat)
+        numpy_s = best_of(lambda: score_numpy(cols), repeat)
+        results.append({'items': n, 'python_s': python_s, 'numpy_s': numpy_s,
+                        'speedup': python_s / numpy_s if numpy_s else None})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for result in run(args.sizes, args.repeat):
+        print(f"{result['items']:>8} elementos: python {result['python_s']*1000:8.1f} ms, "
+              f"numpy {result['numpy_s']*1000:7.2f} ms (x{result['speedup']:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark: tiempo de arranque de app.py.
+
+Importa `app` en un intérprete nuevo con `-X importtime`, muestra los
+módulos más costosos y falla (código 1) si la importación supera el umbral
+o si carga módulos pesados que deben importarse bajo demanda (PDF, gráficos).
+Con --window también mide hasta que la ventana queda dibujada (requiere
+pantalla).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_startup --repeat 5 --max-ms 400
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# No deben cargarse al arrancar: se importan al abrir la pestaña de análisis o al generar el PDF
+DEFERRED_MODULES = ('matplotlib', 'reportlab', 'numpy', 'core.report', 'core.charts')
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+WINDOW_SCRIPT = """
+import time
+start = time.perf_counter()
+import ttkbootstrap
+from app import RiskAnalysisISO13849
+root = ttkbootstrap.Window()
+app = RiskAnalysisISO13849(root)
+root.update()
+print(time.perf_counter() - start)
+root.destroy()
+"""
+
+
+def import_profile():
+    """{módulo: (propio_us, acumulado_us, nivel)} de una importación de app en frío"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules[name] = (int(own), int(cumulative), len(indent) // 2)
+    return modules
+
+
+def window_seconds():
+    """Segundos hasta que la ventana principal queda dibujada, o None sin pantalla"""
+    result = subprocess.run([sys.executable, '-c', WINDOW_SCRIPT], cwd=REPO_ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def run(repeat=5, window=False):
+    profiles = [import_profile() for _ in range(repeat)]
+    best = min(profiles, key=lambda modules: modules['app'][1])
+    result = {
+        'import_ms': best['app'][1] / 1000,
+        'deferred_loaded': [name for name in DEFERRED_MODULES if name in best],
+        'top': sorted(((name, cumulative / 1000) for name, (_, cumulative, level) in best.items()
+                       if level == 1), key=lambda item: -item[1])[:10]
+    }
+    if window:
+        times = [t for t in (window_seconds() for _ in range(repeat)) if t is not None]
+        result['window_ms'] = min(times) * 1000 if times else None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=400,
+                        help="Umbral de la importación de app (mejor de --repeat)")
+    parser.add_argument('--window', action='store_true', help="Medir también hasta mostrar la ventana")
+    args = parser.parse_args()
+
+    result = run(args.repeat, args.window)
+    print(f"import app: {result['import_ms']:.1f} ms (umbral {args.max_ms:.0f} ms)")
+    for name, ms in result['top']:
+        print(f"  {ms:8.1f} ms  {name}")
+    if args.window:
+        window_ms = result['window_ms']
+        print("ventana: sin pantalla" if window_ms is None else f"ventana: {window_ms:.1f} ms")
+
+    failed = False
+    if result['deferred_loaded']:
+        print(f"REGRESIÓN: se cargan al arrancar {', '.join(result['deferred_loaded'])}")
+        failed = True
+    if result['import_ms'] > args.max_ms:
+        print("REGRESIÓN: la importación supera el umbral")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""Suite de benchmarks con resultados en JSON para detectar regresiones entre versiones.
+
+Para cada escala genera un proyecto sintético (N riesgos y N cálculos HRN,
+más K fotos de la resolución indicada) y mide:
+    save_json, save_rmp, load_json, load_rmp   serialización (save/load_project)
+    scoring_python, scoring_numpy               evaluación PLr/HRN (bench_scoring)
+    stats                                       AnalysisStats.from_records
+    analysis_chart                              gráficos del análisis (update_analysis) con Agg
+    cards                                       tarjetas de riesgo (crear_cards)
+    pdf                                         reporte PDF completo (por defecto hasta 1000:
+                                                con 10000 tarda más de un minuto por repetición)
+y una vez por ejecución photos (preparar K fotos sin caché) y startup
+(importar app, bench_startup).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.suite -o resultados.json
+    python -m benchmarks.suite --scales 10 100 --baseline resultados.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from benchmarks import bench_scoring, bench_startup
+from benchmarks.synthetic import parse_size, synthetic_project
+from benchmarks.timing import run_times
+from core.card import CardFactory
+from core.charts import FIGURE_SIZE, AnalysisChart, chart_cache
+from core.images import ImagePreparer
+from core.project import read_project, write_project
+from core.report import build_report
+from core.stats import AnalysisStats
+
+SCALES = (10, 100, 1000, 10000)
+SCALED_STAGES = ('save_json', 'save_rmp', 'load_json', 'load_rmp', 'scoring_python', 'scoring_numpy',
+                 'stats', 'analysis_chart', 'cards', 'pdf')
+SINGLE_STAGES = ('photos', 'startup')
+# Cambiar cuando cambie qué mide una etapa: los resultados de distinta versión no se comparan
+SUITE_VERSION = 1
+
+
+def draw_analysis_chart(stats, hrn_calculations):
+    """Lo que hace refresh_analysis en la aplicación, con un lienzo Agg"""
+    fig = Figure(figsize=FIGURE_SIZE)
+    canvas = FigureCanvasAgg(fig)
+    AnalysisChart(fig).update(stats, hrn_calculations)
+    canvas.draw()
+
+
+def build_pdf(path, project, preparer):
+    # Sin la caché de gráficos cada repetición vuelve a renderizarlos
+    chart_cache.clear()
+    build_report(path, project, image_preparer=preparer)
+
+
+def scaled_stages(tmp, scale, args):
+    """{etapa: (función, datos extra)} para un proyecto de `scale` riesgos y cálculos HRN"""
+    project, store = synthetic_project(os.path.join(tmp, 'photos'), risks=scale, hrn=scale,
+                                       photos=args.photos, photo_size=args.photo_size, seed=args.seed)
+    project['photo_dir'] = store.root
+    paths = {ext: os.path.join(tmp, f'project_{scale}.{ext}') for ext in ('json', 'rmp')}
+    for path in paths.values():
+        write_project(path, project, store)
+    columns = bench_scoring.random_columns(scale, args.seed)
+    stats = AnalysisStats.from_records(project['risks'], project['hrn_calculations'])
+    # Las fotos se preparan una vez (etapa photos); aquí se mide el resto del PDF.
+    # Después todas salen de la caché y el pool ya no hace falta
+    with ImagePreparer(cache_dir=os.path.join(tmp, 'images'), max_workers=args.jobs) as preparer:
+        preparer.prepare(project['photos'], store)
+    pdf_path = os.path.join(tmp, f'report_{scale}.pdf')
+
+    return {
+        'save_json': (lambda: write_project(paths['json'], project, store), lambda: os.path.getsize(paths['json'])),
+        'save_rmp': (lambda: write_project(paths['rmp'], project, store), lambda: os.path.getsize(paths['rmp'])),
+        'load_json': (lambda: read_project(paths['json']), None),
+        'load_rmp': (lambda: read_project(paths['rmp']), None),
+        'scoring_python': (lambda: bench_scoring.score_python(columns), None),
+        'scoring_numpy': (lambda: bench_scoring.score_numpy(columns), None),
+        'stats': (lambda: AnalysisStats.from_records(project['risks'], project['hrn_calculations']), None),
+        'analysis_chart': (lambda: draw_analysis_chart(stats, project['hrn_calculations']), None),
+        'cards': (lambda: CardFactory().cards(project['risks']), None),
+        'pdf': (lambda: build_pdf(pdf_path, project, preparer), lambda: os.path.getsize(pdf_path)),
+    }
+
+
+def prepare_photos(tmp, args):
+    project, store = synthetic_project(os.path.join(tmp, 'photos'), risks=0, hrn=0, photos=args.photos,
+                                       photo_size=args.photo_size, seed=args.seed)
+    runs = iter(range(args.repeat))
+
+    def run():
+        # Directorio de caché nuevo en cada repetición: se mide el procesado, no la caché
+        cache_dir = os.path.join(tmp, f'images_{next(runs)}')
+        with ImagePreparer(cache_dir=cache_dir, max_workers=args.jobs) as preparer:
+            preparer.prepare(project['photos'], store)
+    return run
+
+
+def run(args, on_result=None):
+    stages = set(args.stages)
+    results = []
+
+    def record(stage, scale, func, size=None, repeat=args.repeat):
+        times = run_times(func, repeat)
+        seconds = min(times)
+        result = {'stage': stage, 'scale': scale, 'seconds': seconds, 'times': times}
+        if size is not None:
+            result['bytes'] = size()
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            for stage, (func, size) in scaled_stages(tmp, scale, args).items():
+                if stage in stages and not (stage == 'pdf' and scale > args.pdf_max):
+                    record(stage, scale, func, size)
+        if 'photos' in stages and args.photos:
+            record('photos', args.photos, prepare_photos(tmp, args))
+
+    if 'startup' in stages:
+        # Un solo proceso nuevo por repetición; el resultado viene de -X importtime
+        startup = bench_startup.run(args.repeat)
+        result = {'stage': 'startup', 'scale': 0, 'seconds': startup['import_ms'] / 1000,
+                  'times': [startup['import_ms'] / 1000], 'deferred_loaded': startup['deferred_loaded']}
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=bench_startup.REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance, min_delta=0.005):
+    """Etapas más lentas que la línea base en más de `tolerance` (fracción).
+
+    Diferencias de menos de `min_delta` segundos se ignoran: en etapas de
+    milisegundos son ruido de medición.
+    """
+    previous = {(r['stage'], r['scale']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['stage'], result['scale']))
+        if before and result['seconds'] > before * (1 + tolerance) and result['seconds'] - before > min_delta:
+            regressions.append({'stage': result['stage'], 'scale': result['scale'],
+                                'baseline_s': before, 'seconds': result['seconds'],
+                                'ratio': result['seconds'] / before})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=list(SCALES),
+                        help="Riesgos y cálculos HRN por proyecto (de cada tipo)")
+    parser.add_argument('--stages', nargs='+', choices=SCALED_STAGES + SINGLE_STAGES,
+                        default=list(SCALED_STAGES + SINGLE_STAGES))
+    parser.add_argument('--photos', type=int, default=4, help="Fotos por proyecto")
+    parser.add_argument('--photo-size', type=parse_size, default=(1920, 1080), help="Ancho x alto en píxeles")
+    parser.add_argument('--pdf-max', type=int, default=1000, help="Escala máxima para la etapa pdf")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="Procesos para preparar fotos")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help="Archivo JSON de resultados")
+    parser.add_argument('--baseline', help="Resultados anteriores con los que comparar")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Margen antes de considerar una etapa una regresión (0.25 = 25 %%)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('suite_version') != SUITE_VERSION:
+            parser.error(f"{args.baseline} es de otra versión de la suite")
+
+    def on_result(result):
+        print(f"{result['stage']:>15} {result['scale']:>6}: {result['seconds'] * 1000:10.1f} ms", flush=True)
+
+    results = run(args, on_result)
+    report = {
+        'suite_version': SUITE_VERSION,
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'git_revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {'scales': args.scales, 'photos': args.photos, 'photo_size': list(args.photo_size),
+                   'repeat': args.repeat, 'jobs': args.jobs, 'seed': args.seed, 'pdf_max': args.pdf_max},
+        'results': results
+    }
+    if baseline is not None:
+        report['regressions'] = compare(results, baseline, args.tolerance)
+        for r in report['regressions']:
+            print(f"REGRESIÓN: {r['stage']} {r['scale']}: {r['baseline_s'] * 1000:.1f} ms -> "
+                  f"{r['seconds'] * 1000:.1f} ms (x{r['ratio']:.2f})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=4, ensure_ascii=False))
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Generador de proyectos sintéticos reproducibles para los benchmarks.
+
+Los proyectos tienen la misma forma que devuelve core.project.read_project
+(y que guarda save_project): machine_data, risks (RiskStore),
+hrn_calculations (HrnStore) y photos con referencias al almacén de fotos.
+Con la misma semilla se generan los mismos datos y las mismas imágenes.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.synthetic proyecto.rmp --risks 1000 --hrn 1000 --photos 8 --photo-size 1920x1080
+"""
+import argparse
+import io
+import random
+
+import numpy as np
+from PIL import Image as PILImage
+
+from core.model import Risk, HrnCalculation, RiskStore, HrnStore
+from core.photo_store import PhotoStore
+from core.project import photos_dir_for, write_project
+from core.scoring import (SEVERITY_OPTIONS, FREQUENCY_OPTIONS, AVOIDANCE_OPTIONS,
+                          LO_VALUES, FE_VALUES, DPH_VALUES, NP_VALUES)
+
+HAZARDS = ["Atrapamiento", "Aplastamiento", "Corte", "Proyección de partículas", "Contacto eléctrico",
+           "Quemadura", "Caída de objetos", "Ruido", "Enganche", "Impacto"]
+ZONES = ["Zona de alimentación", "Zona de prensado", "Transmisión", "Panel eléctrico",
+         "Zona de descarga", "Mantenimiento", "Área del operador"]
+MEASURES = ["Resguardo fijo", "Resguardo móvil con enclavamiento", "Parada de emergencia",
+            "Cortina fotoeléctrica", "Mando a dos manos", "Señalización", "Capacitación",
+            "Equipo de protección personal"]
+
+
+def parse_size(text):
+    """'1920x1080' -> (1920, 1080)"""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def synthetic_photo(width, height, rng):
+    """JPEG con ruido sobre un degradado: comprime como una foto real, no como un color plano"""
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // max(width - 1, 1), y * 255 // max(height - 1, 1),
+                     np.full_like(x, rng.integers(0, 256))], axis=-1)
+    noise = rng.integers(-40, 41, size=(height, width, 3))
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    PILImage.fromarray(pixels, 'RGB').save(buf, format='JPEG', quality=90)
+    return buf.getvalue()
+
+
+def synthetic_project(photo_dir, risks=100, hrn=100, photos=0, photo_size=(1920, 1080), seed=0):
+    """Generar un proyecto y devolver (project_data, photo_store) como read_project"""
+    rng = random.Random(seed)
+    store = PhotoStore(photo_dir)
+
+    risk_records = RiskStore(
+        Risk(f"{rng.choice(HAZARDS)} {i + 1}", rng.choice(ZONES),
+             rng.randrange(len(SEVERITY_OPTIONS)), rng.randrange(len(FREQUENCY_OPTIONS)),
+             rng.randrange(len(AVOIDANCE_OPTIONS)), "\n".join(rng.sample(MEASURES, rng.randint(1, 4))),
+             record_id=f"{rng.getrandbits(128):032x}")
+        for i in range(risks))
+    hrn_records = HrnStore(
+        HrnCalculation(f"{rng.choice(HAZARDS)} {i + 1}", rng.randrange(len(LO_VALUES)),
+                       rng.randrange(len(FE_VALUES)), rng.randrange(len(DPH_VALUES)),
+                       rng.randrange(len(NP_VALUES)),
+                       f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00",
+                       record_id=f"{rng.getrandbits(128):032x}")
+        for i in range(hrn))
+
+    image_rng = np.random.default_rng(seed)
+    photo_refs = []
+    for i in range(photos):
+        sha256 = store.put_bytes(synthetic_photo(*photo_size, image_rng))
+        photo_refs.append({'filename': f"foto_{i + 1}.jpg", 'sha256': sha256})
+
+    machine_data = {
+        'machine_type': "Prensa hidráulica",
+        'model': f"PH-{seed}",
+        'manufacturer': "Sintética S.A.",
+        'serial_number': f"SN-{seed:06d}",
+        'year': "2020",
+        'location': "Planta 1",
+        'analyst': "Benchmark",
+        'date': "2025-01-01",
+        'description': "Proyecto generado para benchmarks."
+    }
+    project = {'machine_data': machine_data, 'risks': risk_records, 'photos': photo_refs,
+               'hrn_calculations': hrn_records}
+    return project, store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help="Archivo de proyecto (.json, .json.gz o .rmp)")
+    parser.add_argument('--risks', type=int, default=100)
+    parser.add_argument('--hrn', type=int, default=100)
+    parser.add_argument('--photos', type=int, default=0)
+    parser.add_argument('--photo-size', type=parse_size, default=(1920, 1080), help="Ancho x alto en píxeles")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    project, store = synthetic_project(photos_dir_for(args.output), args.risks, args.hrn,
+                                       args.photos, args.photo_size, args.seed)
+    write_project(args.output, project, store)
+    print(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""Medición de tiempos compartida por los benchmarks."""
+import time
+
+
+def run_times(func, repeat):
+    """Segundos de cada una de `repeat` ejecuciones de `func()`"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def best_of(func, repeat):
+    """Mejor tiempo de `repeat` ejecuciones; el mínimo es el menos afectado por el ruido"""
+    return min(run_times(func, repeat))
@@ -0,0 +1,227 @@
+"""Herramientas de línea de comandos (sin interfaz gráfica).
+
+Uso:
+    python cli.py report proyecto.json -o reporte.pdf
+    python cli.py batch proyectos/ -o reportes/
+    python cli.py fleet proyectos/ -o planta.pdf    (reporte consolidado de todas las máquinas)
+    python cli.py db import planta.db proyectos/
+    python cli.py db list planta.db --location "Planta 1" --plr E
+    python cli.py --profile report proyecto.json     (desglose de tiempos en stderr)
+"""
+import argparse
+import os
+import sys
+
+from core import profiling
+from core.batch import SUMMARY_NAME, find_projects, run_batch
+from core.charts import HRN_CHART_MAX_BARS
+from core.fleet import TOP_HAZARDS, build_fleet_report
+from core.images import PHOTO_DPI, PHOTO_JPEG_QUALITY, ImagePreparer
+from core.project import project_stem, read_project
+from core.report import build_report
+from core.repository import ProjectRepository
+
+
+def default_pdf_name(project_filename):
+    return project_stem(project_filename) + '.pdf'
+
+
+def warn_skipped(project_filename, project):
+    for message in project.get('skipped', []):
+        print(f"Aviso: {project_filename}: registro omitido. {message}", file=sys.stderr)
+
+
+def generate_report(project_filename, output, image_preparer=None, max_bars=HRN_CHART_MAX_BARS):
+    """Cargar un proyecto guardado y generar su reporte PDF"""
+    project, store = read_project(project_filename)
+    warn_skipped(project_filename, project)
+    with store:
+        project['photo_dir'] = store.root
+        return build_report(output, project, image_preparer=image_preparer, max_bars=max_bars)
+
+
+def cmd_report(args):
+    output = args.output or default_pdf_name(args.project)
+    with ImagePreparer(dpi=args.photo_dpi, quality=args.photo_quality, max_workers=args.jobs) as preparer:
+        generate_report(args.project, output, preparer, args.max_hrn_bars)
+    print(output)
+    return 0
+
+
+def cmd_batch(args):
+    def on_result(result):
+        status = {'ok': "OK", 'failed': "ERROR"}[result['status']]
+        detail = f" ({result['error']})" if result['error'] else ""
+        print(f"{status:5} {result['seconds']:7.2f}s  {result['project']}{detail}")
+
+    summary = run_batch(args.inputs, args.output, workers=args.jobs, photo_dpi=args.photo_dpi,
+                        photo_quality=args.photo_quality, force=args.force, on_result=on_result,
+                        max_bars=args.max_hrn_bars)
+    print(f"{summary['built']} generados, {summary['skipped']} sin cambios, "
+          f"{summary['failed']} con errores en {summary['elapsed_seconds']:.1f}s "
+          f"(resumen en {os.path.join(args.output, SUMMARY_NAME)})")
+    return 1 if summary['failed'] else 0
+
+
+def cmd_fleet(args):
+    projects = find_projects(args.inputs)
+    if not projects:
+        raise ValueError("No se encontraron proyectos")
+    fleet = build_fleet_report(args.output, projects, top=args.top, max_bars=args.max_hrn_bars)
+    for path, error in fleet.failed:
+        print(f"ERROR {path} ({error})")
+    for path, error in fleet.skipped:
+        print(f"Aviso: {path}: registro omitido. {error}", file=sys.stderr)
+    print(f"{len(fleet.machines)} proyectos, {fleet.stats.total_risks} riesgos, "
+          f"{fleet.stats.total_hrn} cálculos HRN -> {args.output}")
+    return 1 if fleet.failed else 0
+
+
+def cmd_db_import(args):
+    with ProjectRepository(args.database) as repo:
+        projects = find_projects(args.inputs)
+        if args.name and len(projects) != 1:
+            raise ValueError("--name solo se admite al importar un único proyecto")
+        failed = 0
+        for path in projects:
+            try:
+                name, skipped = repo.import_file(path, args.name)
+                print(f"OK    {name}")
+                warn_skipped(path, {'skipped': skipped})
+            except Exception as e:
+                failed += 1
+                print(f"ERROR {path} ({type(e).__name__}: {e})")
+    return 1 if failed else 0
+
+
+def cmd_db_export(args):
+    with ProjectRepository(args.database) as repo:
+        repo.export_file(args.name, args.output)
+    print(args.output)
+    return 0
+
+
+def cmd_db_list(args):
+    with ProjectRepository(args.database) as repo:
+        projects = repo.projects(location=args.location, analyst=args.analyst,
+                                 machine_type=args.machine_type, plr=args.plr,
+                                 hrn_level=args.hrn_level, min_hrn=args.min_hrn)
+    for p in projects:
+        max_hrn = "-" if p['max_hrn'] is None else f"{p['max_hrn']:.2f}"
+        print(f"{p['name']}\t{p['machine_type'] or ''}\t{p['location'] or ''}\t{p['analyst'] or ''}\t"
+              f"{p['risks']} riesgos\t{p['hrn_calculations']} HRN\tHRN máx {max_hrn}")
+    return 0
+
+
+def cmd_db_hrn(args):
+    with ProjectRepository(args.database) as repo:
+        calculations = repo.hrn_calculations(min_hrn=args.min_hrn, hrn_level=args.hrn_level,
+                                             location=args.location, analyst=args.analyst,
+                                             machine_type=args.machine_type)
+    for c in calculations:
+        print(f"{c['hrn']:10.2f}\t{c['level']}\t{c['project']}\t{c['description']}")
+    return 0
+
+
+def add_filters(parser, plr=True):
+    parser.add_argument('--location', help="Ubicación exacta")
+    parser.add_argument('--analyst', help="Responsable del análisis")
+    parser.add_argument('--machine-type', help="Tipo de máquina")
+    if plr:
+        parser.add_argument('--plr', help="Con algún riesgo de este PLr (A-E)")
+    parser.add_argument('--hrn-level', help="Con algún cálculo HRN de este nivel")
+    parser.add_argument('--min-hrn', type=float, help="Con algún HRN mayor que este valor")
+
+
+def max_hrn_bars(text):
+    value = int(text)
+    if value < 2:
+        raise argparse.ArgumentTypeError("debe ser al menos 2")
+    return value
+
+
+def add_max_hrn_bars(parser):
+    parser.add_argument('--max-hrn-bars', type=max_hrn_bars, default=HRN_CHART_MAX_BARS,
+                        help="Barras del gráfico de valores HRN; el resto se agrupa en \"Otros\"")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='riskmgm', description="Análisis de Riesgo ISO 13849-1 sin interfaz gráfica")
+    parser.add_argument('--profile', action='store_true', help="Mostrar en stderr el desglose de tiempos")
+    parser.add_argument('--cprofile', action='store_true',
+                        help=f"Como --profile y además guardar un volcado de cProfile en {profiling.PROFILE_DIR}")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    report = subparsers.add_parser('report', help="Generar el reporte PDF de un proyecto")
+    report.add_argument('project', help="Archivo de proyecto (.json, .json.gz o .rmp)")
+    report.add_argument('-o', '--output', help="PDF de salida (por defecto junto al proyecto)")
+    report.add_argument('--photo-dpi', type=int, default=PHOTO_DPI, help="Resolución de las fotos en el PDF")
+    report.add_argument('--photo-quality', type=int, default=PHOTO_JPEG_QUALITY, help="Calidad JPEG de las fotos (1-95)")
+    report.add_argument('-j', '--jobs', type=int, default=None, help="Procesos para preparar fotos")
+    add_max_hrn_bars(report)
+    report.set_defaults(func=cmd_report)
+
+    batch = subparsers.add_parser('batch', help="Generar los reportes de muchos proyectos en paralelo")
+    batch.add_argument('inputs', nargs='+', help="Directorios o patrones glob de proyectos")
+    batch.add_argument('-o', '--output', required=True, help="Directorio de salida de los PDF")
+    batch.add_argument('-j', '--jobs', type=int, default=None, help="Procesos (por defecto, número de CPU)")
+    batch.add_argument('--photo-dpi', type=int, default=PHOTO_DPI, help="Resolución de las fotos en el PDF")
+    batch.add_argument('--photo-quality', type=int, default=PHOTO_JPEG_QUALITY, help="Calidad JPEG de las fotos (1-95)")
+    batch.add_argument('--force', action='store_true', help="Regenerar aunque las entradas no hayan cambiado")
+    add_max_hrn_bars(batch)
+    batch.set_defaults(func=cmd_batch)
+
+    fleet = subparsers.add_parser('fleet', help="Reporte PDF consolidado de muchos proyectos")
+    fleet.add_argument('inputs', nargs='+', help="Proyectos, directorios o patrones glob")
+    fleet.add_argument('-o', '--output', required=True, help="PDF de salida")
+    fleet.add_argument('--top', type=int, default=TOP_HAZARDS, help="Peligros de mayor HRN a listar")
+    add_max_hrn_bars(fleet)
+    fleet.set_defaults(func=cmd_fleet)
+
+    db = subparsers.add_parser('db', help="Repositorio SQLite con muchos proyectos")
+    db_commands = db.add_subparsers(dest='db_command', required=True)
+
+    db_import = db_commands.add_parser('import', help="Importar archivos de proyecto a la base")
+    db_import.add_argument('database', help="Archivo SQLite (se crea si no existe)")
+    db_import.add_argument('inputs', nargs='+', help="Proyectos, directorios o patrones glob")
+    db_import.add_argument('--name', help="Nombre en la base (por defecto, el del archivo)")
+    db_import.set_defaults(func=cmd_db_import)
+
+    db_export = db_commands.add_parser('export', help="Exportar un proyecto de la base a un archivo")
+    db_export.add_argument('database', help="Archivo SQLite")
+    db_export.add_argument('name', help="Nombre del proyecto en la base")
+    db_export.add_argument('-o', '--output', required=True, help="Archivo de proyecto (.json, .json.gz o .rmp)")
+    db_export.set_defaults(func=cmd_db_export)
+
+    db_list = db_commands.add_parser('list', help="Listar los proyectos que cumplen los filtros")
+    db_list.add_argument('database', help="Archivo SQLite")
+    add_filters(db_list)
+    db_list.set_defaults(func=cmd_db_list)
+
+    db_hrn = db_commands.add_parser('hrn', help="Listar cálculos HRN de todos los proyectos")
+    db_hrn.add_argument('database', help="Archivo SQLite")
+    add_filters(db_hrn, plr=False)
+    db_hrn.set_defaults(func=cmd_db_hrn)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.cprofile:
+        profiling.configure('cprofile')
+    elif args.profile:
+        profiling.configure('spans')
+    try:
+        with profiling.operation(f"riskmgm {args.command}"):
+            return args.func(args)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if profiling.enabled() and profiling.last_operation() is not None:
+            print(profiling.last_operation().report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
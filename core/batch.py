@@ -0,0 +1,172 @@
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from core.charts import HRN_CHART_MAX_BARS
+from core.images import PHOTO_DPI, PHOTO_JPEG_QUALITY, ImagePreparer
+from core.project import PROJECT_EXTENSIONS, project_stem, read_project
+from core.report import build_report
+
+MANIFEST_NAME = '.riskmgm_batch.json'
+SUMMARY_NAME = 'batch_summary.json'
+
+# Incrementar cuando cambie el contenido del reporte para forzar la regeneración
+REPORT_FORMAT_VERSION = 1
+
+
+def find_projects(inputs):
+    """Expandir directorios y patrones glob a la lista de archivos de proyecto"""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = [path for ext in PROJECT_EXTENSIONS
+                       for path in glob.glob(os.path.join(item, '**', '*' + ext), recursive=True)]
+        else:
+            matches = glob.glob(item, recursive=True)
+        found.extend(os.path.abspath(path) for path in matches if os.path.isfile(path))
+    return sorted(set(found))
+
+
+def output_names(projects, output_dir):
+    """Nombre del PDF de cada proyecto; se desambiguan nombres repetidos"""
+    stems = {}
+    for path in projects:
+        stem = os.path.basename(project_stem(path))
+        stems.setdefault(stem, []).append(path)
+
+    names = {}
+    for stem, paths in stems.items():
+        for path in paths:
+            if len(paths) > 1:
+                suffix = hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]
+                names[path] = os.path.join(output_dir, f"{stem}_{suffix}.pdf")
+            else:
+                names[path] = os.path.join(output_dir, f"{stem}.pdf")
+    return names
+
+
+def fingerprint(project_path, photo_dpi, photo_quality, max_bars=HRN_CHART_MAX_BARS):
+    """Huella de las entradas de un reporte: archivo de proyecto y opciones"""
+    digest = hashlib.sha256()
+    digest.update(f"v{REPORT_FORMAT_VERSION}:{photo_dpi}:{photo_quality}:{max_bars}:".encode('ascii'))
+    with open(project_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def build_one(project_path, output, photo_dpi, photo_quality, max_bars=HRN_CHART_MAX_BARS):
+    """Generar un reporte (se ejecuta en un proceso del pool)"""
+    start = time.perf_counter()
+    try:
+        project, store = read_project(project_path)
+        # El proceso atiende muchos proyectos: las fotos temporales se borran en cada uno
+        with store:
+            project['photo_dir'] = store.root
+            # El paralelismo está en el pool de proyectos: las fotos se preparan en este proceso
+            preparer = ImagePreparer(dpi=photo_dpi, quality=photo_quality, max_workers=1)
+            build_report(output, project, image_preparer=preparer, max_bars=max_bars)
+        return {'status': 'ok', 'seconds': time.perf_counter() - start, 'error': None}
+    except Exception as e:
+        return {'status': 'failed', 'seconds': time.perf_counter() - start,
+                'error': f"{type(e).__name__}: {e}", 'traceback': traceback.format_exc()}
+
+
+def run_batch(inputs, output_dir, workers=None, photo_dpi=PHOTO_DPI,
+              photo_quality=PHOTO_JPEG_QUALITY, force=False, on_result=None,
+              max_bars=HRN_CHART_MAX_BARS):
+    """Generar los reportes de muchos proyectos en paralelo.
+
+    Los proyectos cuya huella no cambió desde la última ejecución (y cuyo
+    PDF sigue existiendo) se omiten. Se escribe un resumen con tiempos y
+    fallos en `output_dir/batch_summary.json` y se devuelve.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = {} if force else _read_json(manifest_path, {})
+
+    # Excluir lo que esté dentro del directorio de salida (p. ej. el resumen)
+    output_root = os.path.abspath(output_dir) + os.sep
+    projects = [path for path in find_projects(inputs) if not path.startswith(output_root)]
+    outputs = output_names(projects, output_dir)
+    started = time.perf_counter()
+    results = []
+    jobs = {}
+
+    for path in projects:
+        try:
+            fp = fingerprint(path, photo_dpi, photo_quality, max_bars)
+        except OSError as e:
+            results.append({'project': path, 'output': outputs[path], 'status': 'failed',
+                            'seconds': 0.0, 'error': str(e)})
+            continue
+        previous = manifest.get(path)
+        if previous and previous.get('fingerprint') == fp and os.path.exists(outputs[path]):
+            results.append({'project': path, 'output': outputs[path], 'status': 'skipped',
+                            'seconds': 0.0, 'error': None})
+        else:
+            jobs[path] = fp
+
+    # Procesos realmente usados: no más que proyectos por generar
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    try:
+        if jobs:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                futures = {pool.submit(build_one, path, outputs[path], photo_dpi, photo_quality,
+                                       max_bars): path
+                           for path in jobs}
+                for future in as_completed(futures):
+                    path = futures[future]
+                    result = {'project': path, 'output': outputs[path]}
+                    try:
+                        result.update(future.result())
+                    except Exception as e:
+                        # Proceso caído (BrokenProcessPool) u otro fallo fuera de build_one
+                        result.update({'status': 'failed', 'seconds': 0.0,
+                                       'error': f"{type(e).__name__}: {e}"})
+                    if result['status'] == 'ok':
+                        manifest[path] = {'fingerprint': jobs[path], 'output': outputs[path]}
+                    else:
+                        manifest.pop(path, None)
+                    results.append(result)
+                    if on_result is not None:
+                        on_result(result)
+    finally:
+        # Aunque se interrumpa, los reportes ya generados no se repiten la próxima vez
+        _write_json(manifest_path, manifest)
+
+    results.sort(key=lambda r: r['project'])
+    summary = {
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'workers': workers,
+        'total': len(results),
+        'built': sum(1 for r in results if r['status'] == 'ok'),
+        'skipped': sum(1 for r in results if r['status'] == 'skipped'),
+        'failed': sum(1 for r in results if r['status'] == 'failed'),
+        'elapsed_seconds': time.perf_counter() - started,
+        'results': results
+    }
+    _write_json(os.path.join(output_dir, SUMMARY_NAME), summary)
+    return summary
@@ -0,0 +1,70 @@
+"""Evaluación masiva (vectorizada con NumPy) de PLr y HRN.
+
+Recibe arreglos columnares de índices o valores y aplica las mismas tablas
+y umbrales que core.scoring, de modo que los resultados coinciden con la
+ruta por elemento.
+"""
+import numpy as np
+
+from core.scoring import (PLR_MATRIX, HRN_THRESHOLDS, HRN_LEVEL_NAMES,
+                          LO_VALUES, FE_VALUES, DPH_VALUES, NP_VALUES)
+
+PLR_LETTERS = np.array(['a', 'b', 'c', 'd', 'e'])
+
+# PLR_LOOKUP[s, f, p] -> índice en PLR_LETTERS
+PLR_LOOKUP = np.empty((2, 2, 2), dtype=np.int8)
+for (_s, _f, _p), _plr in PLR_MATRIX.items():
+    PLR_LOOKUP[_s, _f, _p] = 'abcde'.index(_plr)
+
+DEFAULT_TABLES = {
+    'lo': LO_VALUES,
+    'fe': FE_VALUES,
+    'dph': DPH_VALUES,
+    'np': NP_VALUES,
+}
+
+
+def plr_codes(s, f, p):
+    """Índice de PLr (0='a' .. 4='e') para arreglos de índices S, F y P"""
+    return PLR_LOOKUP[np.asarray(s), np.asarray(f), np.asarray(p)]
+
+
+def plr_bulk(s, f, p):
+    """PLr ('a'..'e') para arreglos de índices S, F y P"""
+    return PLR_LETTERS[plr_codes(s, f, p)]
+
+
+def factor_array(table):
+    """Valores numéricos de una tabla de factores [(valor, descripción), ...]"""
+    return np.array([value for value, _ in table], dtype=np.float64)
+
+
+def hrn_bulk(lo, fe, dph, np_):
+    """HRN = LO × FE × DPH × NP, elemento a elemento"""
+    return (np.asarray(lo, dtype=np.float64) * np.asarray(fe, dtype=np.float64)
+            * np.asarray(dph, dtype=np.float64) * np.asarray(np_, dtype=np.float64))
+
+
+def hrn_bulk_from_indices(lo_idx, fe_idx, dph_idx, np_idx, tables=None):
+    """HRN a partir de índices en las tablas de factores (por defecto las de core.scoring)"""
+    tables = tables or DEFAULT_TABLES
+    return hrn_bulk(factor_array(tables['lo'])[np.asarray(lo_idx)],
+                    factor_array(tables['fe'])[np.asarray(fe_idx)],
+                    factor_array(tables['dph'])[np.asarray(dph_idx)],
+                    factor_array(tables['np'])[np.asarray(np_idx)])
+
+
+def classify_hrn_bulk(hrn, thresholds=HRN_THRESHOLDS):
+    """Índice del nivel HRN de cada valor (mismo criterio que classify_hrn)"""
+    return np.searchsorted(np.asarray(thresholds, dtype=np.float64), np.asarray(hrn), side='left')
+
+
+def level_names(level_codes):
+    """Nombres de nivel para un arreglo de índices de nivel"""
+    return np.array(HRN_LEVEL_NAMES)[np.asarray(level_codes)]
+
+
+def score_bulk(lo_idx, fe_idx, dph_idx, np_idx, tables=None, thresholds=HRN_THRESHOLDS):
+    """Calcular HRN y nivel para columnas de índices; devuelve (hrn, level_codes)"""
+    hrn = hrn_bulk_from_indices(lo_idx, fe_idx, dph_idx, np_idx, tables)
+    return hrn, classify_hrn_bulk(hrn, thresholds)
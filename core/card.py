@@ -1,60 +1,109 @@
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import Table, TableStyle, Paragraph
+from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
 
-def crear_card(risk):
-    data = []
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='CardTitle', fontSize=12, leading=14, spaceAfter=6, bold=True))
-    styles.add(ParagraphStyle(name='CardText', fontSize=10, leading=12, textColor=colors.black))
-    titulo = Paragraph(f"<b>{risk['description']}</b>", styles['CardTitle'])
-    descripcion = Paragraph(risk['zone'], styles['CardText'])
-
-    data.append([titulo])
-    data.append([descripcion])
-
-    tabla_sfp = Table(
-        [
-            ["Severidad", "Frecuencia", "Posibilidad"],
+
+class CardFactory:
+    """Construye las tarjetas de riesgo reutilizando estilos creados una sola vez"""
+
+    def __init__(self):
+        self.styles = getSampleStyleSheet()
+        self.styles.add(ParagraphStyle(name='CardTitle', fontSize=12, leading=14, spaceAfter=6, bold=True))
+        self.styles.add(ParagraphStyle(name='CardText', fontSize=10, leading=12, textColor=colors.black))
+        self.title_style = self.styles['CardTitle']
+        self.text_style = self.styles['CardText']
+
+        self.sfp_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.whitesmoke),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.gray),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('BOX', (0, 0), (-1, -1), 0.8, colors.grey),
+            ('GRID', (0, 0), (-1, -1), 0.3, colors.lightgrey),
+            ('FONTSIZE', (0, 0), (-1, -1), 10)
+        ])
+        self.card_table_style = TableStyle([
+            ('BOX', (0, 0), (-1, -1), 1, colors.lightgrey),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f7f9fc")),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('ROUNDEDCORNERS', (0, 0), (-1, -1), 8, colors.white),
+        ])
+
+    def card(self, risk):
+        """Crear la tarjeta de un riesgo"""
+        data = []
+        titulo = Paragraph(f"<b>{risk.description}</b>", self.title_style)
+        descripcion = Paragraph(risk.zone, self.text_style)
+
+        data.append([titulo])
+        data.append([descripcion])
+
+        tabla_sfp = Table(
             [
-                risk['severity'].split('-')[0].strip(), 
-                risk['frequency'].split('-')[0].strip(), 
-                risk['avoidance'].split('-')[0].strip()
-            ]
-        ],
-        colWidths=[100, 100, 100]
-    )
-    tabla_sfp.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.whitesmoke),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.gray),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('BOX', (0, 0), (-1, -1), 0.8, colors.grey),
-        ('GRID', (0, 0), (-1, -1), 0.3, colors.lightgrey),
-        ('FONTSIZE', (0, 0), (-1, -1), 10)
-    ]))
-
-    data.append([tabla_sfp])
-
-    plr = Paragraph(f"<b>PLr:</b> {risk['plr'].upper()}", styles['CardText'])
-    data.append([plr])
-    control = Paragraph(f"<b>Medidas de Control:</b>", styles['CardText'])
-    data.append([control])
-    if risk['control_measures']:
-        items = risk['control_measures'].split('\n')
-
-        for measure in items:            
-            measure_paragraph = Paragraph(f"&#10003; {measure}", styles['CardText'])
-            data.append([measure_paragraph])
-
-    card = Table(data, colWidths=[400])
-    card.setStyle(TableStyle([
-        ('BOX', (0, 0), (-1, -1), 1, colors.lightgrey),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f7f9fc")),
-        ('LEFTPADDING', (0, 0), (-1, -1), 8),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('ROUNDEDCORNERS', (0, 0), (-1, -1), 8, colors.white),
-    ]))
-
-    return card
\ No newline at end of file
+                ["Severidad", "Frecuencia", "Posibilidad"],
+                [
+                    risk.severity_code,
+                    risk.frequency_code,
+                    risk.avoidance_code
+                ]
+            ],
+            colWidths=[100, 100, 100],
+            style=self.sfp_table_style
+        )
+
+        data.append([tabla_sfp])
+
+        plr = Paragraph(f"<b>PLr:</b> {risk.plr}", self.text_style)
+        data.append([plr])
+        control = Paragraph("<b>Medidas de Control:</b>", self.text_style)
+        data.append([control])
+        if risk.control_measures:
+            items = risk.control_measures.split('\n')
+
+            for measure in items:
+                measure_paragraph = Paragraph(f"&#10003; {measure}", self.text_style)
+                data.append([measure_paragraph])
+
+        return Table(data, colWidths=[400], style=self.card_table_style)
+
+    def iter_cards(self, risks, spacing=None, cancel_check=None):
+        """Generar las tarjetas una a una (para armar el reporte en flujo).
+
+        Si se indica `spacing` (en puntos) se intercala un Spacer tras cada
+        tarjeta. `cancel_check` se invoca antes de cada riesgo.
+        """
+        for risk in risks:
+            if cancel_check is not None:
+                cancel_check()
+            yield self.card(risk)
+            if spacing:
+                yield Spacer(1, spacing)
+
+    def cards(self, risks, spacing=None, cancel_check=None):
+        """Crear las tarjetas de todos los riesgos en una sola llamada"""
+        return list(self.iter_cards(risks, spacing, cancel_check))
+
+
+_factory = None
+
+
+def get_card_factory():
+    """Fábrica compartida (se construye en el primer uso)"""
+    global _factory
+    if _factory is None:
+        _factory = CardFactory()
+    return _factory
+
+
+def crear_card(risk):
+    return get_card_factory().card(risk)
+
+
+def crear_cards(risks, spacing=None, cancel_check=None):
+    return get_card_factory().cards(risks, spacing, cancel_check)
+
+
+def iter_cards(risks, spacing=None, cancel_check=None):
+    return get_card_factory().iter_cards(risks, spacing, cancel_check)
@@ -0,0 +1,284 @@
+import hashlib
+import heapq
+import io
+import json
+import math
+import threading
+from collections import OrderedDict
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from core.profiling import span
+from core.scoring import HRN_LEVELS, HRN_LEVEL_NAMES, classify_hrn
+from core.stats import AnalysisStats, PLR_LEVELS
+
+FIGURE_SIZE = (12, 5)
+REPORT_DPI = 150
+
+PLR_COLORS = {'A': '#90EE90', 'B': '#FFFF99', 'C': '#FFD700',
+              'D': '#FFA500', 'E': '#FF6347'}
+
+SEVERITY_COLORS = {'S1': '#90EE90', 'S2': '#FF6347'}
+
+# Máximo de barras del gráfico de valores HRN; por encima se agrupan en "Otros"
+HRN_CHART_MAX_BARS = 30
+OTHERS_COLOR = '#D3D3D3'
+
+LEVEL_ORDER = HRN_LEVEL_NAMES
+LEVEL_COLORS = {level.name: level.color for level in HRN_LEVELS}
+
+
+def data_key(risks, hrn_calculations):
+    """Huella SHA-256 de los datos que intervienen en los gráficos"""
+    payload = json.dumps([
+        [(risk.s, risk.f, risk.p) for risk in risks],
+        [(calc.description, calc.hrn) for calc in hrn_calculations]
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _pie_geometry(counts, startangle=90):
+    """Ángulos (theta1, theta2) de cada sector; los sectores vacíos quedan en cero"""
+    total = sum(counts)
+    angles = []
+    theta = startangle
+    for count in counts:
+        arc = 360.0 * count / total if total else 0.0
+        angles.append((theta, theta + arc))
+        theta += arc
+    return angles
+
+
+class AnalysisChart:
+    """Gráficos de análisis con ejes y artistas persistentes.
+
+    Los ejes se crean solo cuando cambia la disposición (riesgos ISO, HRN o
+    ambos); el resto de las veces se actualizan alturas de barras, sectores
+    y barras horizontales en su sitio, sin fig.clear() ni tight_layout().
+    """
+
+    def __init__(self, fig, max_bars=HRN_CHART_MAX_BARS):
+        self.fig = fig
+        self.max_bars = max_bars
+        self.layout = None
+        self.ax_plr = self.ax_severity = self.ax_levels = self.ax_values = None
+        self.plr_bars = self.level_bars = self.value_bars = None
+        self.severity_wedges = self.severity_labels = self.severity_pcts = None
+
+    def update(self, stats, hrn_calculations):
+        """Actualizar los gráficos; devuelve True si se rehízo la disposición"""
+        layout = (stats.total_risks > 0, stats.total_hrn > 0)
+        rebuilt = layout != self.layout
+        if rebuilt:
+            self._build(layout)
+
+        if layout[0]:
+            self._update_plr(stats)
+            self._update_severity(stats)
+        if layout[1]:
+            self._update_levels(stats)
+            self._update_values(stats, hrn_calculations)
+
+        if rebuilt and any(layout):
+            self.fig.tight_layout()
+        return rebuilt
+
+    def _build(self, layout):
+        self.fig.clear()
+        self.layout = layout
+        self.ax_plr = self.ax_severity = self.ax_levels = self.ax_values = None
+        self.value_bars = None
+        has_iso_risks, has_hrn_calcs = layout
+
+        if has_iso_risks and has_hrn_calcs:
+            self.ax_plr = self.fig.add_subplot(221)
+            self.ax_severity = self.fig.add_subplot(222)
+            self.ax_levels = self.fig.add_subplot(223)
+            self.ax_values = self.fig.add_subplot(224)
+        elif has_iso_risks:
+            self.ax_plr = self.fig.add_subplot(121)
+            self.ax_severity = self.fig.add_subplot(122)
+        elif has_hrn_calcs:
+            self.ax_levels = self.fig.add_subplot(121)
+            self.ax_values = self.fig.add_subplot(122)
+
+        # Análisis ISO 13849
+        if has_iso_risks:
+            ax1 = self.ax_plr
+            self.plr_bars = ax1.bar(PLR_LEVELS, [0] * len(PLR_LEVELS),
+                                    color=[PLR_COLORS[plr] for plr in PLR_LEVELS], edgecolor='black')
+            ax1.set_xlabel('Performance Level Requerido')
+            ax1.set_ylabel('Cantidad de Riesgos')
+            ax1.set_title('Distribución de Riesgos por PLr (ISO 13849)')
+            ax1.grid(axis='y', alpha=0.3)
+
+            # Gráfico circular - Severidad (un sector por clase, aunque esté vacío)
+            ax2 = self.ax_severity
+            codes = list(SEVERITY_COLORS)
+            self.severity_wedges, self.severity_labels, self.severity_pcts = ax2.pie(
+                [1] * len(codes), labels=codes, autopct='%1.1f%%',
+                colors=[SEVERITY_COLORS[s] for s in codes], startangle=90)
+            ax2.set_title('Distribución por Severidad')
+
+        # Análisis HRN
+        if has_hrn_calcs:
+            ax3 = self.ax_levels
+            self.level_bars = ax3.bar(range(len(LEVEL_ORDER)), [0] * len(LEVEL_ORDER), width=0.5,
+                                      color=[LEVEL_COLORS[level] for level in LEVEL_ORDER],
+                                      edgecolor='black')
+            ax3.set_xticks(range(len(LEVEL_ORDER)))
+            ax3.set_xticklabels([l.replace('Riesgo ', '') for l in LEVEL_ORDER], rotation=45, ha='right')
+            ax3.set_xlabel('Nivel de Riesgo')
+            ax3.set_ylabel('Cantidad')
+            ax3.set_title('Distribución de Riesgos HRN')
+            ax3.grid(axis='y', alpha=0.3)
+
+            ax4 = self.ax_values
+            ax4.set_xlabel('Valor HRN')
+            ax4.grid(axis='x', alpha=0.3)
+
+    def _update_plr(self, stats):
+        values = [stats.plr_counts[plr] for plr in PLR_LEVELS]
+        for bar, value in zip(self.plr_bars, values):
+            bar.set_height(value)
+        self.ax_plr.set_ylim(0, max(values) * 1.05 or 1)
+
+    def _update_severity(self, stats):
+        counts = [stats.severity_counts.get(s, 0) for s in SEVERITY_COLORS]
+        total = sum(counts)
+        for i, (theta1, theta2) in enumerate(_pie_geometry(counts)):
+            wedge = self.severity_wedges[i]
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            visible = counts[i] > 0
+            mid = math.radians((theta1 + theta2) / 2)
+            label, pct = self.severity_labels[i], self.severity_pcts[i]
+            label.set_position((1.1 * math.cos(mid), 1.1 * math.sin(mid)))
+            label.set_horizontalalignment('left' if math.cos(mid) >= 0 else 'right')
+            pct.set_position((0.6 * math.cos(mid), 0.6 * math.sin(mid)))
+            pct.set_text(f"{100.0 * counts[i] / total:.1f}%" if total else '')
+            for artist in (wedge, label, pct):
+                artist.set_visible(visible)
+
+    def _update_levels(self, stats):
+        values = [stats.level_counts[level] for level in LEVEL_ORDER]
+        for bar, value in zip(self.level_bars, values):
+            bar.set_height(value)
+        self.ax_levels.set_ylim(0, max(values) * 1.05 or 1)
+
+    def _update_values(self, stats, hrn_calculations):
+        ax4 = self.ax_values
+        hrn_values, descriptions, colors_hrn_bars = hrn_value_bars(stats, hrn_calculations, self.max_bars)
+        if len(hrn_values) < stats.total_hrn:
+            ax4.set_title(f'Valores HRN Calculados ({self.max_bars - 1} mayores de {stats.total_hrn})')
+        else:
+            ax4.set_title('Valores HRN Calculados')
+
+        if self.value_bars is not None and len(self.value_bars) == len(hrn_values):
+            for bar, value, color in zip(self.value_bars, hrn_values, colors_hrn_bars):
+                bar.set_width(value)
+                bar.set_facecolor(color)
+        else:
+            if self.value_bars is not None:
+                self.value_bars.remove()
+            self.value_bars = ax4.barh(range(len(hrn_values)), hrn_values,
+                                       color=colors_hrn_bars, edgecolor='black')
+            ax4.set_yticks(range(len(hrn_values)))
+        ax4.set_yticklabels(descriptions)
+        ax4.set_ylim(-0.5, len(hrn_values) - 0.5)
+        ax4.set_xlim(0, max(hrn_values, default=0) * 1.05 or 1)
+
+
+def hrn_value_bars(stats, hrn_calculations, max_bars=HRN_CHART_MAX_BARS):
+    """Barras (valores, etiquetas, colores) del gráfico de valores HRN.
+
+    Hasta `max_bars` cálculos se dibuja uno por barra, en orden. Con más, se
+    muestran los max_bars - 1 mayores (el peor arriba) y una barra "Otros"
+    con la media del resto, para que el coste no dependa del tamaño. El
+    total sale de `stats`: basta con pasar al menos los max_bars - 1
+    mayores (p. ej. en el reporte consolidado).
+    """
+    if stats.total_hrn <= max_bars:
+        calcs = list(hrn_calculations)
+        values = [calc.hrn for calc in calcs]
+        labels = [_short(calc.description) for calc in calcs]
+        return values, labels, [classify_hrn(hrn).color for hrn in values]
+
+    top = heapq.nlargest(max_bars - 1, hrn_calculations, key=lambda calc: calc.hrn)
+    rest = stats.total_hrn - len(top)
+    rest_mean = (stats.hrn_sum - sum(calc.hrn for calc in top)) / rest
+
+    # barh dibuja de abajo hacia arriba: "Otros" abajo, el peor arriba
+    values = [rest_mean] + [calc.hrn for calc in reversed(top)]
+    labels = [f"Otros ({rest})"] + [_short(calc.description) for calc in reversed(top)]
+    colors = [OTHERS_COLOR] + [classify_hrn(calc.hrn).color for calc in reversed(top)]
+    return values, labels, colors
+
+
+def _short(description):
+    return description[:15] + '...' if len(description) > 15 else description
+
+
+def draw_analysis(fig, stats, hrn_calculations, max_bars=HRN_CHART_MAX_BARS):
+    """Dibujar los gráficos de análisis en `fig` y devolver el texto de estadísticas"""
+    AnalysisChart(fig, max_bars).update(stats, hrn_calculations)
+    return stats.text()
+
+
+class ChartCache:
+    """Caché LRU de PNG renderizados, indexada por huella de datos y dpi"""
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._items.get(key)
+            if png is not None:
+                self._items.move_to_end(key)
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            self._items[key] = png
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+chart_cache = ChartCache()
+
+
+def render_analysis_png(risks, hrn_calculations, dpi=REPORT_DPI, cache=chart_cache, stats=None,
+                        max_bars=HRN_CHART_MAX_BARS):
+    """Renderizar los gráficos fuera de pantalla (Agg) y devolver el PNG.
+
+    El resultado se reutiliza mientras no cambien los datos ni el dpi.
+    """
+    key = (data_key(risks, hrn_calculations), dpi, max_bars)
+    if cache is not None:
+        png = cache.get(key)
+        if png is not None:
+            return png
+
+    fig = Figure(figsize=FIGURE_SIZE)
+    FigureCanvasAgg(fig)
+    if stats is None:
+        stats = AnalysisStats.from_records(risks, hrn_calculations)
+    with span("dibujar gráficos"):
+        draw_analysis(fig, stats, hrn_calculations, max_bars)
+
+    buf = io.BytesIO()
+    with span("savefig"):
+        fig.savefig(buf, format='png', dpi=dpi, bbox_inches='tight')
+    png = buf.getvalue()
+
+    if cache is not None:
+        cache.put(key, png)
+    return png
@@ -0,0 +1,271 @@
+"""Reporte consolidado de una línea o planta: muchos proyectos en un solo PDF.
+
+Los proyectos se recorren uno a uno con iter_records, sin cargar ni migrar
+sus fotos: de cada uno se guarda una fila de resumen y sus estadísticas
+(AnalysisStats, las mismas del análisis) se acumulan con merge(). De los
+cálculos HRN solo se conservan los mayores, así que la memoria no depende
+del tamaño de la flota. Los gráficos se renderizan una sola vez, con los
+totales.
+"""
+import heapq
+import io
+import os
+from datetime import datetime
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import Image, PageBreak, Paragraph, Spacer
+
+from core.charts import HRN_CHART_MAX_BARS, REPORT_DPI, render_analysis_png
+from core.model import HrnCalculation, Risk
+from core.profiling import count, operation, span
+from core.progress import OperationCancelled, check_cancelled, report_progress
+from core.project import iter_records, project_stem
+from core.report import HRN_BODY_STYLE, HRN_HEADER_STYLE, ReportContext, _ReportDocTemplate, chunked_tables
+from core.scoring import HRN_LEVEL_NAMES
+from core.stats import PLR_LEVELS, AnalysisStats
+from core.story import LazyStory
+
+# Peligros de mayor HRN listados en el reporte
+TOP_HAZARDS = 25
+# Porcentaje de avance reservado para leer los proyectos; el resto es el PDF
+READ_SHARE = 50
+
+MACHINE_COL_WIDTHS = [1.4*inch, 1.3*inch, 1.0*inch, 1.0*inch, 0.6*inch, 0.5*inch, 0.5*inch, 0.7*inch]
+DISTRIBUTION_COL_WIDTHS = [2.5*inch, 1.2*inch, 1.2*inch]
+HAZARD_COL_WIDTHS = [0.3*inch, 1.5*inch, 2.9*inch, 0.7*inch, 1.5*inch]
+
+
+class MachineSummary:
+    """Fila de resumen de un proyecto de la flota"""
+
+    def __init__(self, path, machine_data, photos, stats):
+        self.path = path
+        self.name = os.path.basename(project_stem(path))
+        self.machine_type = str(machine_data.get('machine_type') or '')
+        self.model = str(machine_data.get('model') or '')
+        self.location = str(machine_data.get('location') or '')
+        self.photos = photos
+        self.stats = stats
+
+    @property
+    def high_plr(self):
+        """Riesgos con PLr D o E"""
+        return self.stats.plr_counts['D'] + self.stats.plr_counts['E']
+
+
+class FleetSummary:
+    """Totales de la flota.
+
+    `stats` acumula las estadísticas de todas las máquinas, `machines` tiene
+    una fila por proyecto, `failed` los (ruta, error) que no se pudieron
+    leer y `skipped` los (ruta, error) de registros no válidos omitidos.
+    Los cálculos HRN pasan por un montículo acotado que conserva los
+    mayores: al menos `top` y los `max_bars` que necesita el gráfico de
+    valores.
+    """
+
+    def __init__(self, top=TOP_HAZARDS, max_bars=HRN_CHART_MAX_BARS):
+        self.stats = AnalysisStats()
+        self.machines = []
+        self.failed = []
+        self.skipped = []
+        self.top = top
+        self._keep = max(top, max_bars)
+        self._heap = []
+        self._seq = 0
+
+    def add_hazard(self, machine, calc):
+        # _seq desempata sin comparar registros; a igual HRN gana el primero leído
+        self._seq -= 1
+        item = (calc.hrn, self._seq, machine, calc)
+        if len(self._heap) < self._keep:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def top_hazards(self, limit=None):
+        """[(máquina, cálculo)] del HRN mayor al menor"""
+        items = heapq.nlargest(limit or self.top, self._heap)
+        return [(machine, calc) for _, _, machine, calc in items]
+
+    def add_project(self, path):
+        """Recorrer un proyecto y acumularlo; las fotos solo se cuentan"""
+        records = iter_records(path)
+        _, header = next(records)
+        stats = AnalysisStats()
+        name = os.path.basename(project_stem(path))
+        hazards, skipped = [], []
+        for kind, item in records:
+            # Como en read_project, un registro no válido no excluye la máquina
+            try:
+                if kind == 'risks':
+                    stats.add_risk(Risk.from_dict(item))
+                else:
+                    calc = HrnCalculation.from_dict(item)
+                    stats.add_hrn(calc)
+                    hazards.append(calc)
+            except ValueError as e:
+                skipped.append((path, str(e)))
+        # Solo se acumula un proyecto leído entero: uno dañado no deja datos a medias
+        for calc in hazards:
+            self.add_hazard(name, calc)
+        machine = MachineSummary(path, header.get('machine_data') or {}, len(header.get('photos') or []), stats)
+        self.machines.append(machine)
+        self.skipped.extend(skipped)
+        self.stats.merge(stats)
+        return machine
+
+
+def read_fleet(project_files, progress=None, cancel_event=None, top=TOP_HAZARDS, max_bars=HRN_CHART_MAX_BARS):
+    """Acumular los proyectos en un FleetSummary; los que fallan no detienen el resto"""
+    fleet = FleetSummary(top, max_bars)
+    total = max(len(project_files), 1)
+    with span("leer proyectos"):
+        for i, path in enumerate(project_files):
+            check_cancelled(cancel_event)
+            report_progress(progress, i * 100 / total, f"Leyendo {os.path.basename(path)}")
+            try:
+                fleet.add_project(path)
+            except Exception as e:
+                fleet.failed.append((path, f"{type(e).__name__}: {e}"))
+    count("proyectos", len(fleet.machines))
+    count("riesgos", fleet.stats.total_risks)
+    count("cálculos HRN", fleet.stats.total_hrn)
+    return fleet
+
+
+def _percent(value, total):
+    return f"{value / total * 100:.1f} %" if total else "-"
+
+
+def summary_section(fleet, ctx):
+    """Título, totales y una fila por máquina"""
+    styles = ctx.styles
+    stats = fleet.stats
+    yield Paragraph("Reporte Consolidado de Riesgos", ctx.title_style)
+    yield Paragraph(f"Fecha: {datetime.now().strftime('%Y-%m-%d')}", styles['Normal'])
+    yield Paragraph(f"Máquinas: {len(fleet.machines)} · Riesgos: {stats.total_risks} · "
+                    f"Cálculos HRN: {stats.total_hrn}", styles['Normal'])
+    yield Spacer(1, 0.2*inch)
+
+    yield Paragraph("RESUMEN POR MÁQUINA", ctx.heading_style)
+    header = ['Proyecto', 'Tipo', 'Modelo', 'Ubicación', 'Riesgos', 'PLr D/E', 'HRN', 'HRN máx']
+    small = styles['BodyText']
+    rows = ([
+        Paragraph(m.name, small),
+        Paragraph(m.machine_type, small),
+        Paragraph(m.model, small),
+        Paragraph(m.location, small),
+        str(m.stats.total_risks),
+        str(m.high_plr),
+        str(m.stats.total_hrn),
+        "-" if m.stats.hrn_max is None else f"{m.stats.hrn_max:.2f}"
+    ] for m in fleet.machines)
+    yield from chunked_tables(header, rows, MACHINE_COL_WIDTHS, HRN_BODY_STYLE, HRN_HEADER_STYLE)
+
+
+def distribution_section(fleet, ctx):
+    """Distribución por PLr y por nivel HRN de toda la flota"""
+    stats = fleet.stats
+    yield PageBreak()
+    yield Paragraph("DISTRIBUCIÓN DE RIESGOS", ctx.heading_style)
+    plr_rows = ([f"PLr {plr}", str(stats.plr_counts[plr]), _percent(stats.plr_counts[plr], stats.total_risks)]
+                for plr in PLR_LEVELS)
+    yield from chunked_tables(['PLr requerido', 'Riesgos', '%'], plr_rows, DISTRIBUTION_COL_WIDTHS,
+                              HRN_BODY_STYLE, HRN_HEADER_STYLE)
+    yield Spacer(1, 0.3*inch)
+
+    level_rows = ([level, str(stats.level_counts[level]), _percent(stats.level_counts[level], stats.total_hrn)]
+                  for level in HRN_LEVEL_NAMES)
+    yield from chunked_tables(['Nivel HRN', 'Cálculos', '%'], level_rows, DISTRIBUTION_COL_WIDTHS,
+                              HRN_BODY_STYLE, HRN_HEADER_STYLE)
+    if stats.total_hrn:
+        yield Spacer(1, 0.2*inch)
+        yield Paragraph(f"HRN mín/medio/máx: {stats.hrn_min:.2f} / {stats.hrn_mean:.2f} / {stats.hrn_max:.2f}",
+                        ctx.styles['Normal'])
+
+
+def charts_section(fleet, ctx):
+    """Gráficos del análisis con los totales de la flota, renderizados una vez"""
+    if not (fleet.stats.total_risks or fleet.stats.total_hrn):
+        return
+    hazards = [calc for _, calc in fleet.top_hazards(ctx.max_bars)]
+    # Sin caché: la huella saldría de los registros y aquí solo están los totales
+    png = render_analysis_png((), hazards, dpi=REPORT_DPI, cache=None, stats=fleet.stats, max_bars=ctx.max_bars)
+    yield Paragraph("ANÁLISIS GRÁFICO", ctx.heading_style)
+    yield Image(io.BytesIO(png), width=7*inch, height=3.5*inch)
+
+
+def hazards_section(fleet, ctx):
+    """Peligros de mayor HRN de todas las máquinas"""
+    hazards = fleet.top_hazards()
+    if not hazards:
+        return
+    small = ctx.styles['BodyText']
+    yield PageBreak()
+    yield Paragraph(f"PELIGROS CON MAYOR HRN ({len(hazards)} de {fleet.stats.total_hrn})", ctx.heading_style)
+    rows = ([str(i), Paragraph(machine, small), Paragraph(calc.description, small), f"{calc.hrn:.2f}", calc.level]
+            for i, (machine, calc) in enumerate(hazards, 1))
+    yield from chunked_tables(['#', 'Proyecto', 'Peligro', 'HRN', 'Nivel'], rows, HAZARD_COL_WIDTHS,
+                              HRN_BODY_STYLE, HRN_HEADER_STYLE)
+
+
+def failed_section(fleet, ctx):
+    """Proyectos que no se pudieron leer (no entran en los totales) y registros omitidos"""
+    styles = ctx.styles
+    for title, items in (("Proyectos no incluidos", fleet.failed), ("Registros omitidos", fleet.skipped)):
+        if not items:
+            continue
+        yield Spacer(1, 0.3*inch)
+        yield Paragraph(title, styles['Heading3'])
+        for path, error in items:
+            yield Paragraph(f"{os.path.basename(path)}: {error}", styles['Normal'])
+
+
+FLEET_SECTIONS = [
+    ("Resumen por máquina", summary_section, lambda fleet: len(fleet.machines) + 6),
+    ("Distribución", distribution_section, lambda fleet: 7),
+    ("Análisis gráfico", charts_section, lambda fleet: 2),
+    ("Peligros con mayor HRN", hazards_section, lambda fleet: 3),
+    ("Proyectos no incluidos", failed_section, lambda fleet: len(fleet.failed) + len(fleet.skipped) + 4),
+]
+
+
+def build_fleet_report(filename, project_files, progress=None, cancel_event=None, top=TOP_HAZARDS,
+                       max_bars=HRN_CHART_MAX_BARS):
+    """Generar el reporte consolidado de `project_files` y devolver el FleetSummary.
+
+    `progress` y `cancel_event` funcionan como en core.report.build_report;
+    si se cancela se elimina el archivo parcial.
+    """
+    with operation("Reporte consolidado"):
+        fleet = read_fleet(project_files,
+                           lambda percent, label: report_progress(progress, percent * READ_SHARE / 100, label),
+                           cancel_event, top, max_bars)
+        if not fleet.machines:
+            raise ValueError("No se pudo leer ningún proyecto")
+
+        expected = sum(estimate(fleet) for _, _, estimate in FLEET_SECTIONS)
+        doc = _ReportDocTemplate(
+            filename, cancel_event=cancel_event, expected=expected, pagesize=letter,
+            progress=lambda percent, label: report_progress(
+                progress, READ_SHARE + percent * (100 - READ_SHARE) / 100, label))
+        doc.topMargin = 0.75 * inch
+        doc.bottomMargin = 0.5 * inch
+        doc.leftMargin = 0.75 * inch
+        doc.rightMargin = 0.75 * inch
+
+        ctx = ReportContext(cancel_event, max_bars=max_bars)
+        story = LazyStory((label, lambda make=make: make(fleet, ctx)) for label, make, _ in FLEET_SECTIONS)
+        try:
+            with span("doc.build"):
+                doc.build(story)
+        except OperationCancelled:
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+        count("bytes escritos", os.path.getsize(filename))
+
+    report_progress(progress, 100, "Completado")
+    return fleet
@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from PIL import Image as PILImage
+
+from core.profiling import count, span
+from core.progress import check_cancelled
+
+# Valores por defecto para las fotos del reporte
+PHOTO_DPI = 150
+PHOTO_JPEG_QUALITY = 80
+PHOTO_BOX = (5, 3.5)  # pulgadas (ancho, alto) reservadas para cada foto
+
+IMAGE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'riskmgm', 'images')
+IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def target_size(width, height, box, dpi):
+    """Tamaño en píxeles para que la imagen quepa en `box` (pulgadas) a `dpi`, sin ampliar"""
+    scale = min(box[0] * dpi / width, box[1] * dpi / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def prepare_image(source_path, dest_path, box, dpi, quality):
+    """Reescalar y recomprimir una imagen como JPEG; devuelve (ancho, alto) en píxeles"""
+    with PILImage.open(source_path) as img:
+        size = target_size(img.width, img.height, box, dpi)
+        img.draft('RGB', size)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            # JPEG no admite transparencia: componer sobre fondo blanco
+            img = img.convert('RGBA')
+            background = PILImage.new('RGB', img.size, 'white')
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+        else:
+            img = img.convert('RGB')
+        if img.size != size:
+            img = img.resize(size, PILImage.Resampling.LANCZOS)
+
+        tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+        try:
+            img.save(tmp_path, format='JPEG', quality=quality, optimize=True)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return size
+
+
+def describe_error(error):
+    return f"{type(error).__name__}: {error}"
+
+
+class ImagePreparer:
+    """Prepara las fotos del reporte: remuestreo al dpi de destino y JPEG.
+
+    Los resultados se guardan en `cache_dir` (por usuario) con una clave
+    derivada del hash de la foto y de los parámetros, por lo que
+    exportaciones repetidas no vuelven a procesar las imágenes; cuando la
+    caché supera `max_bytes` se borran los archivos usados hace más tiempo.
+    Las fotos pendientes se procesan en paralelo en un pool de procesos que
+    se crea en el primer uso y se reutiliza hasta `close()`.
+    """
+
+    def __init__(self, dpi=PHOTO_DPI, quality=PHOTO_JPEG_QUALITY, box=PHOTO_BOX,
+                 cache_dir=IMAGE_CACHE_DIR, max_workers=None, max_bytes=IMAGE_CACHE_MAX_BYTES):
+        self.dpi = dpi
+        self.quality = quality
+        self.box = box
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Terminar el pool de procesos, si se llegó a crear"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def cached_path(self, sha256):
+        params = f"{self.box[0]}x{self.box[1]}in_{self.dpi}dpi_q{self.quality}"
+        return os.path.join(self.cache_dir, f"{sha256}_{params}.jpg")
+
+    def prepare(self, photos, store, cancel_event=None):
+        """Devolver (ruta del JPEG preparado, error) por foto; la ruta es None si falló.
+
+        Lanza PermissionError si no se puede escribir en la caché.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if not os.access(self.cache_dir, os.W_OK):
+            raise PermissionError(f"No se puede escribir en la caché de imágenes: {self.cache_dir}")
+        results = [(None, None)] * len(photos)
+        pending = []
+        for i, photo in enumerate(photos):
+            path = self.cached_path(photo['sha256'])
+            if os.path.exists(path):
+                # La fecha de modificación marca el último uso para la limpieza
+                os.utime(path)
+                results[i] = (path, None)
+            else:
+                pending.append((i, store.path(photo['sha256']), path))
+        count("fotos en caché", len(photos) - len(pending))
+        count("fotos procesadas", len(pending))
+
+        workers = min(self.max_workers or os.cpu_count() or 1, len(pending))
+        with span("decodificar y recomprimir fotos"):
+            self._process(pending, results, workers, cancel_event)
+        if pending:
+            self.evict(keep={path for path, _ in results if path})
+        return results
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context('spawn')
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers or os.cpu_count() or 1,
+                                                 mp_context=context)
+            return self._pool
+
+    def _process(self, pending, results, workers, cancel_event):
+        """Procesar las fotos pendientes, en el pool de procesos si hay más de un worker"""
+        if workers == 1:
+            for i, source, dest in pending:
+                check_cancelled(cancel_event)
+                try:
+                    prepare_image(source, dest, self.box, self.dpi, self.quality)
+                    results[i] = (dest, None)
+                except Exception as e:
+                    results[i] = (None, describe_error(e))
+        elif pending:
+            pool = self._get_pool()
+            futures = [(i, dest, pool.submit(prepare_image, source, dest, self.box,
+                                             self.dpi, self.quality))
+                       for i, source, dest in pending]
+            try:
+                for i, dest, future in futures:
+                    check_cancelled(cancel_event)
+                    try:
+                        future.result()
+                        results[i] = (dest, None)
+                    except BrokenProcessPool as e:
+                        # Un worker murió: el pool ya no sirve, se crea otro en el próximo uso
+                        with self._lock:
+                            if self._pool is pool:
+                                self._pool = None
+                        results[i] = (None, describe_error(e))
+                    except Exception as e:
+                        results[i] = (None, describe_error(e))
+            except BaseException:
+                for _, _, future in futures:
+                    future.cancel()
+                raise
+
+    def evict(self, keep=()):
+        """Borrar los JPEG usados hace más tiempo hasta que la caché no supere max_bytes"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.jpg'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Otro proceso la borró antes
+                pass
+            total -= size
@@ -0,0 +1,121 @@
+"""Diario de cambios para el autoguardado.
+
+Cada edición (riesgo, cálculo HRN o datos de la máquina) se anexa como una
+línea JSON en `<proyecto>.journal`. El coste de guardar es proporcional al
+cambio y no al tamaño del proyecto; periódicamente el diario se compacta
+(reemplazo atómico) en el archivo de recuperación `<proyecto>.recovery.rmp`
+y se vacía. El archivo del proyecto solo se escribe al guardarlo
+explícitamente. Al abrir un proyecto se parte de su recuperación, si existe,
+y se reaplican las entradas pendientes.
+"""
+import json
+import os
+
+from core.model import Risk, HrnCalculation
+
+JOURNAL_SUFFIX = '.journal'
+RECOVERY_SUFFIX = '.recovery.rmp'
+
+RECORD_TYPES = {'risks': Risk, 'hrn_calculations': HrnCalculation}
+
+
+def journal_path(project_filename):
+    return project_filename + JOURNAL_SUFFIX
+
+
+def recovery_path(project_filename):
+    """Archivo donde se compactan los cambios aún no guardados en el proyecto"""
+    return project_filename + RECOVERY_SUFFIX
+
+
+def read_journal(path):
+    """Entradas del diario; una última línea incompleta (caída a mitad de escritura) se ignora"""
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+    return entries
+
+
+def record_entry(kind, event, record):
+    """Entrada del diario para un cambio en RiskStore/HrnStore (kind = clave del proyecto)"""
+    if event == 'remove':
+        return {'op': 'remove', 'kind': kind, 'id': record.id}
+    return {'op': 'put', 'kind': kind, 'record': record.to_dict()}
+
+
+def machine_entry(machine_data, photos):
+    """Entrada del diario con los datos de la máquina y las referencias de fotos"""
+    machine_data = {k: v for k, v in machine_data.items()
+                    if k not in ('photos', 'machine_photos', 'images')}
+    return {'op': 'machine', 'machine_data': machine_data, 'photos': photos}
+
+
+def replay(project, entries):
+    """Aplicar las entradas al proyecto y devolver cuántas se aplicaron.
+
+    Es idempotente: reaplicar entradas ya compactadas no cambia el resultado
+    ('put' inserta o reemplaza por ID y 'remove' ignora IDs inexistentes).
+    """
+    for entry in entries:
+        op = entry['op']
+        if op == 'machine':
+            project['machine_data'] = entry['machine_data']
+            project['photos'] = entry['photos']
+            continue
+
+        store = project[entry['kind']]
+        if op == 'put':
+            record = RECORD_TYPES[entry['kind']].from_dict(entry['record'])
+            if record.id in store:
+                store.update(record)
+            else:
+                store.add(record)
+        elif op == 'remove' and entry['id'] in store:
+            store.remove(entry['id'])
+    return len(entries)
+
+
+class Journal:
+    """Diario de solo anexar asociado a un archivo de proyecto"""
+
+    def __init__(self, path, truncate=False):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if truncate:
+            self._file = open(path, 'w', encoding='utf-8')
+            self.entries = 0
+        else:
+            # Reescribir sin una posible línea incompleta antes de seguir anexando
+            self._rewrite(read_journal(path))
+
+    def append(self, entry):
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._file.flush()
+        self.entries += 1
+
+    def sync(self):
+        """Forzar las entradas a disco"""
+        os.fsync(self._file.fileno())
+
+    def discard(self, count):
+        """Quitar las primeras `count` entradas, ya compactadas en el proyecto"""
+        self._file.close()
+        self._rewrite(read_journal(self.path)[count:])
+
+    def _rewrite(self, entries):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self.entries = len(entries)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,352 @@
+import uuid
+
+from core.scoring import (SEVERITY_OPTIONS, FREQUENCY_OPTIONS, AVOIDANCE_OPTIONS,
+                          LO_VALUES, FE_VALUES, DPH_VALUES, NP_VALUES,
+                          calculate_plr, calculate_hrn, classify_hrn, option_label, option_code)
+
+
+def _code_index(options):
+    return {code: i for i, (code, _) in enumerate(options)}
+
+
+def _value_index(table):
+    return {float(value): i for i, (value, _) in enumerate(table)}
+
+
+_SEVERITY_INDEX = _code_index(SEVERITY_OPTIONS)
+_FREQUENCY_INDEX = _code_index(FREQUENCY_OPTIONS)
+_AVOIDANCE_INDEX = _code_index(AVOIDANCE_OPTIONS)
+_LO_INDEX = _value_index(LO_VALUES)
+_FE_INDEX = _value_index(FE_VALUES)
+_DPH_INDEX = _value_index(DPH_VALUES)
+_NP_INDEX = _value_index(NP_VALUES)
+
+
+def new_id():
+    """Identificador estable y único para un registro"""
+    return uuid.uuid4().hex
+
+
+def _lookup(data, field, index, convert):
+    """Índice del valor `field` de un registro guardado; ValueError si no está en la tabla"""
+    value = data.get(field)
+    try:
+        return index[convert(value)]
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ValueError(f"Registro '{_record_name(data)}': valor no válido en {field}: {value!r}") from None
+
+
+def _description(data):
+    if data.get('description') is None:
+        raise ValueError(f"Registro '{_record_name(data)}': falta la descripción")
+    return data['description']
+
+
+def _record_name(data):
+    return data.get('description') or data.get('id') or '?'
+
+
+def _truncate(text, length):
+    return text[:length] + '...' if len(text) > length else text
+
+
+class Risk:
+    """Riesgo ISO 13849-1 con S, F y P guardados como índices en las tablas de core.scoring.
+
+    Los registros no se modifican una vez creados: para editar se reemplazan,
+    así las instantáneas (reportes en segundo plano) pueden compartirlos.
+    """
+
+    __slots__ = ('id', 'description', 'zone', 's', 'f', 'p', 'control_measures')
+
+    def __init__(self, description, zone, s, f, p, control_measures='', record_id=None):
+        self.id = record_id or new_id()
+        self.description = description
+        self.zone = zone
+        self.s = s
+        self.f = f
+        self.p = p
+        self.control_measures = control_measures
+
+    @property
+    def severity(self):
+        return option_label(*SEVERITY_OPTIONS[self.s])
+
+    @property
+    def frequency(self):
+        return option_label(*FREQUENCY_OPTIONS[self.f])
+
+    @property
+    def avoidance(self):
+        return option_label(*AVOIDANCE_OPTIONS[self.p])
+
+    @property
+    def severity_code(self):
+        return SEVERITY_OPTIONS[self.s][0]
+
+    @property
+    def frequency_code(self):
+        return FREQUENCY_OPTIONS[self.f][0]
+
+    @property
+    def avoidance_code(self):
+        return AVOIDANCE_OPTIONS[self.p][0]
+
+    @property
+    def plr(self):
+        return calculate_plr(self.s, self.f, self.p).upper()
+
+    def row(self):
+        """Valores para la lista de riesgos"""
+        return (_truncate(self.description, 30), self.zone, self.severity_code,
+                self.frequency_code, self.avoidance_code, self.plr)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'description': self.description,
+            'zone': self.zone,
+            'severity': self.severity,
+            'frequency': self.frequency,
+            'avoidance': self.avoidance,
+            'plr': self.plr,
+            'control_measures': self.control_measures
+        }
+
+    def with_id(self, record_id):
+        """Copia del riesgo con otro ID (los registros no se modifican)"""
+        return Risk(self.description, self.zone, self.s, self.f, self.p, self.control_measures, record_id)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            _description(data),
+            data.get('zone', ''),
+            _lookup(data, 'severity', _SEVERITY_INDEX, option_code),
+            _lookup(data, 'frequency', _FREQUENCY_INDEX, option_code),
+            _lookup(data, 'avoidance', _AVOIDANCE_INDEX, option_code),
+            data.get('control_measures', ''),
+            data.get('id')
+        )
+
+
+class HrnCalculation:
+    """Cálculo HRN con LO, FE, DPH y NP guardados como índices en las tablas de factores"""
+
+    __slots__ = ('id', 'description', 'lo_idx', 'fe_idx', 'dph_idx', 'np_idx', 'timestamp', 'hrn')
+
+    def __init__(self, description, lo_idx, fe_idx, dph_idx, np_idx, timestamp='', record_id=None):
+        self.id = record_id or new_id()
+        self.description = description
+        self.lo_idx = lo_idx
+        self.fe_idx = fe_idx
+        self.dph_idx = dph_idx
+        self.np_idx = np_idx
+        self.timestamp = timestamp
+        self.hrn = calculate_hrn(self.lo, self.fe, self.dph, self.np)
+
+    @property
+    def lo(self):
+        return float(LO_VALUES[self.lo_idx][0])
+
+    @property
+    def lo_desc(self):
+        return LO_VALUES[self.lo_idx][1]
+
+    @property
+    def fe(self):
+        return float(FE_VALUES[self.fe_idx][0])
+
+    @property
+    def fe_desc(self):
+        return FE_VALUES[self.fe_idx][1]
+
+    @property
+    def dph(self):
+        return float(DPH_VALUES[self.dph_idx][0])
+
+    @property
+    def dph_desc(self):
+        return DPH_VALUES[self.dph_idx][1]
+
+    @property
+    def np(self):
+        return float(NP_VALUES[self.np_idx][0])
+
+    @property
+    def np_desc(self):
+        return NP_VALUES[self.np_idx][1]
+
+    @property
+    def level(self):
+        return classify_hrn(self.hrn).name
+
+    def row(self):
+        """Valores para el historial de cálculos HRN"""
+        return (_truncate(self.description, 40), f"{self.hrn:.2f}", self.level)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'description': self.description,
+            'hrn': self.hrn,
+            'level': self.level,
+            'lo': self.lo,
+            'lo_desc': self.lo_desc,
+            'fe': self.fe,
+            'fe_desc': self.fe_desc,
+            'dph': self.dph,
+            'dph_desc': self.dph_desc,
+            'np': self.np,
+            'np_desc': self.np_desc,
+            'timestamp': self.timestamp
+        }
+
+    def with_id(self, record_id):
+        """Copia del cálculo con otro ID (los registros no se modifican)"""
+        return HrnCalculation(self.description, self.lo_idx, self.fe_idx, self.dph_idx, self.np_idx,
+                              self.timestamp, record_id)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            _description(data),
+            _lookup(data, 'lo', _LO_INDEX, float),
+            _lookup(data, 'fe', _FE_INDEX, float),
+            _lookup(data, 'dph', _DPH_INDEX, float),
+            _lookup(data, 'np', _NP_INDEX, float),
+            data.get('timestamp', ''),
+            data.get('id')
+        )
+
+
+class RecordStore:
+    """Registros indexados por ID estable, en orden de inserción.
+
+    Buscar y actualizar por ID es O(1); el acceso por posición (0..n-1) usa
+    una lista de orden que se crea solo cuando hace falta. Eliminar la
+    recorta en su sitio (O(n) en el peor caso, sin reconstruirla) y solo
+    invalida el índice de posiciones si el registro no era el último.
+    Los suscriptores reciben (store, event, record, previous) con event 'add',
+    'update', 'remove' o 'reset' (record es None en 'reset' y previous es el
+    registro reemplazado en 'update').
+    """
+
+    record_type = None
+
+    def __init__(self, records=()):
+        self._by_id = self._index(records)
+        self._order = None
+        self._positions = None
+        self._listeners = []
+        self.revision = 0
+
+    @staticmethod
+    def _index(records):
+        """{id: registro}; un ID repetido (p. ej. un archivo editado a mano)
+        recibe una copia con ID nuevo, sin tocar el registro original, que
+        puede estar en otro almacén o instantánea"""
+        by_id = {}
+        for record in records:
+            if record.id in by_id:
+                record = record.with_id(new_id())
+            by_id[record.id] = record
+        return by_id
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __getitem__(self, index):
+        return self._ordered()[index]
+
+    def __bool__(self):
+        return bool(self._by_id)
+
+    def __contains__(self, record_id):
+        return record_id in self._by_id
+
+    def _ordered(self):
+        if self._order is None:
+            self._order = list(self._by_id.values())
+            self._positions = None
+        return self._order
+
+    def get(self, record_id):
+        return self._by_id.get(record_id)
+
+    def index_of(self, record_id):
+        """Posición actual del registro con ese ID"""
+        if self._positions is None:
+            self._positions = {record.id: i for i, record in enumerate(self._ordered())}
+        return self._positions[record_id]
+
+    def add(self, record):
+        """Añadir un registro y devolver su posición"""
+        if record.id in self._by_id:
+            raise KeyError(f"ID duplicado: {record.id}")
+        self._by_id[record.id] = record
+        if self._order is not None:
+            if self._positions is not None:
+                self._positions[record.id] = len(self._order)
+            self._order.append(record)
+        self._notify('add', record)
+        return len(self._by_id) - 1
+
+    def update(self, record):
+        """Reemplazar el registro con el mismo ID, conservando su posición"""
+        previous = self._by_id[record.id]
+        self._by_id[record.id] = record
+        if self._order is not None:
+            self._order[self.index_of(record.id)] = record
+        self._notify('update', record, previous)
+        return previous
+
+    def remove(self, record_id):
+        if self._order is not None:
+            index = self.index_of(record_id)
+            del self._order[index]
+            if index == len(self._order):
+                del self._positions[record_id]
+            else:
+                # Los registros posteriores se desplazan una posición
+                self._positions = None
+        record = self._by_id.pop(record_id)
+        self._notify('remove', record)
+        return record
+
+    def replace(self, records):
+        """Sustituir todos los registros (p. ej. al abrir un proyecto)"""
+        self._by_id = self._index(records)
+        self._order = None
+        self._positions = None
+        self._notify('reset')
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, event, record=None, previous=None):
+        self.revision += 1
+        for listener in self._listeners:
+            listener(self, event, record, previous)
+
+    def snapshot(self):
+        """Copia para trabajar fuera del hilo principal (los registros se comparten)"""
+        return type(self)(self._by_id.values())
+
+    def to_dicts(self):
+        return [record.to_dict() for record in self._by_id.values()]
+
+    @classmethod
+    def from_dicts(cls, items):
+        return cls(cls.record_type.from_dict(item) for item in items)
+
+
+class RiskStore(RecordStore):
+    record_type = Risk
+
+
+class HrnStore(RecordStore):
+    record_type = HrnCalculation
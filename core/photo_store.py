@@ -0,0 +1,131 @@
+import atexit
+import base64
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+_CHUNK_SIZE = 1024 * 1024
+# Archivo con la ruta del dueño de un almacén compartido (p. ej. una base de datos)
+OWNER_FILE = '.owner'
+
+
+class PhotoStore:
+    """Almacén de fotos direccionado por contenido.
+
+    Cada imagen se guarda una sola vez en `root/<sha256>` y el proyecto la
+    referencia por su hash, de modo que el JSON no contiene datos binarios.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def close(self):
+        """Liberar el almacén; solo los temporales tienen algo que borrar"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def path(self, sha256):
+        return os.path.join(self.root, sha256)
+
+    def has(self, sha256):
+        return os.path.exists(self.path(sha256))
+
+    def put_bytes(self, data):
+        """Guardar bytes y devolver su SHA-256"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        if not self.has(sha256):
+            os.makedirs(self.root, exist_ok=True)
+            tmp_path = self.path(sha256) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path(sha256))
+        return sha256
+
+    def put_file(self, file_path):
+        """Copiar un archivo al almacén calculando su hash por bloques"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        if not self.has(sha256):
+            os.makedirs(self.root, exist_ok=True)
+            tmp_path = self.path(sha256) + '.tmp'
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, self.path(sha256))
+        return sha256
+
+    def get(self, sha256):
+        with open(self.path(sha256), 'rb') as f:
+            return f.read()
+
+    def import_from(self, other, sha256):
+        """Copiar una imagen desde otro almacén (enlace duro si es posible)"""
+        if self.has(sha256) or os.path.abspath(other.root) == os.path.abspath(self.root):
+            return
+        os.makedirs(self.root, exist_ok=True)
+        try:
+            os.link(other.path(sha256), self.path(sha256))
+        except OSError:
+            shutil.copyfile(other.path(sha256), self.path(sha256))
+
+    def claim(self, owner):
+        """Marcar el almacén como propio de `owner`; nadie más lo limpia (prune)"""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, OWNER_FILE), 'w', encoding='utf-8') as f:
+            f.write(os.path.abspath(owner))
+
+    def owned_by(self, owner):
+        """True si el almacén no tiene dueño marcado o si es `owner`"""
+        try:
+            with open(os.path.join(self.root, OWNER_FILE), 'r', encoding='utf-8') as f:
+                return f.read().strip() == os.path.abspath(owner)
+        except FileNotFoundError:
+            return True
+
+    def prune(self, keep):
+        """Eliminar imágenes que ya no están referenciadas"""
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            if _SHA256_RE.match(name) and name not in keep:
+                os.remove(self.path(name))
+
+
+class TemporaryPhotoStore(PhotoStore):
+    """Almacén en un directorio temporal que se borra con close() (o con `with`).
+
+    Si nadie lo cierra se borra al terminar el proceso; los procesos que leen
+    muchos proyectos (lotes, importación) deben cerrarlo tras cada uno.
+    """
+
+    def __init__(self):
+        PhotoStore.__init__(self, tempfile.mkdtemp(prefix='riskmgm_photos_'))
+        atexit.register(self.close)
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        atexit.unregister(self.close)
+
+
+def migrate_inline_photo(photo, store):
+    """Mover una foto antigua en base64 al almacén y devolver su referencia"""
+    if 'data' not in photo:
+        return photo
+    migrated = {k: v for k, v in photo.items() if k != 'data'}
+    migrated['sha256'] = store.put_bytes(base64.b64decode(photo['data']))
+    return migrated
+
+
+def photo_bytes(photo, store):
+    """Leer los bytes de una foto bajo demanda"""
+    if 'data' in photo:
+        return base64.b64decode(photo['data'])
+    return store.get(photo['sha256'])
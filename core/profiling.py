@@ -0,0 +1,163 @@
+"""Instrumentación opcional: tramos con tiempo, contadores y cProfile.
+
+Desactivada por defecto; se activa con la variable de entorno
+RISKMGM_PROFILE (`1` solo tramos y contadores, `cprofile` además un volcado
+de cProfile por operación en PROFILE_DIR) o con `--profile` en la CLI.
+Desactivada, operation(), span() y count() apenas cuestan una comprobación.
+
+    with operation("Generar PDF"):
+        with span("doc.build"):
+            ...
+        count("bytes escritos", size)
+
+Cada hilo mide su propia operación; las últimas HISTORY terminadas (de
+cualquier hilo, p. ej. también el autoguardado) quedan en recent_operations().
+"""
+import cProfile
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+ENV_VAR = 'RISKMGM_PROFILE'
+PROFILE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'riskmgm', 'profiles')
+MODES = ('spans', 'cprofile')
+HISTORY = 10
+
+_mode = None
+_local = threading.local()
+_lock = threading.Lock()
+_recent = deque(maxlen=HISTORY)
+
+
+def configure(mode='spans'):
+    """Activar ('spans' o 'cprofile') o desactivar (None) la instrumentación"""
+    global _mode
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"Modo de perfilado desconocido: {mode}")
+    _mode = mode
+
+
+def enabled():
+    return _mode is not None
+
+
+def _configure_from_env():
+    value = os.environ.get(ENV_VAR, '').strip().lower()
+    if value in ('', '0'):
+        configure(None)
+    else:
+        configure('cprofile' if value == 'cprofile' else 'spans')
+
+
+class Operation:
+    """Tiempos por tramo y contadores de una operación (p. ej. generar el PDF)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.seconds = 0.0
+        # Ruta de tramos anidados (tupla) -> [llamadas, segundos], en orden de inicio
+        self.spans = {}
+        self.counters = {}
+        self.profile_path = None
+        self._path = ()
+
+    def report(self):
+        """Desglose legible de la operación"""
+        lines = [f"{self.name} ({self.started}): {self.seconds * 1000:.1f} ms"]
+        for path, (calls, seconds) in self.spans.items():
+            label = "  " * len(path) + path[-1]
+            share = seconds / self.seconds * 100 if self.seconds else 0.0
+            times = f"  x{calls}" if calls > 1 else ""
+            lines.append(f"{label:<40} {seconds * 1000:10.1f} ms {share:5.1f} %{times}")
+        if self.counters:
+            lines.append("Contadores:")
+            lines.extend(f"  {name:<38} {value:>10}" for name, value in self.counters.items())
+        if self.profile_path:
+            lines.append(f"cProfile: {self.profile_path}")
+        return "\n".join(lines)
+
+
+def current_operation():
+    """Operación en curso en este hilo, o None"""
+    return getattr(_local, 'operation', None)
+
+
+def last_operation():
+    """Última operación terminada, o None"""
+    with _lock:
+        return _recent[-1] if _recent else None
+
+
+def recent_operations():
+    """Operaciones terminadas, de la más reciente a la más antigua"""
+    with _lock:
+        return list(reversed(_recent))
+
+
+@contextmanager
+def span(name):
+    """Medir un tramo dentro de la operación en curso (sin operación no mide nada)"""
+    op = current_operation()
+    if op is None:
+        yield
+        return
+    path = op._path + (name,)
+    entry = op.spans.setdefault(path, [0, 0.0])
+    op._path = path
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry[0] += 1
+        entry[1] += time.perf_counter() - start
+        op._path = path[:-1]
+
+
+@contextmanager
+def operation(name):
+    """Medir una operación completa; dentro de otra operación equivale a span()"""
+    if _mode is None:
+        yield None
+        return
+    if current_operation() is not None:
+        with span(name):
+            yield current_operation()
+        return
+
+    op = Operation(name)
+    _local.operation = op
+    profiler = cProfile.Profile() if _mode == 'cprofile' else None
+    if profiler is not None:
+        try:
+            profiler.enable()
+        except ValueError:
+            profiler = None  # Ya hay otro perfilador activo (otra operación en paralelo)
+    start = time.perf_counter()
+    try:
+        yield op
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        op.seconds = time.perf_counter() - start
+        _local.operation = None
+        if profiler is not None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            slug = re.sub(r'\W+', '_', name).strip('_').lower()
+            op.profile_path = os.path.join(PROFILE_DIR, f"{slug}_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+            profiler.dump_stats(op.profile_path)
+        with _lock:
+            _recent.append(op)
+
+
+def count(name, amount=1):
+    """Sumar `amount` al contador `name` de la operación en curso"""
+    op = current_operation()
+    if op is not None:
+        op.counters[name] = op.counters.get(name, 0) + amount
+
+
+_configure_from_env()
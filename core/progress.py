@@ -0,0 +1,14 @@
+class OperationCancelled(Exception):
+    """Operación cancelada por el usuario"""
+
+
+def check_cancelled(cancel_event):
+    """Lanzar OperationCancelled si se solicitó la cancelación"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise OperationCancelled()
+
+
+def report_progress(progress, percent, label):
+    """Notificar avance (0-100) si hay un callback de progreso"""
+    if progress is not None:
+        progress(percent, label)
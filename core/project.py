@@ -0,0 +1,276 @@
+"""Lectura y escritura de archivos de proyecto.
+
+La codificación se elige por la extensión:
+    .json      documento JSON indentado (formato histórico, legible)
+    .json.gz   el mismo documento, compacto y comprimido con gzip
+    .rmp       JSON Lines comprimido con gzip: una cabecera y un registro por
+               línea, para proyectos grandes y lectura en flujo
+
+Todos los archivos guardan `schema_version`; al abrirlos se aplican en orden
+las migraciones registradas desde su versión hasta SCHEMA_VERSION.
+"""
+import gzip
+import json
+import os
+import threading
+
+from core.model import RiskStore, HrnStore, Risk, HrnCalculation
+from core.photo_store import PhotoStore, TemporaryPhotoStore, migrate_inline_photo
+from core.profiling import count, operation, span
+from core.progress import check_cancelled, report_progress
+
+SCHEMA_VERSION = 2
+PROJECT_EXTENSIONS = ('.json', '.json.gz', '.rmp')
+GZIP_LEVEL = 6
+# Cada cuántos registros se comprueba la cancelación al leer o guardar
+CHECK_EVERY = 1000
+
+# Tipos de registro en las líneas de un archivo .rmp
+RECORD_KINDS = {'risk': 'risks', 'hrn': 'hrn_calculations'}
+
+MIGRATIONS = {}
+
+
+def migration(from_version):
+    """Registrar la migración de `from_version` a `from_version + 1`"""
+    def register(func):
+        MIGRATIONS[from_version] = func
+        return func
+    return register
+
+
+@migration(1)
+def _move_nested_photos(data):
+    """Archivos sin versión: las fotos podían estar anidadas en machine_data"""
+    machine_data = data.get('machine_data') or {}
+    nested_photos = machine_data.pop('photos', None)
+
+    # Elegir fotos preferentemente desde la clave superior
+    if 'photos' not in data and nested_photos is not None:
+        data['photos'] = nested_photos
+    data['photos'] = data.get('photos') or []
+    data['machine_data'] = machine_data
+    return data
+
+
+def migrate(data):
+    """Llevar un documento de proyecto a SCHEMA_VERSION"""
+    version = data.get('schema_version', 1)
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"El proyecto usa la versión de formato {version}; "
+                         f"esta versión del programa admite hasta la {SCHEMA_VERSION}")
+    while version < SCHEMA_VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+    data['schema_version'] = version
+    return data
+
+
+def project_format(filename):
+    """'json', 'json.gz' o 'rmp' según la extensión"""
+    name = filename.lower()
+    if name.endswith('.rmp'):
+        return 'rmp'
+    if name.endswith('.json.gz'):
+        return 'json.gz'
+    return 'json'
+
+
+def project_stem(filename):
+    """Ruta del proyecto sin su extensión (también las dobles, como .json.gz)"""
+    name = filename.lower()
+    for ext in PROJECT_EXTENSIONS:
+        if name.endswith(ext):
+            return filename[:-len(ext)]
+    return os.path.splitext(filename)[0]
+
+
+def photos_dir_for(project_filename):
+    """Directorio de fotos asociado a un archivo de proyecto"""
+    return project_stem(project_filename) + '_photos'
+
+
+def _open_text(filename, mode, fmt=None):
+    if (fmt or project_format(filename)) == 'json':
+        return open(filename, mode, encoding='utf-8')
+    return gzip.open(filename, mode + 't', encoding='utf-8', compresslevel=GZIP_LEVEL)
+
+
+def iter_records(filename):
+    """Recorrer el proyecto sin construir el documento completo.
+
+    Produce primero ('header', {...}) con machine_data, photos y
+    schema_version, y luego ('risks', dict) y ('hrn_calculations', dict) por
+    registro. Los .rmp de la versión actual se leen línea a línea; el resto
+    se carga y se migra antes de recorrerlo.
+    """
+    if project_format(filename) == 'rmp':
+        with _open_text(filename, 'r') as f:
+            header = json.loads(f.readline())
+            if header.get('schema_version') == SCHEMA_VERSION:
+                yield 'header', header
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        yield RECORD_KINDS[item.pop('type')], item
+                return
+            data = header
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    data.setdefault(RECORD_KINDS[item['type']], []).append(item)
+                    item.pop('type')
+    else:
+        with _open_text(filename, 'r') as f:
+            data = json.load(f)
+
+    data = migrate(data)
+    risks = data.pop('risks', None) or []
+    hrn_calculations = data.pop('hrn_calculations', None) or []
+    yield 'header', data
+    for item in risks:
+        yield 'risks', item
+    for item in hrn_calculations:
+        yield 'hrn_calculations', item
+
+
+def new_project():
+    """Proyecto vacío con la misma forma que devuelve read_project"""
+    return {'machine_data': {}, 'risks': RiskStore(), 'photos': [], 'hrn_calculations': HrnStore()}
+
+
+def read_project(filename, progress=None, cancel_event=None):
+    """Leer un proyecto y devolver (project_data, photo_store).
+
+    Los riesgos y cálculos HRN se cargan en RiskStore/HrnStore. Las fotos
+    antiguas embebidas en base64 se decodifican a un almacén temporal (no se
+    escribe nada junto al archivo) que el llamador libera con store.close()
+    o usando el almacén en un `with`; en memoria solo quedan referencias por
+    hash. Los registros con valores no válidos se omiten y sus mensajes
+    quedan en project_data['skipped']. `progress` y `cancel_event`
+    funcionan como en core.report.build_report.
+    """
+    with operation("Leer proyecto"):
+        report_progress(progress, 0, "Leyendo proyecto")
+        count("bytes leídos", os.path.getsize(filename))
+        with span("leer registros"):
+            records = iter_records(filename)
+            _, header = next(records)
+
+            risks, hrn_calculations, skipped = [], [], []
+            for i, (kind, item) in enumerate(records, 1):
+                # Un registro con valores fuera de las tablas (archivo antiguo o
+                # editado a mano) se omite y se informa; el resto se carga
+                try:
+                    if kind == 'risks':
+                        risks.append(Risk.from_dict(item))
+                    else:
+                        hrn_calculations.append(HrnCalculation.from_dict(item))
+                except ValueError as e:
+                    skipped.append(str(e))
+                if i % CHECK_EVERY == 0:
+                    check_cancelled(cancel_event)
+                    report_progress(progress, 10, f"Leyendo registros ({i})")
+        count("riesgos leídos", len(risks))
+        count("cálculos HRN leídos", len(hrn_calculations))
+        if skipped:
+            count("registros omitidos", len(skipped))
+
+        report_progress(progress, 80, "Cargando fotos")
+        store = PhotoStore(photos_dir_for(filename))
+        photos = header.get('photos', [])
+        if any('data' in photo for photo in photos):
+            # Fotos antiguas en base64: se decodifican a un almacén temporal.
+            # Leer no escribe junto al proyecto (puede ser de solo lectura);
+            # el directorio de fotos se crea al guardar (write_project)
+            sidecar, store = store, TemporaryPhotoStore()
+            with span("migrar fotos"):
+                migrated = []
+                for photo in photos:
+                    check_cancelled(cancel_event)
+                    if 'data' not in photo and sidecar.has(photo['sha256']):
+                        store.import_from(sidecar, photo['sha256'])
+                    migrated.append(migrate_inline_photo(photo, store))
+                photos = migrated
+        count("fotos leídas", len(photos))
+
+    project = {
+        'machine_data': header.get('machine_data', {}) or {},
+        'risks': RiskStore(risks),
+        'photos': photos,
+        'hrn_calculations': HrnStore(hrn_calculations),
+        'skipped': skipped
+    }
+    return project, store
+
+
+def write_project(filename, project, store, progress=None, cancel_event=None, prune=True):
+    """Guardar el proyecto y sus fotos en el directorio asociado.
+
+    El archivo se escribe en uno temporal y se reemplaza al final, así un
+    fallo o una cancelación a medio guardar no deja el proyecto truncado.
+    Con prune=False no se borran fotos sin referencia (el autoguardado corre
+    mientras se siguen añadiendo fotos). Devuelve el almacén de fotos del
+    archivo guardado.
+    """
+    with operation("Guardar proyecto"):
+        report_progress(progress, 0, "Guardando fotos")
+        target = PhotoStore(photos_dir_for(filename))
+        photos = []
+        with span("guardar fotos"):
+            for photo in project['photos']:
+                check_cancelled(cancel_event)
+                photo = migrate_inline_photo(photo, target)
+                target.import_from(store, photo['sha256'])
+                photos.append(photo)
+
+        # Limpiar machine_data de cualquier clave de fotos para evitar duplicados
+        machine_data_clean = dict(project['machine_data'])
+        for k in ('photos', 'machine_photos', 'images'):
+            machine_data_clean.pop(k, None)
+
+        header = {
+            'schema_version': SCHEMA_VERSION,
+            'machine_data': machine_data_clean,
+            'photos': photos
+        }
+
+        report_progress(progress, 30, "Guardando registros")
+        fmt = project_format(filename)
+        # Temporal único por hilo: el autoguardado y un guardado explícito pueden coincidir
+        tmp_path = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with span("escribir registros"):
+            try:
+                with _open_text(tmp_path, 'w', fmt) as f:
+                    if fmt == 'rmp':
+                        f.write(json.dumps(header, ensure_ascii=False) + '\n')
+                        for kind, key in RECORD_KINDS.items():
+                            for i, record in enumerate(project[key], 1):
+                                item = record.to_dict()
+                                item['type'] = kind
+                                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+                                if i % CHECK_EVERY == 0:
+                                    check_cancelled(cancel_event)
+                    else:
+                        project_data = dict(header)
+                        project_data['risks'] = project['risks'].to_dicts()
+                        check_cancelled(cancel_event)
+                        project_data['hrn_calculations'] = project['hrn_calculations'].to_dicts()
+                        check_cancelled(cancel_event)
+                        if fmt == 'json':
+                            json.dump(project_data, f, indent=4, ensure_ascii=False)
+                        else:
+                            f.write(json.dumps(project_data, ensure_ascii=False, separators=(',', ':')))
+                check_cancelled(cancel_event)
+                os.replace(tmp_path, filename)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        count("bytes escritos", os.path.getsize(filename))
+
+        # Solo tras reemplazar el archivo: el anterior aún podía referenciarlas.
+        # Un almacén con otro dueño (p. ej. el de una base de datos) no se toca
+        if prune and target.owned_by(filename):
+            target.prune({photo['sha256'] for photo in photos})
+    report_progress(progress, 100, "Proyecto guardado")
+    return target
@@ -0,0 +1,326 @@
+import io
+import os
+from xml.sax.saxutils import escape
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+
+from core.card import iter_cards
+from core.charts import HRN_CHART_MAX_BARS, REPORT_DPI, render_analysis_png
+from core.images import PHOTO_BOX, ImagePreparer
+from core.photo_store import PhotoStore
+from core.profiling import count, operation, span
+from core.progress import OperationCancelled, check_cancelled, report_progress
+from core.story import LazyStory
+
+# Filas por tabla en la tabla HRN: tablas cortas se maquetan sin partirlas
+# y no obligan a tener todas las filas en memoria
+HRN_TABLE_CHUNK = 40
+
+
+class _ReportDocTemplate(SimpleDocTemplate):
+    """Plantilla que informa el avance de maquetación y atiende la cancelación.
+
+    `expected` es el número estimado de flowables del reporte; con una
+    LazyStory el avance es la fracción ya generada.
+    """
+
+    def __init__(self, filename, progress=None, cancel_event=None, expected=1, **kw):
+        SimpleDocTemplate.__init__(self, filename, **kw)
+        self._progress = progress
+        self._cancel_event = cancel_event
+        self._expected = max(expected, 1)
+        self._story = None
+        self._handled = 0
+
+    def build(self, flowables, **kw):
+        self._story = flowables
+        self._handled = 0
+        SimpleDocTemplate.build(self, flowables, **kw)
+
+    def afterFlowable(self, flowable):
+        check_cancelled(self._cancel_event)
+        self._handled += 1
+        if self._handled % 20 == 0:
+            # Los trozos de un flowable partido pasan otra vez por aquí: se
+            # cuenta lo generado por la story, no lo maquetado
+            done = min(getattr(self._story, 'produced', self._handled) / self._expected, 1.0)
+            report_progress(self._progress, done * 100, getattr(self._story, 'label', None) or
+                            "Generando documento")
+
+
+def _build_styles():
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        textColor=colors.HexColor('#003366'),
+        spaceAfter=20,
+        alignment=TA_CENTER
+    )
+
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#003366'),
+        spaceAfter=12,
+        spaceBefore=12
+    )
+    return styles, title_style, heading_style
+
+
+class ReportContext:
+    """Estilos y opciones compartidos por las secciones del reporte"""
+
+    def __init__(self, cancel_event=None, image_preparer=None, max_bars=HRN_CHART_MAX_BARS):
+        self.styles, self.title_style, self.heading_style = _build_styles()
+        self.cancel_event = cancel_event
+        # Un preparador propio se cierra con el contexto; uno recibido lo cierra quien lo creó
+        self._owns_preparer = image_preparer is None
+        self.image_preparer = image_preparer or ImagePreparer()
+        self.max_bars = max_bars
+
+    def close(self):
+        if self._owns_preparer:
+            self.image_preparer.close()
+
+
+def machine_section(project, ctx):
+    """Título y datos de la máquina"""
+    machine_data = project['machine_data']
+    styles, heading_style = ctx.styles, ctx.heading_style
+
+    # Título
+    yield Paragraph("Análisis de Riesgo según ISO 13849-1", ctx.title_style)
+    yield Spacer(1, 0.3*inch)
+
+    # Datos de la máquina
+    yield Paragraph("DATOS DE LA MÁQUINA", heading_style)
+
+    machine_table_data = [
+        ['Campo', 'Valor'],
+        ['Tipo de Máquina', machine_data.get('machine_type', '')],
+        ['Modelo', machine_data.get('model', '')],
+        ['Fabricante', machine_data.get('manufacturer', '')],
+        ['Número de Serie', machine_data.get('serial_number', '')],
+        ['Año', machine_data.get('year', '')],
+        ['Ubicación', machine_data.get('location', '')],
+        ['Analista', machine_data.get('analyst', '')],
+        ['Fecha de Análisis', machine_data.get('date', '')],
+    ]
+    machine_table = Table(machine_table_data, colWidths=[2*inch, 4*inch])
+    machine_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003366')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    yield machine_table
+    yield Spacer(1, 0.3*inch)
+
+    if machine_data.get('description'):
+        yield Paragraph("Descripción:", styles['Heading3'])
+        yield Paragraph(machine_data['description'], styles['Normal'])
+        yield Spacer(1, 0.2*inch)
+
+    yield PageBreak()
+
+
+def risks_section(project, ctx):
+    """Tarjetas de evaluación de riesgos, generadas a medida que se maquetan"""
+    yield Paragraph("EVALUACIÓN DE RIESGOS", ctx.heading_style)
+    yield from iter_cards(project['risks'], spacing=0.2*inch,
+                          cancel_check=lambda: check_cancelled(ctx.cancel_event))
+
+
+HRN_COL_WIDTHS = [0.3*inch, 2*inch, 0.5*inch, 0.5*inch, 0.5*inch, 0.5*inch, 0.7*inch, 1.5*inch]
+HRN_BODY_STYLE = [
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+]
+HRN_HEADER_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003366')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+]
+
+
+def chunked_tables(header, rows, col_widths, body_style, header_style, chunk=HRN_TABLE_CHUNK):
+    """Tabla en tramos de `chunk` filas; la cabecera va en el primero.
+
+    Los tramos tienen los mismos anchos y bordes, así que se ven como una
+    sola tabla, pero cada uno se construye justo antes de maquetarse.
+    `rows` puede ser un generador.
+    """
+    first_style = TableStyle(body_style + header_style)
+    body_style = TableStyle(body_style)
+    data = [header]
+    style = first_style
+    for row in rows:
+        data.append(row)
+        if len(data) == chunk:
+            yield Table(data, colWidths=col_widths, style=style)
+            data, style = [], body_style
+    if data:
+        yield Table(data, colWidths=col_widths, style=style)
+
+
+def hrn_table_chunks(hrn_calculations, normal_style, chunk=HRN_TABLE_CHUNK):
+    """Tabla HRN en tramos de `chunk` filas"""
+    header = ['#', 'Descripción', 'LO', 'FE', 'DPH', 'NP', 'HRN', 'Nivel']
+    rows = ([
+        str(i),
+        Paragraph(calc.description, normal_style),
+        str(calc.lo),
+        str(calc.fe),
+        str(calc.dph),
+        str(calc.np),
+        f"{calc.hrn:.2f}",
+        calc.level
+    ] for i, calc in enumerate(hrn_calculations, 1))
+    return chunked_tables(header, rows, HRN_COL_WIDTHS, HRN_BODY_STYLE, HRN_HEADER_STYLE, chunk)
+
+
+def hrn_section(project, ctx):
+    """Tabla y detalle de cálculos HRN si existen"""
+    hrn_calculations = project['hrn_calculations']
+    if not hrn_calculations:
+        return
+
+    styles, heading_style = ctx.styles, ctx.heading_style
+    normal_style = styles['Normal']
+    yield PageBreak()
+    yield Paragraph("CÁLCULOS HRN (HAZARD RATING NUMBER)", heading_style)
+    yield from hrn_table_chunks(hrn_calculations, normal_style)
+    yield Spacer(1, 0.3*inch)
+
+    # Detalle de cálculos HRN
+    yield Paragraph("Detalle de Cálculos HRN:", styles['Heading3'])
+    for i, calc in enumerate(hrn_calculations, 1):
+        check_cancelled(ctx.cancel_event)
+        yield Paragraph(f"<b>{i}. {calc.description}</b>", normal_style)
+        yield Paragraph(f"LO ({calc.lo}): {calc.lo_desc}", normal_style)
+        yield Paragraph(f"FE ({calc.fe}): {calc.fe_desc}", normal_style)
+        yield Paragraph(f"DPH ({calc.dph}): {calc.dph_desc}", normal_style)
+        yield Paragraph(f"NP ({calc.np}): {calc.np_desc}", normal_style)
+        yield Paragraph(f"<b>HRN = {calc.hrn:.2f} → {calc.level}</b>", normal_style)
+        yield Spacer(1, 0.15*inch)
+
+
+def charts_section(project, ctx):
+    """Gráficos de análisis renderizados fuera de pantalla"""
+    if not project['risks']:
+        return
+
+    png = render_analysis_png(project['risks'], project['hrn_calculations'], dpi=REPORT_DPI,
+                              stats=project.get('stats'), max_bars=ctx.max_bars)
+
+    yield PageBreak()
+    yield Paragraph("ANÁLISIS GRÁFICO", ctx.heading_style)
+    yield Image(io.BytesIO(png), width=7*inch, height=3.5*inch)
+
+
+def photos_section(project, ctx):
+    """Fotos de la máquina, máximo 2 por página"""
+    machine_photos = project['photos']
+    if not machine_photos:
+        return
+    styles = ctx.styles
+
+    yield PageBreak()
+    yield Paragraph("FOTOGRAFÍAS DE LA MÁQUINA", ctx.heading_style)
+    yield Spacer(1, 0.2*inch)
+
+    # Fotos remuestreadas y recomprimidas (en paralelo y con caché). Son
+    # JPEG en disco: ReportLab solo lee su tamaño al crear el Image y copia
+    # el archivo al PDF al dibujarlo, así que no se decodifican
+    prepared = ctx.image_preparer.prepare(machine_photos, PhotoStore(project.get('photo_dir')),
+                                          ctx.cancel_event)
+
+    for i, (photo, (path, error)) in enumerate(zip(machine_photos, prepared)):
+        if path is None:
+            yield Paragraph(f"<i>Error al cargar imagen: {escape(photo['filename'])} ({escape(error)})</i>",
+                            styles['Normal'])
+            yield Spacer(1, 0.2*inch)
+            continue
+
+        yield Image(path, width=PHOTO_BOX[0]*inch, height=PHOTO_BOX[1]*inch, kind='proportional')
+        yield Paragraph(f"<i>Figura {i+1}: {photo['filename']}</i>", styles['Normal'])
+        yield Spacer(1, 0.3*inch)
+
+        # Nueva página cada 2 fotos
+        if (i + 1) % 2 == 0 and i < len(machine_photos) - 1:
+            yield PageBreak()
+
+
+# (etiqueta, generador de flowables, estimación de flowables para el avance)
+REPORT_SECTIONS = [
+    ("Datos de la máquina", machine_section, lambda project: 12),
+    ("Evaluación de riesgos", risks_section, lambda project: 2 * len(project['risks']) + 1),
+    ("Cálculos HRN", hrn_section,
+     lambda project: 7 * len(project['hrn_calculations']) + len(project['hrn_calculations']) // HRN_TABLE_CHUNK + 5),
+    ("Análisis gráfico", charts_section, lambda project: 3),
+    ("Fotografías", photos_section, lambda project: 4 * len(project['photos']) + 3),
+]
+
+
+def build_report(filename, project, progress=None, cancel_event=None, image_preparer=None,
+                 max_bars=HRN_CHART_MAX_BARS):
+    """Generar el reporte PDF a partir de una instantánea del proyecto.
+
+    `project` contiene machine_data, risks (RiskStore), hrn_calculations
+    (HrnStore), photos y photo_dir (directorio del almacén de fotos).
+    `progress(porcentaje, etiqueta)` se invoca
+    por sección y `cancel_event` (threading.Event) permite abortar; en ese
+    caso se elimina el archivo parcial y se lanza OperationCancelled.
+    `image_preparer` (ImagePreparer) fija el dpi y la calidad JPEG de las fotos
+    y `max_bars` el máximo de barras del gráfico de valores HRN.
+
+    Los flowables se generan sección a sección mientras se maquetan
+    (LazyStory), así la memoria no crece con el número de riesgos, cálculos
+    HRN o fotos.
+    """
+    expected = sum(estimate(project) for _, _, estimate in REPORT_SECTIONS)
+    doc = _ReportDocTemplate(filename, progress=progress, cancel_event=cancel_event,
+                             expected=expected, pagesize=letter)
+    doc.topMargin = 0.75 * inch
+    doc.bottomMargin = 0.5 * inch
+    doc.leftMargin = 0.75 * inch
+    doc.rightMargin = 0.75 * inch
+
+    with operation("Generar PDF"):
+        ctx = ReportContext(cancel_event, image_preparer, max_bars)
+        count("riesgos", len(project['risks']))
+        count("cálculos HRN", len(project['hrn_calculations']))
+        count("fotos", len(project['photos']))
+        story = LazyStory((label, lambda make=make: make(project, ctx))
+                          for label, make, _ in REPORT_SECTIONS)
+        report_progress(progress, 0, REPORT_SECTIONS[0][0])
+        try:
+            with span("doc.build"):
+                doc.build(story)
+        except OperationCancelled:
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+        finally:
+            ctx.close()
+        count("flowables", story.produced)
+        count("bytes escritos", os.path.getsize(filename))
+
+    report_progress(progress, 100, "Completado")
+    return filename
@@ -0,0 +1,271 @@
+"""Repositorio SQLite con muchos proyectos.
+
+Es opcional: los archivos de proyecto siguen siendo el formato principal.
+El esquema refleja machine_data, riesgos, cálculos HRN y referencias de
+fotos, con índices para consultar entre proyectos (ubicación, analista,
+tipo de máquina, PLr y nivel HRN) sin abrir cada archivo. Las fotos se
+guardan una sola vez en el directorio `<base>.photos` junto a la base
+(p. ej. planta.db.photos), compartido por todos los proyectos. El sufijo no
+puede coincidir con el `<proyecto>_photos` de un archivo de proyecto, que
+al guardarse limpia su directorio de fotos.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from core.model import Risk, HrnCalculation, RiskStore, HrnStore
+from core.photo_store import PhotoStore, migrate_inline_photo
+from core.progress import check_cancelled, report_progress
+from core.project import project_stem, read_project, write_project
+
+DB_EXTENSIONS = ('.db', '.sqlite')
+DB_PHOTOS_SUFFIX = '.photos'
+
+# Claves de machine_data con columna propia; el resto va en `extra` (JSON)
+MACHINE_COLUMNS = ('machine_type', 'model', 'manufacturer', 'serial_number', 'year',
+                   'location', 'analyst', 'date', 'description')
+RISK_COLUMNS = ('id', 'description', 'zone', 'severity', 'frequency', 'avoidance', 'plr',
+                'control_measures')
+HRN_COLUMNS = ('id', 'description', 'hrn', 'level', 'lo', 'fe', 'dph', 'np', 'timestamp')
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    {', '.join(f'{column} TEXT' for column in MACHINE_COLUMNS)},
+    extra TEXT NOT NULL DEFAULT '{{}}',
+    updated TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS risks (
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    description TEXT NOT NULL,
+    zone TEXT,
+    severity TEXT NOT NULL,
+    frequency TEXT NOT NULL,
+    avoidance TEXT NOT NULL,
+    plr TEXT NOT NULL,
+    control_measures TEXT,
+    PRIMARY KEY (project_id, id)
+);
+CREATE TABLE IF NOT EXISTS hrn_calculations (
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    description TEXT NOT NULL,
+    hrn REAL NOT NULL,
+    level TEXT NOT NULL,
+    lo REAL NOT NULL,
+    fe REAL NOT NULL,
+    dph REAL NOT NULL,
+    np REAL NOT NULL,
+    timestamp TEXT,
+    PRIMARY KEY (project_id, id)
+);
+CREATE TABLE IF NOT EXISTS photos (
+    project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    filename TEXT,
+    extra TEXT NOT NULL DEFAULT '{{}}',
+    PRIMARY KEY (project_id, position)
+);
+CREATE INDEX IF NOT EXISTS projects_location ON projects(location);
+CREATE INDEX IF NOT EXISTS projects_analyst ON projects(analyst);
+CREATE INDEX IF NOT EXISTS projects_machine_type ON projects(machine_type);
+CREATE INDEX IF NOT EXISTS risks_plr ON risks(plr, project_id);
+CREATE INDEX IF NOT EXISTS hrn_level ON hrn_calculations(level, project_id);
+CREATE INDEX IF NOT EXISTS hrn_value ON hrn_calculations(hrn);
+CREATE INDEX IF NOT EXISTS photos_sha256 ON photos(sha256);
+"""
+
+
+def project_name(filename):
+    """Nombre por defecto de un proyecto importado: el archivo sin extensión"""
+    return os.path.basename(project_stem(filename))
+
+
+class ProjectRepository:
+    """Base SQLite con muchos proyectos, identificados por nombre"""
+
+    def __init__(self, path):
+        self.path = path
+        self.photo_store = PhotoStore(path + DB_PHOTOS_SUFFIX)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _project_id(self, name):
+        row = self.conn.execute("SELECT id FROM projects WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(f"No existe el proyecto '{name}' en {self.path}")
+        return row['id']
+
+    def save(self, name, project, store, progress=None, cancel_event=None):
+        """Guardar (o reemplazar) un proyecto con la forma de read_project"""
+        report_progress(progress, 0, "Guardando fotos")
+        photos = []
+        for photo in project['photos']:
+            check_cancelled(cancel_event)
+            photo = migrate_inline_photo(photo, self.photo_store)
+            self.photo_store.import_from(store, photo['sha256'])
+            photos.append(photo)
+
+        machine_data = {k: v for k, v in project['machine_data'].items()
+                        if k not in ('photos', 'machine_photos', 'images')}
+        extra = {k: v for k, v in machine_data.items() if k not in MACHINE_COLUMNS}
+        values = [machine_data.get(column) for column in MACHINE_COLUMNS]
+        updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        report_progress(progress, 30, "Guardando registros")
+        # Una sola transacción: o se guarda el proyecto completo o nada
+        self.photo_store.claim(self.path)
+        with self.conn:
+            self.conn.execute(
+                f"INSERT INTO projects (name, {', '.join(MACHINE_COLUMNS)}, extra, updated) "
+                f"VALUES (?, {', '.join('?' * len(MACHINE_COLUMNS))}, ?, ?) "
+                f"ON CONFLICT(name) DO UPDATE SET "
+                f"{', '.join(f'{c} = excluded.{c}' for c in MACHINE_COLUMNS)}, "
+                f"extra = excluded.extra, updated = excluded.updated",
+                [name, *values, json.dumps(extra, ensure_ascii=False), updated])
+            project_id = self._project_id(name)
+            for table in ('risks', 'hrn_calculations', 'photos'):
+                self.conn.execute(f"DELETE FROM {table} WHERE project_id = ?", (project_id,))
+
+            self.conn.executemany(
+                f"INSERT INTO risks VALUES ({', '.join('?' * (len(RISK_COLUMNS) + 2))})",
+                ((project_id, i, risk.id, risk.description, risk.zone, risk.severity_code,
+                  risk.frequency_code, risk.avoidance_code, risk.plr, risk.control_measures)
+                 for i, risk in enumerate(project['risks'])))
+            check_cancelled(cancel_event)
+            self.conn.executemany(
+                f"INSERT INTO hrn_calculations VALUES ({', '.join('?' * (len(HRN_COLUMNS) + 2))})",
+                ((project_id, i, calc.id, calc.description, calc.hrn, calc.level,
+                  calc.lo, calc.fe, calc.dph, calc.np, calc.timestamp)
+                 for i, calc in enumerate(project['hrn_calculations'])))
+            check_cancelled(cancel_event)
+            self.conn.executemany(
+                "INSERT INTO photos VALUES (?, ?, ?, ?, ?)",
+                ((project_id, i, photo['sha256'], photo.get('filename'),
+                  json.dumps({k: v for k, v in photo.items() if k not in ('sha256', 'filename')},
+                             ensure_ascii=False))
+                 for i, photo in enumerate(photos)))
+        report_progress(progress, 100, "Proyecto guardado")
+        return project_id
+
+    def load(self, name, progress=None, cancel_event=None):
+        """Leer un proyecto y devolver (project_data, photo_store) como read_project"""
+        report_progress(progress, 0, "Leyendo proyecto")
+        project_id = self._project_id(name)
+        row = self.conn.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+        machine_data = json.loads(row['extra'])
+        machine_data.update((column, row[column]) for column in MACHINE_COLUMNS
+                            if row[column] is not None)
+
+        risks = RiskStore(
+            Risk.from_dict(dict(item))
+            for item in self.conn.execute(
+                f"SELECT {', '.join(RISK_COLUMNS)} FROM risks WHERE project_id = ? ORDER BY position",
+                (project_id,)))
+        check_cancelled(cancel_event)
+        report_progress(progress, 50, "Leyendo cálculos HRN")
+        hrn_calculations = HrnStore(
+            HrnCalculation.from_dict(dict(item))
+            for item in self.conn.execute(
+                f"SELECT {', '.join(HRN_COLUMNS)} FROM hrn_calculations WHERE project_id = ? "
+                f"ORDER BY position", (project_id,)))
+        check_cancelled(cancel_event)
+
+        photos = []
+        for item in self.conn.execute("SELECT sha256, filename, extra FROM photos "
+                                      "WHERE project_id = ? ORDER BY position", (project_id,)):
+            photo = {'filename': item['filename'], 'sha256': item['sha256']}
+            photo.update(json.loads(item['extra']))
+            photos.append(photo)
+
+        project = {'machine_data': machine_data, 'risks': risks, 'photos': photos,
+                   'hrn_calculations': hrn_calculations}
+        return project, self.photo_store
+
+    def delete(self, name):
+        with self.conn:
+            self.conn.execute("DELETE FROM projects WHERE id = ?", (self._project_id(name),))
+
+    def import_file(self, filename, name=None):
+        """Importar un archivo de proyecto (.json, .json.gz o .rmp).
+
+        Devuelve (nombre, mensajes de los registros omitidos por no ser válidos).
+        """
+        name = name or project_name(filename)
+        project, store = read_project(filename)
+        with store:
+            self.save(name, project, store)
+        return name, project['skipped']
+
+    def export_file(self, name, filename):
+        """Escribir un proyecto de la base en un archivo de proyecto"""
+        project, store = self.load(name)
+        write_project(filename, project, store)
+
+    def projects(self, location=None, analyst=None, machine_type=None, plr=None,
+                 hrn_level=None, min_hrn=None):
+        """Resumen de los proyectos que cumplen todos los filtros indicados.
+
+        `plr`, `hrn_level` y `min_hrn` seleccionan proyectos con al menos un
+        riesgo o cálculo HRN que cumpla la condición (HRN mayor que `min_hrn`).
+        """
+        where, params = [], []
+        for column, value in (('location', location), ('analyst', analyst),
+                              ('machine_type', machine_type)):
+            if value is not None:
+                where.append(f"p.{column} = ?")
+                params.append(value)
+        if plr is not None:
+            where.append("EXISTS (SELECT 1 FROM risks r WHERE r.plr = ? AND r.project_id = p.id)")
+            params.append(plr.upper())
+        if hrn_level is not None:
+            where.append("EXISTS (SELECT 1 FROM hrn_calculations h "
+                         "WHERE h.level = ? AND h.project_id = p.id)")
+            params.append(hrn_level)
+        if min_hrn is not None:
+            where.append("EXISTS (SELECT 1 FROM hrn_calculations h "
+                         "WHERE h.hrn > ? AND h.project_id = p.id)")
+            params.append(min_hrn)
+
+        query = ("SELECT p.name, p.machine_type, p.location, p.analyst, p.updated, "
+                 "(SELECT COUNT(*) FROM risks r WHERE r.project_id = p.id) AS risks, "
+                 "(SELECT COUNT(*) FROM hrn_calculations h WHERE h.project_id = p.id) AS hrn_calculations, "
+                 "(SELECT MAX(h.hrn) FROM hrn_calculations h WHERE h.project_id = p.id) AS max_hrn "
+                 "FROM projects p")
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        return [dict(row) for row in self.conn.execute(query + " ORDER BY p.name", params)]
+
+    def hrn_calculations(self, min_hrn=None, hrn_level=None, location=None, analyst=None,
+                         machine_type=None):
+        """Cálculos HRN de todos los proyectos que cumplen los filtros (HRN mayor que
+        `min_hrn`), de mayor a menor"""
+        where, params = [], []
+        for column, value in (('h.hrn > ?', min_hrn), ('h.level = ?', hrn_level),
+                              ('p.location = ?', location), ('p.analyst = ?', analyst),
+                              ('p.machine_type = ?', machine_type)):
+            if value is not None:
+                where.append(column)
+                params.append(value)
+        query = ("SELECT p.name AS project, h.id, h.description, h.hrn, h.level, h.timestamp "
+                 "FROM hrn_calculations h JOIN projects p ON p.id = h.project_id")
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        return [dict(row) for row in self.conn.execute(query + " ORDER BY h.hrn DESC", params)]
@@ -0,0 +1,157 @@
+"""Motor de evaluación de riesgos sin dependencias de la interfaz.
+
+Contiene como datos la matriz de decisión S/F/P de ISO 13849-1 y las
+tablas de factores del método HRN (LO, FE, DPH, NP), junto con la única
+función de clasificación de niveles HRN que usan la interfaz, los reportes
+y las herramientas por lotes.
+"""
+from bisect import bisect_left
+from typing import NamedTuple
+
+# ISO 13849-1: parámetros del gráfico de riesgo (código, descripción)
+SEVERITY_OPTIONS = [
+    ('S1', 'Lesión leve'),
+    ('S2', 'Lesión grave/permanente o muerte'),
+]
+FREQUENCY_OPTIONS = [
+    ('F1', 'Rara vez a frecuente'),
+    ('F2', 'Frecuente a continua'),
+]
+AVOIDANCE_OPTIONS = [
+    ('P1', 'Posible bajo condiciones específicas'),
+    ('P2', 'Apenas posible'),
+]
+
+# Matriz de decisión ISO 13849-1
+# [S][F][P]
+PLR_MATRIX = {
+    (0, 0, 0): 'a',  # S1, F1, P1
+    (0, 0, 1): 'b',  # S1, F1, P2
+    (0, 1, 0): 'b',  # S1, F2, P1
+    (0, 1, 1): 'c',  # S1, F2, P2
+    (1, 0, 0): 'c',  # S2, F1, P1
+    (1, 0, 1): 'd',  # S2, F1, P2
+    (1, 1, 0): 'd',  # S2, F2, P1
+    (1, 1, 1): 'e',  # S2, F2, P2
+}
+
+# Método HRN: tablas de factores (valor, descripción)
+LO_VALUES = [
+    (0.033, "Casi Imposible"),
+    (1, "Altamente improbable"),
+    (1.5, "Improbable"),
+    (2, "Posible"),
+    (5, "Hay Posibilidades"),
+    (8, "Probable"),
+    (10, "Muy Probable"),
+    (15, "Cierto")
+]
+FE_VALUES = [
+    (0.5, "Anualmente"),
+    (1, "Mensualmente"),
+    (1.5, "Semanalmente"),
+    (2.5, "Diariamente"),
+    (4, "Cada Hora"),
+    (5, "Constantemente")
+]
+DPH_VALUES = [
+    (0.1, "Rasguño/Moretón"),
+    (0.5, "Quemadura/Enfermedad de corto plazo"),
+    (1, "Rotura - Hueso menor o Enfermedad menor (temporal)"),
+    (2, "Rotura - Hueso mayor o Enfermedad menor (permanente)"),
+    (4, "Pérdida de 1 miembro o Enfermedad grave (permanente)"),
+    (8, "Pérdida de 2 miembros o Enfermedad grave (permanente)"),
+    (15, "Fatalidad")
+]
+NP_VALUES = [
+    (1, "1-2 personas"),
+    (2, "3-7 personas"),
+    (4, "8-15 personas"),
+    (8, "16-50 personas"),
+    (12, "Más de 50 personas")
+]
+
+
+class HrnLevel(NamedTuple):
+    name: str
+    color: str
+    upper_bound: float  # HRN máximo (inclusive) del nivel
+
+
+# Niveles HRN ordenados de menor a mayor riesgo
+HRN_LEVELS = [
+    HrnLevel("Riesgo Despreciable", '#90EE90', 1),
+    HrnLevel("Riesgo Muy Bajo", '#98FB98', 5),
+    HrnLevel("Riesgo Bajo", '#FFFF99', 10),
+    HrnLevel("Riesgo Significante", '#FFD700', 50),
+    HrnLevel("Riesgo Alto", '#FFA500', 100),
+    HrnLevel("Riesgo Muy Alto", '#FF6347', 500),
+    HrnLevel("Riesgo Extremo", '#DC143C', 1000),
+    HrnLevel("Riesgo Inaceptable", '#8B0000', float('inf')),
+]
+HRN_THRESHOLDS = [level.upper_bound for level in HRN_LEVELS[:-1]]
+HRN_LEVEL_NAMES = [level.name for level in HRN_LEVELS]
+
+
+class HrnScore(NamedTuple):
+    hrn: float
+    level: str
+    color: str
+    lo: float
+    lo_desc: str
+    fe: float
+    fe_desc: str
+    dph: float
+    dph_desc: str
+    np: float
+    np_desc: str
+
+
+def option_label(code, description):
+    """Texto mostrado en los combos, p. ej. 'S1 - Lesión leve'"""
+    return f"{code} - {description}"
+
+
+def option_code(label):
+    """Código de una opción a partir de su texto ('S1 - Lesión leve' -> 'S1')"""
+    return label.split('-')[0].strip()
+
+
+def calculate_plr(s: int, f: int, p: int) -> str:
+    """PLr ('a'..'e') para los índices S, F y P (0 = S1/F1/P1, 1 = S2/F2/P2)"""
+    return PLR_MATRIX[(s, f, p)]
+
+
+def calculate_hrn(lo: float, fe: float, dph: float, np: float) -> float:
+    """HRN = LO × FE × DPH × NP"""
+    return lo * fe * dph * np
+
+
+def classify_hrn(hrn: float) -> HrnLevel:
+    """Nivel de riesgo correspondiente a un valor HRN"""
+    return HRN_LEVELS[bisect_left(HRN_THRESHOLDS, hrn)]
+
+
+def score_hrn(lo_idx: int, fe_idx: int, dph_idx: int, np_idx: int) -> HrnScore:
+    """Calcular y clasificar el HRN a partir de los índices en las tablas de factores"""
+    lo, lo_desc = LO_VALUES[lo_idx]
+    fe, fe_desc = FE_VALUES[fe_idx]
+    dph, dph_desc = DPH_VALUES[dph_idx]
+    np, np_desc = NP_VALUES[np_idx]
+    hrn = calculate_hrn(lo, fe, dph, np)
+    level = classify_hrn(hrn)
+    return HrnScore(hrn, level.name, level.color, float(lo), lo_desc, float(fe), fe_desc,
+                    float(dph), dph_desc, float(np), np_desc)
+
+
+def hrn_reference_text():
+    """Tabla de rangos HRN por nivel para mostrar al usuario"""
+    lines = []
+    lower = 0
+    for level in HRN_LEVELS:
+        if level.upper_bound == float('inf'):
+            lines.append(f"{'>' + str(lower - 1):9}→ {level.name}")
+        else:
+            lines.append(f"{f'{lower}-{level.upper_bound}':9}→ {level.name}")
+            lower = level.upper_bound + 1
+    return '\n'.join(lines)
@@ -0,0 +1,186 @@
+from core.scoring import HRN_LEVEL_NAMES, SEVERITY_OPTIONS, classify_hrn
+
+PLR_LEVELS = ['A', 'B', 'C', 'D', 'E']
+
+
+class AnalysisStats:
+    """Estadísticas agregadas de riesgos y cálculos HRN.
+
+    Se actualizan de forma incremental al añadir o quitar registros, de modo
+    que los gráficos y el texto de estadísticas no recorren las listas. El
+    mínimo y el máximo HRN se mantienen con un conteo por valor: los valores
+    posibles son productos de las tablas de factores, así que el conteo está
+    acotado por el tamaño de las tablas y no por el número de cálculos.
+    """
+
+    def __init__(self):
+        self.plr_counts = {plr: 0 for plr in PLR_LEVELS}
+        self.severity_counts = {code: 0 for code, _ in SEVERITY_OPTIONS}
+        self.level_counts = {name: 0 for name in HRN_LEVEL_NAMES}
+        self.total_risks = 0
+        self.total_hrn = 0
+        self.hrn_sum = 0.0
+        self.hrn_min = None
+        self.hrn_max = None
+        self._hrn_values = {}
+
+    @classmethod
+    def from_records(cls, risks, hrn_calculations):
+        stats = cls()
+        for risk in risks:
+            stats.add_risk(risk)
+        for calc in hrn_calculations:
+            stats.add_hrn(calc)
+        return stats
+
+    def copy(self):
+        other = AnalysisStats()
+        other.merge(self)
+        return other
+
+    def merge(self, other):
+        """Acumular las estadísticas de otro proyecto"""
+        for key, count in other.plr_counts.items():
+            self.plr_counts[key] = self.plr_counts.get(key, 0) + count
+        for key, count in other.severity_counts.items():
+            self.severity_counts[key] = self.severity_counts.get(key, 0) + count
+        for key, count in other.level_counts.items():
+            self.level_counts[key] = self.level_counts.get(key, 0) + count
+        for value, count in other._hrn_values.items():
+            self._hrn_values[value] = self._hrn_values.get(value, 0) + count
+        self.total_risks += other.total_risks
+        self.total_hrn += other.total_hrn
+        self.hrn_sum += other.hrn_sum
+        self._refresh_bounds()
+
+    # --- Riesgos ISO 13849 ---
+
+    def add_risk(self, risk):
+        self.plr_counts[risk.plr] += 1
+        self.severity_counts[risk.severity_code] += 1
+        self.total_risks += 1
+
+    def remove_risk(self, risk):
+        self.plr_counts[risk.plr] -= 1
+        self.severity_counts[risk.severity_code] -= 1
+        self.total_risks -= 1
+
+    # --- Cálculos HRN ---
+
+    def add_hrn(self, calc):
+        hrn = calc.hrn
+        self.level_counts[classify_hrn(hrn).name] += 1
+        self.total_hrn += 1
+        self.hrn_sum += hrn
+        self._hrn_values[hrn] = self._hrn_values.get(hrn, 0) + 1
+        if self.hrn_min is None or hrn < self.hrn_min:
+            self.hrn_min = hrn
+        if self.hrn_max is None or hrn > self.hrn_max:
+            self.hrn_max = hrn
+
+    def remove_hrn(self, calc):
+        hrn = calc.hrn
+        self.level_counts[classify_hrn(hrn).name] -= 1
+        self.total_hrn -= 1
+        self.hrn_sum -= hrn
+        self._hrn_values[hrn] -= 1
+        if not self._hrn_values[hrn]:
+            del self._hrn_values[hrn]
+            if hrn == self.hrn_min or hrn == self.hrn_max:
+                self._refresh_bounds()
+        if not self.total_hrn:
+            self.hrn_sum = 0.0
+
+    def _refresh_bounds(self):
+        self.hrn_min = min(self._hrn_values) if self._hrn_values else None
+        self.hrn_max = max(self._hrn_values) if self._hrn_values else None
+
+    @property
+    def hrn_mean(self):
+        return self.hrn_sum / self.total_hrn if self.total_hrn else None
+
+    # --- Suscripción a RiskStore / HrnStore ---
+
+    def on_risks_changed(self, store, event, record, previous=None):
+        if event == 'add':
+            self.add_risk(record)
+        elif event == 'update':
+            self.remove_risk(previous)
+            self.add_risk(record)
+        elif event == 'remove':
+            self.remove_risk(record)
+        else:
+            self.plr_counts = {plr: 0 for plr in PLR_LEVELS}
+            self.severity_counts = {code: 0 for code, _ in SEVERITY_OPTIONS}
+            self.total_risks = 0
+            for risk in store:
+                self.add_risk(risk)
+
+    def on_hrn_changed(self, store, event, record, previous=None):
+        if event == 'add':
+            self.add_hrn(record)
+        elif event == 'update':
+            self.remove_hrn(previous)
+            self.add_hrn(record)
+        elif event == 'remove':
+            self.remove_hrn(record)
+        else:
+            self.level_counts = {name: 0 for name in HRN_LEVEL_NAMES}
+            self.total_hrn = 0
+            self.hrn_sum = 0.0
+            self.hrn_min = self.hrn_max = None
+            self._hrn_values = {}
+            for calc in store:
+                self.add_hrn(calc)
+
+    def attach(self, risks, hrn_calculations):
+        """Mantener las estadísticas al día con los cambios de los almacenes"""
+        risks.subscribe(self.on_risks_changed)
+        hrn_calculations.subscribe(self.on_hrn_changed)
+        self.on_risks_changed(risks, 'reset', None)
+        self.on_hrn_changed(hrn_calculations, 'reset', None)
+
+    # --- Presentación ---
+
+    def text(self):
+        """Texto de estadísticas (ISO 13849-1 y HRN en dos columnas)"""
+        iso_stats = ""
+        hrn_stats = ""
+
+        if self.total_risks:
+            iso_stats += f"=== ISO 13849-1 ===\n"
+            iso_stats += f"Total de Riesgos: {self.total_risks}\n"
+            iso_stats += "Distribución por PLr:\n"
+            for plr, count in self.plr_counts.items():
+                if count:
+                    percentage = (count / self.total_risks) * 100
+                    iso_stats += f"  PLr {plr}: {count} ({percentage:.1f}%)\n"
+
+        if self.total_hrn:
+            hrn_stats += f"=== Método HRN ===\n"
+            hrn_stats += f"Total de Cálculos: {self.total_hrn}\n"
+            hrn_stats += f"HRN mín/medio/máx: {self.hrn_min:.2f} / {self.hrn_mean:.2f} / {self.hrn_max:.2f}\n"
+            hrn_stats += "Distribución por Nivel:\n"
+            for level, count in self.level_counts.items():
+                if count:
+                    percentage = (count / self.total_hrn) * 100
+                    hrn_stats += f"  {level}: {count} ({percentage:.1f}%)\n"
+
+        if not (self.total_risks and self.total_hrn):
+            return iso_stats or hrn_stats
+
+        iso_lines = iso_stats.split('\n')
+        hrn_lines = hrn_stats.split('\n')
+
+        max_iso_width = max(len(line) for line in iso_lines) if iso_lines else 0
+        max_lines = max(len(iso_lines), len(hrn_lines))
+        combined_stats = []
+
+        for i in range(max_lines):
+            iso_line = iso_lines[i] if i < len(iso_lines) else ""
+            hrn_line = hrn_lines[i] if i < len(hrn_lines) else ""
+
+            iso_padded = iso_line.ljust(max_iso_width + 5)
+            combined_stats.append(f"{iso_padded}{hrn_line}")
+
+        return '\n'.join(combined_stats)
@@ -0,0 +1,90 @@
+"""Story de ReportLab que produce los flowables bajo demanda.
+
+SimpleDocTemplate.build solo mira el principio de la lista: consulta
+flowables[0], lo elimina con `del flowables[0]`, devuelve los trozos de un
+flowable partido con `flowables[0:0] = S` y, para keepWithNext, mira unos
+pocos elementos más (len(), índices y `flowables[:i]`). LazyStory ofrece
+esas operaciones sobre un búfer corto que se rellena desde generadores, de
+modo que en memoria solo viven los flowables de la página en curso y no los
+de todo el reporte.
+"""
+from core.profiling import span
+
+# Flowables adelantados en el búfer: cubre cadenas de keepWithNext (títulos)
+LOOKAHEAD = 8
+
+
+class LazyStory:
+    """Secuencia de flowables generada por secciones.
+
+    `sections` es una secuencia de (etiqueta, función) donde cada función
+    devuelve un iterable de flowables; se invoca al llegar a su sección.
+    `label` es la sección en curso y `produced` cuántos flowables se han
+    generado, para informar del avance.
+    """
+
+    def __init__(self, sections):
+        self._sections = iter(sections)
+        self._current = iter(())
+        self._buffer = []
+        self.label = None
+        self.produced = 0
+
+    def _fill(self, count):
+        """Llenar el búfer hasta `count` elementos o hasta agotar las secciones"""
+        while len(self._buffer) < count:
+            item = None
+            if self.label is not None:
+                with span(self.label):
+                    item = next(self._current, None)
+            if item is not None:
+                self._buffer.append(item)
+                self.produced += 1
+                continue
+            section = next(self._sections, None)
+            if section is None:
+                return
+            self.label, make = section
+            with span(self.label):
+                self._current = iter(make())
+
+    def __len__(self):
+        # Cuántos hay a la vista, no el total; 0 solo cuando se agotó todo
+        self._fill(LOOKAHEAD)
+        return len(self._buffer)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.stop is not None and index.stop > 0:
+                self._fill(index.stop)
+            return self._buffer[index]
+        if index < 0:
+            raise IndexError("LazyStory no admite índices negativos")
+        self._fill(index + 1)
+        return self._buffer[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice) and index.stop is not None and index.stop > 0:
+            self._fill(index.stop)
+        elif not isinstance(index, slice):
+            self._fill(index + 1)
+        self._buffer[index] = value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice) and index.stop is not None:
+            self._fill(index.stop)
+        elif not isinstance(index, slice):
+            self._fill(index + 1)
+        del self._buffer[index]
+
+    def insert(self, index, value):
+        self._fill(index)
+        self._buffer.insert(index, value)
+
+    def __iter__(self):
+        """Consumir todos los flowables (vacía la story)"""
+        while len(self):
+            yield self._buffer.pop(0)
@@ -0,0 +1,66 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image as PILImage
+
+THUMBNAIL_SIZE = (120, 120)
+
+
+class ThumbnailCache:
+    """Caché LRU de miniaturas indexada por el SHA-256 de la foto.
+
+    Opcionalmente persiste las miniaturas como PNG en `cache_dir`, de modo
+    que la misma foto no vuelva a decodificarse entre sesiones.
+    """
+
+    def __init__(self, maxsize=256, cache_dir=None, size=THUMBNAIL_SIZE):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _disk_path(self, sha256):
+        return os.path.join(self.cache_dir, f"{sha256}_{self.size[0]}x{self.size[1]}.png")
+
+    def _remember(self, sha256, thumb):
+        with self._lock:
+            self._items[sha256] = thumb
+            self._items.move_to_end(sha256)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def get(self, sha256, load_bytes):
+        """Devolver la miniatura (PIL) de una foto; `load_bytes()` solo se llama si falta"""
+        with self._lock:
+            thumb = self._items.get(sha256)
+            if thumb is not None:
+                self._items.move_to_end(sha256)
+                return thumb
+
+        if self.cache_dir and os.path.exists(self._disk_path(sha256)):
+            thumb = PILImage.open(self._disk_path(sha256))
+            thumb.load()
+            self._remember(sha256, thumb)
+            return thumb
+
+        thumb = PILImage.open(io.BytesIO(load_bytes()))
+        # draft() permite a JPEG decodificar a escala reducida
+        thumb.draft(thumb.mode, self.size)
+        thumb.thumbnail(self.size, PILImage.Resampling.LANCZOS)
+        self._remember(sha256, thumb)
+
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = self._disk_path(sha256) + '.tmp'
+                thumb.save(tmp_path, format='PNG')
+                os.replace(tmp_path, self._disk_path(sha256))
+            except OSError:
+                pass
+        return thumb
+
+    def discard(self, sha256):
+        with self._lock:
+            self._items.pop(sha256, None)
@@ -0,0 +1,102 @@
+"""RecordStore: índice por ID, orden de inserción y notificaciones."""
+import random
+
+import pytest
+
+from core.model import HrnCalculation, Risk, RiskStore
+
+
+def make_risk(description, record_id=None):
+    return Risk(description, "Zona", 0, 1, 0, record_id=record_id)
+
+
+def test_add_update_remove_keep_order():
+    store = RiskStore()
+    a, b, c = make_risk("a"), make_risk("b"), make_risk("c")
+    assert [store.add(r) for r in (a, b, c)] == [0, 1, 2]
+
+    edited = Risk("b editado", "Zona", 1, 1, 1, record_id=b.id)
+    assert store.update(edited) is b
+    assert [r.description for r in store] == ["a", "b editado", "c"]
+    assert store[1] is edited
+
+    assert store.remove(a.id) is a
+    assert a.id not in store
+    assert store[0] is edited
+    assert store.index_of(c.id) == 1
+    assert len(store) == 2
+
+
+def test_duplicate_add_raises():
+    store = RiskStore()
+    risk = make_risk("a")
+    store.add(risk)
+    with pytest.raises(KeyError):
+        store.add(risk.with_id(risk.id))
+
+
+def test_positions_match_list_after_random_edits():
+    rng = random.Random(1)
+    store, expected = RiskStore(), []
+    for step in range(2000):
+        op = rng.random()
+        if op < 0.5 or not expected:
+            risk = make_risk(f"r{step}")
+            store.add(risk)
+            expected.append(risk)
+        elif op < 0.7:
+            i = rng.randrange(len(expected))
+            store.remove(expected.pop(i).id)
+        elif op < 0.8:
+            store.remove(expected.pop().id)
+        else:
+            i = rng.randrange(len(expected))
+            assert store[i] is expected[i]
+            assert store.index_of(expected[i].id) == i
+    assert list(store) == expected
+    assert [store[i] for i in range(len(store))] == expected
+
+
+def test_duplicate_ids_get_copies_without_mutating():
+    first = make_risk("a", record_id="x")
+    second = make_risk("b", record_id="x")
+    other = RiskStore([second])
+
+    store = RiskStore([first, second])
+    assert len(store) == 2
+    assert store[0] is first
+    assert store[1].id != "x" and store[1].description == "b"
+    # El registro original, compartido con otro almacén, conserva su ID
+    assert second.id == "x" and other.get("x") is second
+
+    store.replace([first, second])
+    assert len(store) == 2 and second.id == "x"
+
+
+def test_listeners_receive_events():
+    store = RiskStore()
+    events = []
+    store.subscribe(lambda s, event, record, previous: events.append((event, record, previous)))
+    risk = make_risk("a")
+    edited = Risk("a2", "Zona", 0, 0, 0, record_id=risk.id)
+    store.add(risk)
+    store.update(edited)
+    store.remove(risk.id)
+    store.replace([])
+    assert events == [('add', risk, None), ('update', edited, risk), ('remove', edited, None),
+                      ('reset', None, None)]
+    assert store.revision == 4
+
+
+def test_snapshot_is_independent():
+    store = RiskStore([make_risk("a")])
+    snapshot = store.snapshot()
+    store.add(make_risk("b"))
+    assert len(snapshot) == 1
+
+
+def test_from_dict_rejects_unknown_values():
+    data = HrnCalculation("h", 0, 0, 0, 0).to_dict()
+    data['lo'] = 7.5
+    with pytest.raises(ValueError):
+        HrnCalculation.from_dict(data)
@@ -0,0 +1,102 @@
+"""Formatos de archivo de proyecto y migraciones."""
+import base64
+import io
+import json
+import os
+
+import pytest
+from PIL import Image as PILImage
+
+from core.model import HrnCalculation, HrnStore, Risk, RiskStore
+from core.photo_store import PhotoStore, TemporaryPhotoStore
+from core.project import SCHEMA_VERSION, photos_dir_for, read_project, write_project
+
+
+def png_bytes(color):
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (8, 8), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def sample_project(store):
+    photo = {'filename': 'frente.png', 'sha256': store.put_bytes(png_bytes('red'))}
+    return {
+        'machine_data': {'machine_type': 'Prensa', 'location': 'Nave 1'},
+        'risks': RiskStore([Risk("Atrapamiento", "Zona A", 1, 1, 0, "Resguardo"),
+                            Risk("Corte", "Zona B", 0, 0, 1)]),
+        'hrn_calculations': HrnStore([HrnCalculation("Prensado", 3, 2, 1, 0, "2024-01-01 10:00")]),
+        'photos': [photo],
+    }
+
+
+@pytest.mark.parametrize('name', ['p.json', 'p.json.gz', 'p.rmp'])
+def test_round_trip(tmp_path, name):
+    source = PhotoStore(str(tmp_path / 'origen'))
+    project = sample_project(source)
+    filename = str(tmp_path / name)
+
+    target = write_project(filename, project, source)
+    assert target.root == photos_dir_for(filename)
+
+    loaded, store = read_project(filename)
+    assert loaded['machine_data'] == project['machine_data']
+    assert loaded['risks'].to_dicts() == project['risks'].to_dicts()
+    assert loaded['hrn_calculations'].to_dicts() == project['hrn_calculations'].to_dicts()
+    assert loaded['photos'] == project['photos']
+    assert loaded['skipped'] == []
+    assert store.get(project['photos'][0]['sha256']) == png_bytes('red')
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def test_migrates_unversioned_file_with_inline_photos(tmp_path):
+    data = png_bytes('blue')
+    filename = str(tmp_path / 'antiguo.json')
+    write_json(filename, {
+        'machine_data': {'machine_type': 'Torno',
+                         'photos': [{'filename': 'a.png', 'data': base64.b64encode(data).decode('ascii')}]},
+        'risks': [Risk("Proyección", "Zona", 0, 1, 1).to_dict()],
+        'hrn_calculations': [],
+    })
+
+    project, store = read_project(filename)
+    with store:
+        assert isinstance(store, TemporaryPhotoStore)
+        assert project['machine_data'] == {'machine_type': 'Torno'}
+        [photo] = project['photos']
+        assert 'data' not in photo and store.get(photo['sha256']) == data
+        # Leer no escribe nada junto al archivo
+        assert not os.path.exists(photos_dir_for(filename))
+
+        write_project(filename, project, store)
+    assert not os.path.exists(store.root)
+
+    with open(filename, encoding='utf-8') as f:
+        saved = json.load(f)
+    assert saved['schema_version'] == SCHEMA_VERSION
+    assert 'photos' not in saved['machine_data']
+    reloaded, sidecar = read_project(filename)
+    assert sidecar.get(reloaded['photos'][0]['sha256']) == data
+
+
+def test_newer_schema_is_rejected(tmp_path):
+    filename = str(tmp_path / 'futuro.json')
+    write_json(filename, {'schema_version': SCHEMA_VERSION + 1, 'machine_data': {}, 'photos': [],
+                          'risks': [], 'hrn_calculations': []})
+    with pytest.raises(ValueError):
+        read_project(filename)
+
+
+def test_invalid_records_are_skipped(tmp_path):
+    bad = Risk("Mal", "Zona", 0, 0, 0).to_dict()
+    bad['severity'] = 'S9 - No existe'
+    filename = str(tmp_path / 'filas.json')
+    write_json(filename, {'schema_version': SCHEMA_VERSION, 'machine_data': {}, 'photos': [],
+                          'risks': [Risk("Bien", "Zona", 0, 0, 0).to_dict(), bad],
+                          'hrn_calculations': []})
+    project, _ = read_project(filename)
+    assert [r.description for r in project['risks']] == ["Bien"]
+    assert len(project['skipped']) == 1 and 'severity' in project['skipped'][0]
@@ -0,0 +1,32 @@
+"""La evaluación vectorizada (core.bulk_scoring) coincide con la ruta por elemento."""
+import itertools
+
+import numpy as np
+
+from core import bulk_scoring
+from core.scoring import (DPH_VALUES, FE_VALUES, HRN_LEVEL_NAMES, HRN_THRESHOLDS, LO_VALUES, NP_VALUES,
+                          calculate_plr, classify_hrn, score_hrn)
+
+
+def test_plr_matches_all_combinations():
+    combos = list(itertools.product((0, 1), repeat=3))
+    s, f, p = (np.array(column) for column in zip(*combos))
+    assert list(bulk_scoring.plr_bulk(s, f, p)) == [calculate_plr(*combo) for combo in combos]
+
+
+def test_hrn_matches_all_combinations():
+    combos = list(itertools.product(range(len(LO_VALUES)), range(len(FE_VALUES)),
+                                    range(len(DPH_VALUES)), range(len(NP_VALUES))))
+    columns = [np.array(column) for column in zip(*combos)]
+    hrn, levels = bulk_scoring.score_bulk(*columns)
+
+    expected = [score_hrn(*combo) for combo in combos]
+    assert hrn.tolist() == [score.hrn for score in expected]
+    assert list(bulk_scoring.level_names(levels)) == [score.level for score in expected]
+
+
+def test_classification_at_thresholds():
+    # Los límites son inclusivos: el valor del umbral pertenece al nivel inferior
+    values = [0.0] + [v for t in HRN_THRESHOLDS for v in (t, np.nextafter(t, np.inf))] + [1e9]
+    codes = bulk_scoring.classify_hrn_bulk(np.array(values))
+    assert [HRN_LEVEL_NAMES[c] for c in codes] == [classify_hrn(v).name for v in values]
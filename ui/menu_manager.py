@@ -3,6 +3,7 @@ import webbrowser
 from tkinter import messagebox
 import tkinter as tk
 from .tab_manager import TabManager
+from core import profiling
 
 class MenuManager:
     """Gestor centralizado del menú de la aplicación"""
@@ -22,12 +23,22 @@ class MenuManager:
         archivo_menu.add_command(label="Abrir", command=self.app.load_project)
         archivo_menu.add_command(label="Guardar", command=self.app.save_project)
         archivo_menu.add_separator()
+        archivo_menu.add_command(label="Abrir desde base de datos...", command=self.app.load_project_from_db)
+        archivo_menu.add_command(label="Guardar en base de datos...", command=self.app.save_project_to_db)
+        archivo_menu.add_separator()
         archivo_menu.add_command(label="Cerrar", command=self.app.close_app)
         
         # Menú Procesar
         procesar_menu = Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Procesar", menu=procesar_menu)
         procesar_menu.add_command(label="Generar PDF", command=self.app.generate_pdf)
+        procesar_menu.add_command(label="Reporte consolidado...", command=self.app.generate_fleet_report)
+        procesar_menu.add_separator()
+        # Herramientas de desarrollo: tiempos por etapa de las últimas operaciones
+        self.profiling_var = tk.BooleanVar(value=profiling.enabled())
+        procesar_menu.add_checkbutton(label="Medir tiempos", variable=self.profiling_var,
+                                      command=self.toggle_profiling)
+        procesar_menu.add_command(label="Ver últimas mediciones...", command=self.show_profile)
         
         # Menú Ayuda
         ayuda_menu = Menu(menubar, tearoff=0)
@@ -41,6 +52,35 @@ class MenuManager:
         """Abrir repositorio de código fuente"""
         webbrowser.open("https://github.com/saulhdev/riskmgm")
     
+    def toggle_profiling(self):
+        """Activar o desactivar la medición de tiempos (conserva el modo cprofile del entorno)"""
+        if not self.profiling_var.get():
+            profiling.configure(None)
+        elif not profiling.enabled():
+            profiling.configure('spans')
+
+    def show_profile(self):
+        """Mostrar el desglose de tiempos y contadores de las últimas operaciones"""
+        operations = profiling.recent_operations()
+        if not operations:
+            message = ("No hay mediciones." if profiling.enabled() else
+                       "La medición está desactivada: active Procesar > Medir tiempos o inicie "
+                       f"con {profiling.ENV_VAR}=1.")
+            messagebox.showinfo("Mediciones", message)
+            return
+
+        profile_win = tk.Toplevel(self.root)
+        profile_win.title("Mediciones (de la más reciente a la más antigua)")
+        profile_win.transient(self.root)
+        profile_win.geometry("760x520")
+        text = tk.Text(profile_win, font=('Courier', 9), wrap='none')
+        scrollbar = tk.Scrollbar(profile_win, orient='vertical', command=text.yview)
+        text.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        text.pack(fill='both', expand=True)
+        text.insert('1.0', "\n\n".join(op.report() for op in operations))
+        text.configure(state='disabled')
+
     def acerca_de(self):
         """Mostrar información acerca de la aplicación en un diálogo con el contenido del tab 'Acerca de'"""
         about_win = tk.Toplevel(self.root)
@@ -0,0 +1,107 @@
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from core.progress import OperationCancelled
+
+
+class ProgressDialog:
+    """Diálogo modal con barra de progreso y botón de cancelar"""
+
+    def __init__(self, root, title, on_cancel=None):
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.transient(root)
+        self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", lambda: None)
+
+        self.label = ttk.Label(self.window, text="Preparando...", width=50)
+        self.label.pack(padx=20, pady=(20, 5))
+
+        self.progressbar = ttk.Progressbar(self.window, mode='determinate', maximum=100, length=350)
+        self.progressbar.pack(padx=20, pady=5)
+
+        self.cancel_button = ttk.Button(self.window, text="Cancelar", command=on_cancel)
+        self.cancel_button.pack(pady=(5, 15))
+
+        self.window.update_idletasks()
+        x = root.winfo_x() + (root.winfo_width() - self.window.winfo_width()) // 2
+        y = root.winfo_y() + (root.winfo_height() - self.window.winfo_height()) // 2
+        self.window.geometry(f"+{x}+{y}")
+        self.window.grab_set()
+
+    def update(self, percent, label):
+        self.progressbar['value'] = percent
+        self.label.config(text=label)
+
+    def cancelling(self):
+        self.label.config(text="Cancelando...")
+        self.cancel_button.config(state='disabled')
+
+    def close(self):
+        self.window.grab_release()
+        self.window.destroy()
+
+
+class BackgroundTask:
+    """Ejecutar una función en un hilo de trabajo informando el avance al bucle de Tk.
+
+    `target(progress, cancel_event)` corre fuera del hilo principal y no debe
+    tocar widgets. Los callbacks on_success/on_error/on_cancel se ejecutan en
+    el bucle principal mediante root.after.
+    """
+
+    POLL_MS = 100
+
+    def __init__(self, root, target, title="Procesando", on_success=None,
+                 on_error=None, on_cancel=None):
+        self.root = root
+        self.target = target
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.cancel_event = threading.Event()
+        self.queue = queue.Queue()
+        self.dialog = ProgressDialog(root, title, on_cancel=self.cancel)
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self.root.after(self.POLL_MS, self._poll)
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.dialog.cancelling()
+
+    def _progress(self, percent, label):
+        self.queue.put(('progress', (percent, label)))
+
+    def _run(self):
+        try:
+            result = self.target(self._progress, self.cancel_event)
+            self.queue.put(('done', result))
+        except OperationCancelled:
+            self.queue.put(('cancelled', None))
+        except Exception as e:
+            self.queue.put(('error', e))
+
+    def _poll(self):
+        while True:
+            try:
+                kind, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == 'progress':
+                self.dialog.update(*payload)
+                continue
+
+            self.dialog.close()
+            callback = {'done': self.on_success, 'error': self.on_error,
+                        'cancelled': self.on_cancel}[kind]
+            if callback:
+                callback(payload)
+            return
+
+        self.root.after(self.POLL_MS, self._poll)
@@ -0,0 +1,54 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class ProjectChooser:
+    """Diálogo modal para elegir un proyecto de un repositorio SQLite.
+
+    `projects` son los resúmenes de ProjectRepository.projects(); al aceptar
+    se llama a `on_select(name)`.
+    """
+
+    COLUMNS = (('name', "Proyecto", 180), ('machine_type', "Tipo de Máquina", 140),
+               ('location', "Ubicación", 140), ('analyst', "Analista", 140),
+               ('risks', "Riesgos", 70), ('hrn_calculations', "HRN", 70))
+
+    def __init__(self, root, projects, on_select):
+        self.on_select = on_select
+        self.window = tk.Toplevel(root)
+        self.window.title("Abrir desde base de datos")
+        self.window.transient(root)
+
+        frame = ttk.Frame(self.window)
+        frame.pack(fill='both', expand=True, padx=10, pady=10)
+        self.tree = ttk.Treeview(frame, columns=[key for key, _, _ in self.COLUMNS],
+                                 show='headings', height=15, selectmode='browse')
+        for key, heading, width in self.COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width)
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        for project in projects:
+            self.tree.insert('', 'end', iid=project['name'],
+                             values=[project[key] or '' for key, _, _ in self.COLUMNS])
+        self.tree.bind('<Double-1>', lambda e: self.accept())
+
+        buttons = ttk.Frame(self.window)
+        buttons.pack(fill='x', padx=10, pady=(0, 10))
+        ttk.Button(buttons, text="Cancelar", command=self.close).pack(side='right')
+        ttk.Button(buttons, text="Abrir", command=self.accept).pack(side='right', padx=5)
+
+        self.window.grab_set()
+
+    def accept(self):
+        selection = self.tree.selection()
+        if selection:
+            self.close()
+            self.on_select(selection[0])
+
+    def close(self):
+        self.window.grab_release()
+        self.window.destroy()
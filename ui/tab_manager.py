@@ -1,10 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
 from datetime import datetime
 import os
-import base64
+
+from core.scoring import (SEVERITY_OPTIONS, FREQUENCY_OPTIONS, AVOIDANCE_OPTIONS,
+                          LO_VALUES, FE_VALUES, DPH_VALUES, NP_VALUES,
+                          calculate_plr, score_hrn, option_label, hrn_reference_text)
+from core.model import Risk, HrnCalculation
+from ui.virtual_tree import VirtualTree
 
 class TabManager:
     def __init__(self, root, app_instance):
@@ -14,15 +17,31 @@ class TabManager:
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
 
-        self.create_machine_tab()
-        self.create_risk_tab()        
-        self.create_hrn_tab()
-        self.create_analysis_tab()
-        self.create_about_tab()
+        # Las pestañas se construyen la primera vez que se seleccionan; la de
+        # datos de la máquina ya, porque es la visible y la carga de proyectos
+        # escribe en sus campos
+        self.pending_tabs = {}
+        self.add_tab("Datos de la Máquina", self.create_machine_tab)
+        self.add_tab("Evaluación de Riesgos", self.create_risk_tab)
+        self.add_tab("Calculadora HRN", self.create_hrn_tab)
+        self.add_tab("Análisis y Gráficos", self.create_analysis_tab)
+        self.add_tab("Acerca de", self.render_about)
+        self.build_tab(self.notebook.select())
+        self.notebook.bind('<<NotebookTabChanged>>', lambda e: self.build_tab(self.notebook.select()))
 
-    def create_machine_tab(self):
+    def add_tab(self, text, builder):
+        """Añadir una pestaña vacía; `builder(frame)` la completa al seleccionarla"""
         frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="Datos de la Máquina")
+        self.notebook.add(frame, text=text)
+        self.pending_tabs[str(frame)] = (frame, builder)
+
+    def build_tab(self, tab_id):
+        pending = self.pending_tabs.pop(str(tab_id), None)
+        if pending is not None:
+            frame, builder = pending
+            builder(frame)
+
+    def create_machine_tab(self, frame):
         
         canvas = tk.Canvas(frame)
         scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
@@ -93,19 +112,20 @@ class TabManager:
         self.app.photos_canvas.pack(fill='x', expand=True)
         self.photos_scrollbar.pack(fill='x')
         
-        self.app.photo_labels = []
+        self.app.photo_tiles = {}
+        self.app.photos_empty_label = None
         
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
-    def create_risk_tab(self):
+    def create_risk_tab(self, frame):
         """Pestaña de gestión de riesgos"""
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="Evaluación de Riesgos")
         
         # Frame izquierdo - Formulario
         left_frame = ttk.LabelFrame(frame, text="Añadir Nuevo Riesgo", padding=10)
         left_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
+        self.risk_form_frame = left_frame
+        self.editing_risk_id = None
         
         # Campos del riesgo
         ttk.Label(left_frame, text="Descripción del Peligro:").grid(row=0, column=0, sticky='w', pady=5)
@@ -119,25 +139,19 @@ class TabManager:
         # Severidad (S)
         ttk.Label(left_frame, text="Severidad (S):").grid(row=2, column=0, sticky='w', pady=5)
         self.severity = ttk.Combobox(left_frame, width=37, state='readonly')
-        self.severity['values'] = ('S1 - Lesión leve', 'S2 - Lesión grave/permanente o muerte')
+        self.severity['values'] = [option_label(code, desc) for code, desc in SEVERITY_OPTIONS]
         self.severity.grid(row=2, column=1, pady=5, padx=5)
         
         # Frecuencia de exposición (F)
         ttk.Label(left_frame, text="Frecuencia (F):").grid(row=3, column=0, sticky='w', pady=5)
         self.frequency = ttk.Combobox(left_frame, width=37, state='readonly')
-        self.frequency['values'] = (
-            'F1 - Rara vez a frecuente',
-            'F2 - Frecuente a continua'
-        )
+        self.frequency['values'] = [option_label(code, desc) for code, desc in FREQUENCY_OPTIONS]
         self.frequency.grid(row=3, column=1, pady=5, padx=5)
         
         # Posibilidad de evitar (P)
         ttk.Label(left_frame, text="Posibilidad de Evitar (P):").grid(row=4, column=0, sticky='w', pady=5)
         self.avoidance = ttk.Combobox(left_frame, width=37, state='readonly')
-        self.avoidance['values'] = (
-            'P1 - Posible bajo condiciones específicas',
-            'P2 - Apenas posible'
-        )
+        self.avoidance['values'] = [option_label(code, desc) for code, desc in AVOIDANCE_OPTIONS]
         self.avoidance.grid(row=4, column=1, pady=5, padx=5)
         
         # Performance Level requerido (PLr)
@@ -156,14 +170,15 @@ class TabManager:
         btn_frame = ttk.Frame(left_frame)
         btn_frame.grid(row=7, column=0, columnspan=2, pady=20)
         
-        ttk.Button(btn_frame, text="Añadir Riesgo", command=self.add_risk).pack(side='left', padx=5)
+        self.risk_add_button = ttk.Button(btn_frame, text="Añadir Riesgo", command=self.add_risk)
+        self.risk_add_button.pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Limpiar", command=self.clear_risk_form).pack(side='left', padx=5)
         
         right_frame = ttk.LabelFrame(frame, text="Riesgos Identificados", padding=10)
         right_frame.pack(side='right', fill='both', expand=True, padx=5, pady=5)
         
         columns = ('Descripción', 'Zona', 'S', 'F', 'P', 'PLr')
-        self.app.risk_tree = ttk.Treeview(right_frame, columns=columns, show='tree headings', height=20)
+        self.app.risk_tree = VirtualTree(right_frame, columns, height=20)
 
         self.app.risk_tree.heading('#0', text='#')
         self.app.risk_tree.column('#0', width=30)
@@ -177,24 +192,21 @@ class TabManager:
             else:
                 self.app.risk_tree.column(col, width=50)
 
-        scrollbar = ttk.Scrollbar(right_frame, orient="vertical", command=self.app.risk_tree.yview)
-        self.app.risk_tree.configure(yscrollcommand=scrollbar.set)
-
-        self.app.risk_tree.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        self.app.risk_tree.pack(fill='both', expand=True)
+        self.app.risk_tree.tree.bind('<Double-1>', self.edit_risk)
+        self.app.risk_tree.set_model(self.app.risks)
         
         ttk.Button(right_frame, text="Eliminar Seleccionado", 
                    command=self.delete_risk).pack(pady=5)
     
-    def create_hrn_tab(self):
+    def create_hrn_tab(self, frame):
         """Pestaña de calculadora HRN"""
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="Calculadora HRN")
         
         main_frame = ttk.Frame(frame)
         main_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
         left_frame = ttk.LabelFrame(main_frame, text="Calcular HRN (Hazard Rating Number)", padding=15)
+        self.editing_hrn_id = None
         left_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
         
         ttk.Label(left_frame, text="HRN = LO × FE × DPH × NP", 
@@ -209,76 +221,38 @@ class TabManager:
         ttk.Label(left_frame, text="LO - Probabilidad de Ocurrencia:", 
                  font=('Arial', 10, 'bold')).grid(row=2, column=0, sticky='w', pady=10, padx=5)
         
-        self.lo_values = [
-            (0.033, "Casi Imposible"),
-            (1, "Altamente improbable"),
-            (1.5, "Improbable"),
-            (2, "Posible"),
-            (5, "Hay Posibilidades"),
-            (8, "Probable"),
-            (10, "Muy Probable"),
-            (15, "Cierto")
-        ]
-        
         self.lo_var = tk.StringVar()
-        lo_combo = ttk.Combobox(left_frame, textvariable=self.lo_var, width=47, state='readonly')
-        lo_combo['values'] = [f"{val} - {desc}" for val, desc in self.lo_values]
-        lo_combo.grid(row=2, column=1, pady=10, padx=5)
-        lo_combo.bind('<<ComboboxSelected>>', self.calculate_hrn)
+        self.lo_combo = ttk.Combobox(left_frame, textvariable=self.lo_var, width=47, state='readonly')
+        self.lo_combo['values'] = [f"{val} - {desc}" for val, desc in LO_VALUES]
+        self.lo_combo.grid(row=2, column=1, pady=10, padx=5)
+        self.lo_combo.bind('<<ComboboxSelected>>', self.calculate_hrn)
         
         ttk.Label(left_frame, text="FE - Frecuencia de Exposición:", 
                  font=('Arial', 10, 'bold')).grid(row=3, column=0, sticky='w', pady=10, padx=5)
         
-        self.fe_values = [
-            (0.5, "Anualmente"),
-            (1, "Mensualmente"),
-            (1.5, "Semanalmente"),
-            (2.5, "Diariamente"),
-            (4, "Cada Hora"),
-            (5, "Constantemente")
-        ]
-        
         self.fe_var = tk.StringVar()
-        fe_combo = ttk.Combobox(left_frame, textvariable=self.fe_var, width=47, state='readonly')
-        fe_combo['values'] = [f"{val} - {desc}" for val, desc in self.fe_values]
-        fe_combo.grid(row=3, column=1, pady=10, padx=5)
-        fe_combo.bind('<<ComboboxSelected>>', self.calculate_hrn)
+        self.fe_combo = ttk.Combobox(left_frame, textvariable=self.fe_var, width=47, state='readonly')
+        self.fe_combo['values'] = [f"{val} - {desc}" for val, desc in FE_VALUES]
+        self.fe_combo.grid(row=3, column=1, pady=10, padx=5)
+        self.fe_combo.bind('<<ComboboxSelected>>', self.calculate_hrn)
         
         ttk.Label(left_frame, text="DPH - Grado de Posible Daño:", 
                  font=('Arial', 10, 'bold')).grid(row=4, column=0, sticky='w', pady=10, padx=5)
         
-        self.dph_values = [
-            (0.1, "Rasguño/Moretón"),
-            (0.5, "Quemadura/Enfermedad de corto plazo"),
-            (1, "Rotura - Hueso menor o Enfermedad menor (temporal)"),
-            (2, "Rotura - Hueso mayor o Enfermedad menor (permanente)"),
-            (4, "Pérdida de 1 miembro o Enfermedad grave (permanente)"),
-            (8, "Pérdida de 2 miembros o Enfermedad grave (permanente)"),
-            (15, "Fatalidad")
-        ]
-        
         self.dph_var = tk.StringVar()
-        dph_combo = ttk.Combobox(left_frame, textvariable=self.dph_var, width=47, state='readonly')
-        dph_combo['values'] = [f"{val} - {desc}" for val, desc in self.dph_values]
-        dph_combo.grid(row=4, column=1, pady=10, padx=5)
-        dph_combo.bind('<<ComboboxSelected>>', self.calculate_hrn)
+        self.dph_combo = ttk.Combobox(left_frame, textvariable=self.dph_var, width=47, state='readonly')
+        self.dph_combo['values'] = [f"{val} - {desc}" for val, desc in DPH_VALUES]
+        self.dph_combo.grid(row=4, column=1, pady=10, padx=5)
+        self.dph_combo.bind('<<ComboboxSelected>>', self.calculate_hrn)
         
         ttk.Label(left_frame, text="NP - Número de Personas en Riesgo:", 
                  font=('Arial', 10, 'bold')).grid(row=5, column=0, sticky='w', pady=10, padx=5)
         
-        self.np_values = [
-            (1, "1-2 personas"),
-            (2, "3-7 personas"),
-            (4, "8-15 personas"),
-            (8, "16-50 personas"),
-            (12, "Más de 50 personas")
-        ]
-        
         self.np_var = tk.StringVar()
-        np_combo = ttk.Combobox(left_frame, textvariable=self.np_var, width=47, state='readonly')
-        np_combo['values'] = [f"{val} - {desc}" for val, desc in self.np_values]
-        np_combo.grid(row=5, column=1, pady=10, padx=5)
-        np_combo.bind('<<ComboboxSelected>>', self.calculate_hrn)
+        self.np_combo = ttk.Combobox(left_frame, textvariable=self.np_var, width=47, state='readonly')
+        self.np_combo['values'] = [f"{val} - {desc}" for val, desc in NP_VALUES]
+        self.np_combo.grid(row=5, column=1, pady=10, padx=5)
+        self.np_combo.bind('<<ComboboxSelected>>', self.calculate_hrn)
         
         result_frame = ttk.Frame(left_frame, relief='solid', borderwidth=2)
         result_frame.grid(row=6, column=0, columnspan=2, pady=20, padx=5, sticky='ew')
@@ -296,8 +270,9 @@ class TabManager:
         btn_frame = ttk.Frame(left_frame)
         btn_frame.grid(row=7, column=0, columnspan=2, pady=15)
         
-        ttk.Button(btn_frame, text="💾 Guardar Cálculo", 
-                  command=self.save_hrn_calculation).pack(side='left', padx=5)
+        self.hrn_save_button = ttk.Button(btn_frame, text="💾 Guardar Cálculo", 
+                                          command=self.save_hrn_calculation)
+        self.hrn_save_button.pack(side='left', padx=5)
         ttk.Button(btn_frame, text="🔄 Limpiar", 
                   command=self.clear_hrn_form).pack(side='left', padx=5)
         
@@ -308,7 +283,7 @@ class TabManager:
         history_frame.pack(fill='both', expand=True, pady=(0, 10))
         
         columns = ('Descripción', 'HRN', 'Nivel')
-        self.app.hrn_tree = ttk.Treeview(history_frame, columns=columns, show='tree headings', height=10)
+        self.app.hrn_tree = VirtualTree(history_frame, columns, height=10)
         
         self.app.hrn_tree.heading('#0', text='#')
         self.app.hrn_tree.column('#0', width=30)
@@ -319,11 +294,9 @@ class TabManager:
         self.app.hrn_tree.heading('Nivel', text='Nivel de Riesgo')
         self.app.hrn_tree.column('Nivel', width=150)
 
-        hrn_scrollbar = ttk.Scrollbar(history_frame, orient="vertical", command=self.app.hrn_tree.yview)
-        self.app.hrn_tree.configure(yscrollcommand=hrn_scrollbar.set)
-
-        self.app.hrn_tree.pack(side='left', fill='both', expand=True)
-        hrn_scrollbar.pack(side='right', fill='y')
+        self.app.hrn_tree.pack(fill='both', expand=True)
+        self.app.hrn_tree.tree.bind('<Double-1>', self.edit_hrn_calculation)
+        self.app.hrn_tree.set_model(self.app.hrn_calculations)
         
         ttk.Button(history_frame, text="🗑️ Eliminar Seleccionado", 
                   command=self.delete_hrn_calculation).pack(pady=5)
@@ -331,25 +304,18 @@ class TabManager:
         reference_frame = ttk.LabelFrame(right_frame, text="Tabla de Niveles de Riesgo", padding=10)
         reference_frame.pack(fill='x')
         
-        reference_text = """
-0-1     → Riesgo Despreciable
-2-5     → Riesgo Muy Bajo
-6-10    → Riesgo Bajo
-11-50   → Riesgo Significante
-51-100  → Riesgo Alto
-101-500 → Riesgo Muy Alto
-501-1000 → Riesgo Extremo
->1000   → Riesgo Inaceptable
-        """
+        reference_text = hrn_reference_text()
         
         ref_label = ttk.Label(reference_frame, text=reference_text, 
                              font=('Courier', 9), justify='left')
         ref_label.pack()
     
-    def create_analysis_tab(self):
+    def create_analysis_tab(self, frame):
         """Pestaña de análisis y gráficos"""
-        frame = ttk.Frame(self.notebook)       
-        self.notebook.add(frame, text="Análisis y Gráficos")
+        # matplotlib tarda en importarse: solo al abrir esta pestaña
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from core.charts import AnalysisChart
 
         toolbar = ttk.Frame(frame)
         toolbar.pack(fill='x', padx=10, pady=(10, 0))
@@ -366,11 +332,8 @@ class TabManager:
         self.app.fig = Figure(figsize=(12, 5))
         self.app.canvas = FigureCanvasTkAgg(self.app.fig, master=graph_frame)
         self.app.canvas.get_tk_widget().pack(fill='both', expand=True)
-    
-    def create_about_tab(self):
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="Acerca de")
-        self.render_about(frame)
+        self.app.analysis_chart = AnalysisChart(self.app.fig)
+        self.app.refresh_analysis()
 
     @staticmethod
     def render_about(parent):
@@ -488,6 +451,7 @@ class TabManager:
         self.app.machine_data['description'] = self.app.description_text.get('1.0', 'end-1c')
         self.app.machine_data['date'] = datetime.now().strftime("%Y-%m-%d")
         self.app.machine_data['photos'] = self.app.machine_photos
+        self.app.journal_machine()
         
         messagebox.showinfo("Éxito", "Datos de la máquina guardados correctamente")
     
@@ -503,9 +467,8 @@ class TabManager:
         
         if file_path:
             try:
-                # Convertir imagen a base64 para almacenamiento
-                with open(file_path, 'rb') as f:
-                    img_data = base64.b64encode(f.read()).decode('utf-8')
+                # Copiar imagen al almacén de fotos (direccionado por SHA-256)
+                sha256 = self.app.photo_store.put_file(file_path)
                 
                 # Obtener nombre del archivo
                 filename = os.path.basename(file_path)
@@ -513,10 +476,11 @@ class TabManager:
                 # Añadir a la lista
                 photo_info = {
                     'filename': filename,
-                    'data': img_data,
+                    'sha256': sha256,
                     'path': file_path
                 }
                 self.app.machine_photos.append(photo_info)
+                self.app.journal_machine()
                 
                 # Actualizar visualización
                 self.app.update_photos_display()
@@ -550,6 +514,7 @@ class TabManager:
             if selection:
                 idx = selection[0]
                 removed = self.app.machine_photos.pop(idx)
+                self.app.journal_machine()
                 self.app.update_photos_display()
                 messagebox.showinfo("Éxito", f"Foto '{removed['filename']}' eliminada")
                 remove_window.destroy()
@@ -567,20 +532,8 @@ class TabManager:
         if s == -1 or f == -1 or p == -1:
             return
         
-        # Matriz de decisión ISO 13849-1
-        # [S][F][P]
-        plr_matrix = {
-            (0, 0, 0): 'a',  # S1, F1, P1
-            (0, 0, 1): 'b',  # S1, F1, P2
-            (0, 1, 0): 'b',  # S1, F2, P1
-            (0, 1, 1): 'c',  # S1, F2, P2
-            (1, 0, 0): 'c',  # S2, F1, P1
-            (1, 0, 1): 'd',  # S2, F1, P2
-            (1, 1, 0): 'd',  # S2, F2, P1
-            (1, 1, 1): 'e',  # S2, F2, P2
-        }
-        
-        plr = plr_matrix.get((s, f, p), 'a')
+        # Matriz de decisión ISO 13849-1 (core.scoring)
+        plr = calculate_plr(s, f, p)
         self.plr_label.config(text=f"PLr = {plr.upper()}", foreground='red', 
                              font=('Arial', 12, 'bold'))
         return plr
@@ -596,30 +549,45 @@ class TabManager:
             messagebox.showwarning("Advertencia", "Debe seleccionar S, F y P")
             return
         
-        risk = {
-            'description': self.risk_desc.get(),
-            'zone': self.risk_zone.get(),
-            'severity': self.severity.get(),
-            'frequency': self.frequency.get(),
-            'avoidance': self.avoidance.get(),
-            'plr': plr.upper(),
-            'control_measures': self.control_measures.get('1.0', 'end-1c')
-        }
+        risk = Risk(
+            self.risk_desc.get(),
+            self.risk_zone.get(),
+            self.severity.current(),
+            self.frequency.current(),
+            self.avoidance.current(),
+            self.control_measures.get('1.0', 'end-1c'),
+            record_id=self.editing_risk_id
+        )
         
-        self.app.risks.append(risk)
+        if self.editing_risk_id in self.app.risks:
+            self.app.risks.update(risk)
+            message = "Riesgo actualizado correctamente"
+        else:
+            self.app.risk_tree.see(self.app.risks.add(risk))
+            message = "Riesgo añadido correctamente"
         
-        idx = len(self.app.risks)
-        self.app.risk_tree.insert('', 'end', text=str(idx), values=(
-            risk['description'][:30] + '...' if len(risk['description']) > 30 else risk['description'],
-            risk['zone'],
-            risk['severity'].split('-')[0].strip(),
-            risk['frequency'].split('-')[0].strip(),
-            risk['avoidance'].split('-')[0].strip(),
-            risk['plr']
-        ))
+        self.clear_risk_form()
+        messagebox.showinfo("Éxito", message)
+    
+    def edit_risk(self, event):
+        """Cargar en el formulario el riesgo de la fila pulsada para editarlo"""
+        idx = self.app.risk_tree.index_at(event.y)
+        if idx is None:
+            return
         
+        risk = self.app.risks[idx]
         self.clear_risk_form()
-        messagebox.showinfo("Éxito", "Riesgo añadido correctamente")
+        self.risk_desc.insert(0, risk.description)
+        self.risk_zone.insert(0, risk.zone)
+        self.severity.current(risk.s)
+        self.frequency.current(risk.f)
+        self.avoidance.current(risk.p)
+        self.control_measures.insert('1.0', risk.control_measures)
+        self.calculate_plr()
+        
+        self.editing_risk_id = risk.id
+        self.risk_form_frame.config(text=f"Editar Riesgo #{idx + 1}")
+        self.risk_add_button.config(text="Guardar Cambios")
     
     def clear_risk_form(self):
         """Limpiar formulario de riesgo"""
@@ -631,83 +599,38 @@ class TabManager:
         self.control_measures.delete('1.0', 'end')
         self.plr_label.config(text="Seleccione S, F y P", foreground='blue', 
                              font=('Arial', 10))
+        self.editing_risk_id = None
+        self.risk_form_frame.config(text="Añadir Nuevo Riesgo")
+        self.risk_add_button.config(text="Añadir Riesgo")
     
     def delete_risk(self):
         """Eliminar riesgo seleccionado"""
-        selected = self.app.risk_tree.selection()
-        if not selected:
+        idx = self.app.risk_tree.selected_index()
+        if idx is None:
             messagebox.showwarning("Advertencia", "Seleccione un riesgo para eliminar")
             return
         
         if messagebox.askyesno("Confirmar", "¿Desea eliminar el riesgo seleccionado?"):
-            idx = int(self.app.risk_tree.item(selected[0])['text']) - 1
-            self.app.risks.pop(idx)
-            self.app.risk_tree.delete(selected[0])
-
-            for i, item in enumerate(self.app.risk_tree.get_children()):
-                self.app.risk_tree.item(item, text=str(i+1))
+            # La lista se actualiza y renumera sola al cambiar el almacén
+            risk = self.app.risks[idx]
+            self.app.risks.remove(risk.id)
+            if risk.id == self.editing_risk_id:
+                self.clear_risk_form()
     
     def calculate_hrn(self, event=None):
         """Calcular HRN"""
-        try:
-            lo_text = self.lo_var.get()
-            fe_text = self.fe_var.get()
-            dph_text = self.dph_var.get()
-            np_text = self.np_var.get()
-            
-            if not all([lo_text, fe_text, dph_text, np_text]):
-                return
-            
-            lo = float(lo_text.split(' - ')[0])
-            fe = float(fe_text.split(' - ')[0])
-            dph = float(dph_text.split(' - ')[0])
-            np = float(np_text.split(' - ')[0])
-            
-            hrn = lo * fe * dph * np
-            
-            if hrn <= 1:
-                level = "Riesgo Despreciable"
-                color = '#90EE90'
-            elif hrn <= 5:
-                level = "Riesgo Muy Bajo"
-                color = '#98FB98'
-            elif hrn <= 10:
-                level = "Riesgo Bajo"
-                color = '#FFFF99'
-            elif hrn <= 50:
-                level = "Riesgo Significante"
-                color = '#FFD700'
-            elif hrn <= 100:
-                level = "Riesgo Alto"
-                color = '#FFA500'
-            elif hrn <= 500:
-                level = "Riesgo Muy Alto"
-                color = '#FF6347'
-            elif hrn <= 1000:
-                level = "Riesgo Extremo"
-                color = '#DC143C'
-            else:
-                level = "Riesgo Inaceptable"
-                color = '#8B0000'
-
-            self.hrn_result_label.config(text=f"HRN = {hrn:.2f}", foreground=color)
-            self.hrn_level_label.config(text=level, foreground=color, font=('Arial', 12, 'bold'))
-            
-            self.current_hrn = {
-                'hrn': hrn,
-                'level': level,
-                'lo': lo,
-                'lo_desc': lo_text.split(' - ')[1],
-                'fe': fe,
-                'fe_desc': fe_text.split(' - ')[1],
-                'dph': dph,
-                'dph_desc': dph_text.split(' - ')[1],
-                'np': np,
-                'np_desc': np_text.split(' - ')[1]
-            }
-            
-        except Exception as e:
-            self.hrn_result_label.config(text="Error en cálculo", foreground='red')
+        indices = (self.lo_combo.current(), self.fe_combo.current(),
+                   self.dph_combo.current(), self.np_combo.current())
+        if -1 in indices:
+            return
+        
+        score = score_hrn(*indices)
+        
+        self.hrn_result_label.config(text=f"HRN = {score.hrn:.2f}", foreground=score.color)
+        self.hrn_level_label.config(text=score.level, foreground=score.color, font=('Arial', 12, 'bold'))
+        
+        # Índices seleccionados en las tablas de factores (LO, FE, DPH, NP)
+        self.current_hrn = indices
     
     def save_hrn_calculation(self):
         """Guardar cálculo HRN en el historial"""
@@ -720,32 +643,37 @@ class TabManager:
             messagebox.showwarning("Advertencia", "Ingrese una descripción del peligro")
             return
         
-        calc = {
-            'description': description,
-            'hrn': self.current_hrn['hrn'],
-            'level': self.current_hrn['level'],
-            'lo': self.current_hrn['lo'],
-            'lo_desc': self.current_hrn['lo_desc'],
-            'fe': self.current_hrn['fe'],
-            'fe_desc': self.current_hrn['fe_desc'],
-            'dph': self.current_hrn['dph'],
-            'dph_desc': self.current_hrn['dph_desc'],
-            'np': self.current_hrn['np'],
-            'np_desc': self.current_hrn['np_desc'],
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        calc = HrnCalculation(description, *self.current_hrn,
+                              timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                              record_id=self.editing_hrn_id)
         
-        self.app.hrn_calculations.append(calc)
+        if self.editing_hrn_id in self.app.hrn_calculations:
+            self.app.hrn_calculations.update(calc)
+            message = "Cálculo HRN actualizado en el historial"
+        else:
+            self.app.hrn_tree.see(self.app.hrn_calculations.add(calc))
+            message = "Cálculo HRN guardado en el historial"
         
-        idx = len(self.app.hrn_calculations)
-        self.app.hrn_tree.insert('', 'end', text=str(idx), values=(
-            description[:40] + '...' if len(description) > 40 else description,
-            f"{calc['hrn']:.2f}",
-            calc['level']
-        ))
+        messagebox.showinfo("Éxito", message)
+        self.clear_hrn_form()
+    
+    def edit_hrn_calculation(self, event):
+        """Cargar en la calculadora el cálculo de la fila pulsada para editarlo"""
+        idx = self.app.hrn_tree.index_at(event.y)
+        if idx is None:
+            return
         
-        messagebox.showinfo("Éxito", "Cálculo HRN guardado en el historial")
+        calc = self.app.hrn_calculations[idx]
         self.clear_hrn_form()
+        self.hrn_description.insert(0, calc.description)
+        self.lo_combo.current(calc.lo_idx)
+        self.fe_combo.current(calc.fe_idx)
+        self.dph_combo.current(calc.dph_idx)
+        self.np_combo.current(calc.np_idx)
+        self.calculate_hrn()
+        
+        self.editing_hrn_id = calc.id
+        self.hrn_save_button.config(text=f"💾 Guardar Cambios (#{idx + 1})")
     
     def clear_hrn_form(self):
         """Limpiar formulario HRN"""
@@ -759,19 +687,19 @@ class TabManager:
                                    foreground='gray', font=('Arial', 11))
         if hasattr(self, 'current_hrn'):
             delattr(self, 'current_hrn')
+        self.editing_hrn_id = None
+        self.hrn_save_button.config(text="💾 Guardar Cálculo")
     
     def delete_hrn_calculation(self):
         """Eliminar cálculo HRN seleccionado"""
-        selected = self.app.hrn_tree.selection()
-        if not selected:
+        idx = self.app.hrn_tree.selected_index()
+        if idx is None:
             messagebox.showwarning("Advertencia", "Seleccione un cálculo para eliminar")
             return
         
         if messagebox.askyesno("Confirmar", "¿Desea eliminar el cálculo seleccionado?"):
-            idx = int(self.app.hrn_tree.item(selected[0])['text']) - 1
-            self.app.hrn_calculations.pop(idx)
-            self.app.hrn_tree.delete(selected[0])
-
-            for i, item in enumerate(self.app.hrn_tree.get_children()):
-                self.app.hrn_tree.item(item, text=str(i+1))
+            calc = self.app.hrn_calculations[idx]
+            self.app.hrn_calculations.remove(calc.id)
+            if calc.id == self.editing_hrn_id:
+                self.clear_hrn_form()
 
@@ -0,0 +1,148 @@
+from tkinter import ttk
+
+
+class VirtualTree(ttk.Frame):
+    """Treeview virtual: en Tk solo existen las filas visibles.
+
+    Las filas se leen del modelo (secuencia con len() e índice, p. ej.
+    RiskStore) mediante `record.row()`; la columna '#' muestra la posición.
+    Al desplazarse se reutilizan los mismos elementos del Treeview, así que
+    cargar, borrar o renumerar cuesta lo mismo con 50 o con 50.000 filas.
+    """
+
+    DEFAULT_ROWHEIGHT = 20
+
+    def __init__(self, master, columns, height=10, **kwargs):
+        super().__init__(master)
+        self.tree = ttk.Treeview(self, columns=columns, show='tree headings', height=height,
+                                 selectmode='browse', **kwargs)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.yview)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.model = ()
+        self.first = 0
+        self.rows = height
+        self.selected = None
+        self._items = []
+
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        self.tree.bind('<Up>', lambda e: self._move_selection(-1))
+        self.tree.bind('<Down>', lambda e: self._move_selection(1))
+        self.tree.bind('<Prior>', lambda e: self._move_selection(-self.rows))
+        self.tree.bind('<Next>', lambda e: self._move_selection(self.rows))
+
+    def heading(self, column, **kwargs):
+        return self.tree.heading(column, **kwargs)
+
+    def column(self, column, **kwargs):
+        return self.tree.column(column, **kwargs)
+
+    def set_model(self, model):
+        """Mostrar `model` y seguir sus cambios si admite subscribe()"""
+        self.model = model
+        if hasattr(model, 'subscribe'):
+            model.subscribe(self._on_model_changed)
+        self.first = 0
+        self.selected = None
+        self.refresh()
+
+    def selected_index(self):
+        """Posición en el modelo de la fila seleccionada, o None"""
+        return self.selected
+
+    def selected_record(self):
+        """Registro de la fila seleccionada, o None"""
+        return None if self.selected is None else self.model[self.selected]
+
+    def index_at(self, y):
+        """Posición en el modelo de la fila bajo la coordenada `y`, o None"""
+        item = self.tree.identify_row(y)
+        return self.first + self._items.index(item) if item in self._items else None
+
+    def see(self, index):
+        """Desplazar la vista para que la fila `index` sea visible"""
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + self.rows:
+            self.first = index - self.rows + 1
+        self.refresh()
+
+    def scroll(self, delta):
+        self.first += delta
+        self.refresh()
+
+    def yview(self, *args):
+        """Comando de la barra de desplazamiento (moveto / scroll)"""
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * len(self.model))
+        elif args[0] == 'scroll':
+            step = self.rows if args[2] == 'pages' else 1
+            self.first += int(args[1]) * step
+        self.refresh()
+
+    def refresh(self):
+        """Volver a leer del modelo solo las filas visibles"""
+        total = len(self.model)
+        self.first = max(0, min(self.first, total - self.rows))
+        count = min(self.rows, total - self.first)
+
+        while len(self._items) < count:
+            self._items.append(self.tree.insert('', 'end'))
+        while len(self._items) > count:
+            self.tree.delete(self._items.pop())
+
+        for offset, item in enumerate(self._items):
+            index = self.first + offset
+            self.tree.item(item, text=str(index + 1), values=self.model[index].row())
+
+        if self.selected is not None and self.first <= self.selected < self.first + count:
+            selection = (self._items[self.selected - self.first],)
+        else:
+            selection = ()
+        if self.tree.selection() != selection:
+            self.tree.selection_set(selection)
+
+        if total:
+            self.scrollbar.set(self.first / total, (self.first + count) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_model_changed(self, store, event, record, previous=None):
+        if event == 'reset':
+            self.first = 0
+        if event in ('remove', 'reset'):
+            self.selected = None
+        self.refresh()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._items:
+            self.selected = self.first + self._items.index(selection[0])
+
+    def _on_configure(self, event):
+        try:
+            rowheight = int(ttk.Style().lookup('Treeview', 'rowheight'))
+        except (TypeError, ValueError):
+            rowheight = self.DEFAULT_ROWHEIGHT
+        # Descontar la cabecera (aprox. una fila) para no dejar filas cortadas
+        rows = max(1, event.height // rowheight - 1)
+        if rows != self.rows:
+            self.rows = rows
+            self.refresh()
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _move_selection(self, delta):
+        total = len(self.model)
+        if total:
+            index = self.first if self.selected is None else self.selected + delta
+            self.selected = max(0, min(total - 1, index))
+            self.see(self.selected)
+            self.tree.focus(self._items[self.selected - self.first])
+        return 'break'